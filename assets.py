@@ -0,0 +1,205 @@
+"""Static asset pipeline: fingerprinted, precompressed, long-cached files.
+
+At startup (or at build time: `python assets.py`) every file under
+static/ is copied to static/dist/ with a content hash in its name
+(app.js -> app.3f2a9c1b04de.js), next to gzip and brotli variants.
+References to `/static/<name>` inside HTML/JS/CSS are rewritten to the
+hashed names, dependencies first, so a changed worklet also changes the
+hash of the app.js that loads it. index.html keeps its name but is
+rewritten the same way.
+
+Hashed names are served with strong ETags and
+`Cache-Control: public, max-age=31536000, immutable`. Unhashed names and
+index.html get `no-cache` (revalidate via ETag). The encoding is picked
+from Accept-Encoding: br, then gzip, then identity.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip-only without it
+    brotli = None
+
+DIST_DIR = "dist"
+INDEX = "index.html"
+HASH_LENGTH = 12
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Files worth rewriting/compressing
+TEXT_SUFFIXES = {".html", ".js", ".css", ".svg", ".json", ".txt"}
+MIN_COMPRESS_SIZE = 256
+
+_STATIC_REF = re.compile(r"/static/([\w./-]+)")
+
+
+@dataclass
+class Asset:
+    """A built asset and its precompressed variants."""
+
+    name: str           # Logical name, relative to static/ (e.g. "app.js")
+    hashed_name: str    # Fingerprinted name (e.g. "app.3f2a9c1b04de.js")
+    digest: str
+    media_type: str
+    variants: Dict[str, Path] = field(default_factory=dict)  # encoding -> file
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETag, distinct per representation
+        return f'"{self.digest}-{encoding}"' if encoding != "identity" else f'"{self.digest}"'
+
+
+def _hashed_name(name: str, digest: str) -> str:
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def negotiate_encoding(accept_encoding: str, available) -> str:
+    """Pick br, gzip or identity according to Accept-Encoding (q=0 excluded)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([\d.]+)", params)
+        if match:
+            q = float(match.group(1))
+        if token:
+            accepted[token.lower()] = q
+    for encoding in ("br", "gzip"):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and q > 0:
+            return encoding
+    return "identity"
+
+
+class AssetPipeline:
+    """Builds static/dist/ and serves its files."""
+
+    def __init__(self, static_dir: Path):
+        self.static_dir = Path(static_dir)
+        self.dist_dir = self.static_dir / DIST_DIR
+        self.assets: Dict[str, Asset] = {}   # Logical name -> asset
+        self._by_hashed: Dict[str, Asset] = {}
+        self.built = False
+
+    def ensure_built(self) -> None:
+        if not self.built:
+            self.build()
+
+    def build(self) -> Dict[str, Asset]:
+        """Fingerprint, rewrite and compress every file under static/."""
+        sources = {
+            str(path.relative_to(self.static_dir)): path.read_bytes()
+            for path in sorted(self.static_dir.rglob("*"))
+            if path.is_file() and self.dist_dir not in path.parents
+        }
+
+        if self.dist_dir.exists():
+            shutil.rmtree(self.dist_dir)
+        self.dist_dir.mkdir(parents=True)
+
+        assets: Dict[str, Asset] = {}
+        pending = dict(sources)
+        while pending:
+            progressed = False
+            for name, content in list(pending.items()):
+                refs = self._references(name, content, sources)
+                if name != INDEX and any(ref in pending and ref != name for ref in refs):
+                    continue  # Build dependencies first
+                if name == INDEX and len(pending) > 1:
+                    continue  # index.html last
+                assets[name] = self._build_one(name, self._rewrite(name, content, assets))
+                del pending[name]
+                progressed = True
+            if not progressed:
+                # Reference cycle: build the rest without resolving it
+                for name, content in pending.items():
+                    assets[name] = self._build_one(name, self._rewrite(name, content, assets))
+                pending = {}
+
+        self.assets = assets
+        self._by_hashed = {asset.hashed_name: asset for asset in assets.values()}
+        self.built = True
+        return assets
+
+    def _references(self, name: str, content: bytes, sources: dict) -> set:
+        if Path(name).suffix not in TEXT_SUFFIXES:
+            return set()
+        return {ref for ref in _STATIC_REF.findall(content.decode("utf-8", "replace")) if ref in sources}
+
+    def _rewrite(self, name: str, content: bytes, assets: Dict[str, Asset]) -> bytes:
+        if Path(name).suffix not in TEXT_SUFFIXES:
+            return content
+
+        def replace(match):
+            asset = assets.get(match.group(1))
+            return f"/static/{asset.hashed_name}" if asset else match.group(0)
+
+        return _STATIC_REF.sub(replace, content.decode("utf-8")).encode("utf-8")
+
+    def _build_one(self, name: str, content: bytes) -> Asset:
+        digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        hashed_name = name if name == INDEX else _hashed_name(name, digest)
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+
+        target = self.dist_dir / hashed_name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        variants = {"identity": target}
+
+        if Path(name).suffix in TEXT_SUFFIXES and len(content) >= MIN_COMPRESS_SIZE:
+            gz = target.with_name(target.name + ".gz")
+            gz.write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+            variants["gzip"] = gz
+            if brotli is not None:
+                br = target.with_name(target.name + ".br")
+                br.write_bytes(brotli.compress(content, quality=11))
+                variants["br"] = br
+
+        return Asset(name, hashed_name, digest, media_type, variants)
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        """Find an asset by hashed or logical name."""
+        self.ensure_built()
+        return self._by_hashed.get(path) or self.assets.get(path)
+
+    def url(self, name: str) -> str:
+        """Public URL of an asset (hashed when built)."""
+        asset = self.lookup(name)
+        return f"/static/{asset.hashed_name}" if asset else f"/static/{name}"
+
+    def response(self, asset: Asset, request: Request, immutable: bool) -> Response:
+        """Serve the best encoding of an asset, honouring If-None-Match."""
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), asset.variants)
+        etag = asset.etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return FileResponse(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+if __name__ == "__main__":
+    pipeline = AssetPipeline(Path(__file__).parent / "static")
+    for asset in pipeline.build().values():
+        print(f"{asset.name:24} -> {asset.hashed_name:32} {', '.join(sorted(asset.variants))}")
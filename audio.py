@@ -0,0 +1,358 @@
+"""RX audio pipeline: PCM source -> small frames -> per-client queues.
+
+One AudioHub reads 16-bit mono PCM from a configurable source and cuts it
+into short frames (default 20 ms). Each WebSocket client subscribes with
+its own bounded queue; when a slow client falls behind, its oldest frames
+are dropped instead of letting latency grow. Frames are encoded once per
+codec in use and shared between subscribers. When the source ends or
+fails, the hub reopens it with exponential backoff (if `reopen_delay` is
+set), so a restarted arecord or FIFO writer brings audio back.
+
+Sources:
+- alsa: `arecord` subprocess on the configured ALSA device
+- pipe: raw s16le PCM from a command's stdout, or from a FIFO path
+  (opened non-blocking; reads wait until a writer attaches)
+- wav:  a WAV file played back in real time (testing and benchmarks)
+
+Binary frame layout (little endian), followed by the payload:
+    version u8 | codec u8 | samples u16 | seq u32 | capture time f64 (epoch s)
+"""
+
+import array
+import asyncio
+import logging
+import os
+import shlex
+import struct
+import sys
+import time
+import wave
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+FRAME_HEADER = struct.Struct("<BBHId")
+FRAME_VERSION = 1
+
+CODEC_PCM16 = "pcm16"
+CODEC_ULAW = "ulaw"
+CODEC_IDS = {CODEC_PCM16: 0, CODEC_ULAW: 1}
+
+
+def _ulaw_byte(sample: int) -> int:
+    """G.711 mu-law encode one signed 16-bit sample."""
+    sign = 0x80 if sample < 0 else 0
+    magnitude = min(abs(sample), 32635) + 0x84
+    exponent = magnitude.bit_length() - 8
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+
+# Indexed by the signed sample: negative indices wrap to the top half
+_ULAW_TABLE = bytes(_ulaw_byte(i if i < 32768 else i - 65536) for i in range(65536))
+
+
+def ulaw_encode(pcm: bytes) -> bytes:
+    """Encode s16le PCM to 8-bit mu-law (halves the bandwidth)."""
+    samples = array.array("h", pcm)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return bytes(map(_ULAW_TABLE.__getitem__, samples))
+
+
+ENCODERS = {
+    CODEC_PCM16: lambda pcm: pcm,
+    CODEC_ULAW: ulaw_encode,
+}
+
+
+class AudioSource:
+    """Base class: yields fixed-size chunks of s16le mono PCM."""
+
+    sample_rate: int = 12000
+
+    async def open(self) -> None:
+        pass
+
+    async def read(self, nbytes: int) -> bytes:
+        """Read exactly nbytes. Raises EOFError when the source ends."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class WavFileSource(AudioSource):
+    """Plays a WAV file in real time, looping by default."""
+
+    def __init__(self, path: str, loop: bool = True, realtime: bool = True):
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self._pcm = b""
+        self._pos = 0
+        self._start: Optional[float] = None
+        self._sent = 0  # bytes delivered, for pacing
+
+    async def open(self) -> None:
+        with wave.open(self.path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{self.path}: only 16-bit WAV files are supported")
+            self.sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            pcm = wav.readframes(wav.getnframes())
+        if channels > 1:
+            # Keep the first channel only
+            samples = array.array("h", pcm)
+            pcm = samples[::channels].tobytes()
+        self._pcm = pcm
+        self._pos = 0
+        self._start = None
+        self._sent = 0
+
+    async def read(self, nbytes: int) -> bytes:
+        chunk = b""
+        while len(chunk) < nbytes:
+            if self._pos >= len(self._pcm):
+                if not self.loop or not self._pcm:
+                    raise EOFError(self.path)
+                self._pos = 0
+            take = self._pcm[self._pos:self._pos + nbytes - len(chunk)]
+            self._pos += len(take)
+            chunk += take
+
+        if self.realtime:
+            # A chunk is "captured" once its last sample would have been recorded
+            now = time.monotonic()
+            if self._start is None:
+                self._start = now
+            self._sent += nbytes
+            due = self._start + self._sent / (2 * self.sample_rate)
+            if due > now:
+                await asyncio.sleep(due - now)
+        return chunk
+
+
+class CommandSource(AudioSource):
+    """Raw s16le PCM from a subprocess stdout (arecord, sox, rtl_fm, ...)."""
+
+    def __init__(self, command: List[str], sample_rate: int):
+        self.command = command
+        self.sample_rate = sample_rate
+        self._process: Optional[asyncio.subprocess.Process] = None
+
+    async def open(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            *self.command, stdout=asyncio.subprocess.PIPE
+        )
+
+    async def read(self, nbytes: int) -> bytes:
+        try:
+            return await self._process.stdout.readexactly(nbytes)
+        except asyncio.IncompleteReadError:
+            raise EOFError(" ".join(self.command))
+
+    async def close(self) -> None:
+        if self._process and self._process.returncode is None:
+            self._process.terminate()
+            await self._process.wait()
+
+
+class FifoSource(AudioSource):
+    """Raw s16le PCM from a named pipe (FIFO)."""
+
+    def __init__(self, path: str, sample_rate: int):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._transport = None
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(self._reader)
+        # A blocking open would wait (and block the event loop) until a writer attaches
+        pipe = os.fdopen(os.open(self.path, os.O_RDONLY | os.O_NONBLOCK), "rb", buffering=0)
+        self._transport, _ = await loop.connect_read_pipe(lambda: protocol, pipe)
+
+    async def read(self, nbytes: int) -> bytes:
+        try:
+            return await self._reader.readexactly(nbytes)
+        except asyncio.IncompleteReadError:
+            raise EOFError(self.path)
+
+    async def close(self) -> None:
+        if self._transport:
+            self._transport.close()
+
+
+def source_from_config(audio_config: dict) -> AudioSource:
+    """Create the audio source described by the `audio` config section."""
+    kind = audio_config.get("source", "alsa")
+    rate = int(audio_config.get("sample_rate", 12000))
+    if kind == "wav":
+        return WavFileSource(audio_config["path"], loop=audio_config.get("loop", True))
+    if kind == "alsa":
+        return CommandSource(
+            ["arecord", "-q", "-D", audio_config.get("device", "default"),
+             "-f", "S16_LE", "-c", "1", "-r", str(rate), "-t", "raw"],
+            rate,
+        )
+    if kind == "pipe":
+        if audio_config.get("command"):
+            return CommandSource(shlex.split(audio_config["command"]), rate)
+        return FifoSource(audio_config["path"], rate)
+    raise ValueError(f"Unknown audio source: {kind}")
+
+
+@dataclass(eq=False)
+class AudioSubscription:
+    """A client's bounded frame queue."""
+
+    codec: str
+    queue: asyncio.Queue
+    dropped: int = 0
+
+    def push(self, frame: bytes) -> None:
+        """Enqueue a frame, dropping the oldest one when full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class AudioHub:
+    """Reads one audio source and fans frames out to all subscribers."""
+
+    def __init__(
+        self,
+        source: AudioSource,
+        frame_ms: int = 20,
+        buffer_frames: int = 5,
+        reopen_delay: Optional[float] = None,
+        reopen_max: float = 30.0,
+    ):
+        self.source = source
+        self.frame_ms = frame_ms
+        self.buffer_frames = buffer_frames
+        self.reopen_delay = reopen_delay   # None: stop when the source ends
+        self.reopen_max = reopen_max
+        self.subscribers: List[AudioSubscription] = []
+        # Raw PCM consumers (e.g. the spectrum engine), called for every frame
+        self.taps: List[Callable[[bytes], None]] = []
+        self.frames = 0
+        self.running = False
+        self._seq = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def frame_samples(self) -> int:
+        return self.source.sample_rate * self.frame_ms // 1000
+
+    def format(self, codec: str) -> dict:
+        """Stream description sent to a client before the binary frames."""
+        return {
+            "type": "audio_format",
+            "sample_rate": self.source.sample_rate,
+            "codec": codec,
+            "frame_ms": self.frame_ms,
+        }
+
+    def subscribe(self, codec: str = CODEC_PCM16) -> AudioSubscription:
+        if codec not in ENCODERS:
+            raise ValueError(f"Unsupported codec: {codec}")
+        subscription = AudioSubscription(codec, asyncio.Queue(maxsize=self.buffer_frames))
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AudioSubscription) -> None:
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+
+    async def start(self) -> None:
+        """Open the source and start the reader task."""
+        await self.source.open()
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.source.close()
+        self.running = False
+
+    def build_frame(self, pcm: bytes, codec: str, seq: int, capture_time: float) -> bytes:
+        payload = ENCODERS[codec](pcm)
+        header = FRAME_HEADER.pack(FRAME_VERSION, CODEC_IDS[codec], len(pcm) // 2, seq, capture_time)
+        return header + payload
+
+    async def _run(self) -> None:
+        delay = self.reopen_delay
+        while True:
+            frames = self.frames
+            try:
+                await self._pump()
+            except EOFError:
+                logger.info("Audio source ended")
+            except Exception as e:
+                logger.error("Audio source failed: %s", e)
+            self.running = False
+            if self.reopen_delay is None:
+                return
+            if self.frames > frames:
+                delay = self.reopen_delay  # It was working: start the backoff over
+            await self.source.close()
+            while True:
+                await asyncio.sleep(delay)
+                delay = min(self.reopen_max, delay * 2)
+                try:
+                    await self.source.open()
+                    break
+                except Exception as e:
+                    logger.warning("Audio source reopen failed: %s", e)
+            self.running = True
+
+    async def _pump(self) -> None:
+        nbytes = self.frame_samples * 2
+        while True:
+            pcm = await self.source.read(nbytes)
+            capture_time = time.time()
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            self.frames += 1
+            for tap in self.taps:
+                try:
+                    tap(pcm)
+                except Exception as e:
+                    logger.error("Audio tap failed: %s", e)
+            if not self.subscribers:
+                continue
+
+            # Encode once per codec in use, share between subscribers
+            frames: Dict[str, bytes] = {}
+            for subscription in self.subscribers:
+                frame = frames.get(subscription.codec)
+                if frame is None:
+                    frame = self.build_frame(pcm, subscription.codec, self._seq, capture_time)
+                    frames[subscription.codec] = frame
+                subscription.push(frame)
+
+
+def parse_frame(frame: bytes) -> dict:
+    """Decode a binary audio frame header (used by tests and benchmarks)."""
+    version, codec_id, samples, seq, capture_time = FRAME_HEADER.unpack_from(frame)
+    codec = {v: k for k, v in CODEC_IDS.items()}[codec_id]
+    return {
+        "version": version,
+        "codec": codec,
+        "samples": samples,
+        "seq": seq,
+        "capture_time": capture_time,
+        "payload": frame[FRAME_HEADER.size:],
+    }
@@ -0,0 +1,122 @@
+"""Measure RX audio latency end to end against the WAV file source.
+
+Starts the real app (uvicorn, in-process) with the audio source set to a
+generated WAV file played in real time, connects N clients to /ws/audio
+and measures, per frame, receive time minus capture time. The estimated
+end-to-end latency adds the frame duration (the first sample of a frame
+waits that long before the frame is captured) and the browser player's
+prebuffer (40 ms in static/app.js).
+
+Usage: python benchmarks/bench_audio_latency.py [--clients 10] [--seconds 5] [--codec ulaw]
+"""
+
+import argparse
+import array
+import asyncio
+import math
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+
+import main  # noqa: E402
+from audio import parse_frame  # noqa: E402
+
+CLIENT_PREBUFFER_MS = 40
+TARGET_MS = 150
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_tone(path: Path, rate: int, seconds: float) -> None:
+    samples = array.array("h", (
+        int(8000 * math.sin(2 * math.pi * 700 * i / rate)) for i in range(int(rate * seconds))
+    ))
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def listen(url: str, seconds: float, latencies: list) -> None:
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.recv()  # audio_format
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = await ws.recv()
+            latencies.append((time.time() - parse_frame(frame)["capture_time"]) * 1000)
+
+
+async def run(args) -> None:
+    tmp = Path(tempfile.mkdtemp())
+    wav_path = tmp / "tone.wav"
+    write_tone(wav_path, args.sample_rate, 2.0)
+
+    config = dict(main.get_config())
+    config["rigctld"] = {"host": "127.0.0.1", "port": free_port()}
+    # Everything the server writes goes to tmp, never the operator's data/
+    config["channels"] = {"db_path": str(tmp / "channels.db")}
+    config["logbook"] = {"db_path": str(tmp / "logbook.db")}
+    config["snapshot"] = {"enabled": False}
+    config["cw"] = {"enabled": False}
+    config["recorder"] = {"enabled": False}
+    config["dx_cluster"] = {"enabled": False}
+    config["audio"] = {
+        "enabled": True, "source": "wav", "path": str(wav_path),
+        "frame_ms": args.frame_ms, "buffer_frames": 5, "codec": args.codec,
+    }
+    original_get_config = main.get_config
+    main.get_config = lambda: config
+    main.app.dependency_overrides[original_get_config] = lambda: config
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    auth = config["auth"]
+    url = f"ws://127.0.0.1:{port}/ws/audio?token={auth['username']}:{auth['password']}"
+    latencies = []
+    await asyncio.gather(*(listen(url, args.seconds, latencies) for _ in range(args.clients)))
+
+    server.should_exit = True
+    await server_task
+
+    transport_p50 = statistics.median(latencies)
+    transport_p99 = percentile(latencies, 99)
+    e2e_p99 = args.frame_ms + transport_p99 + CLIENT_PREBUFFER_MS
+    print(f"clients={args.clients} codec={args.codec} frame={args.frame_ms} ms frames={len(latencies)}")
+    print(f"server->client  p50={transport_p50:.2f} ms  p95={percentile(latencies, 95):.2f} ms  "
+          f"p99={transport_p99:.2f} ms  max={max(latencies):.2f} ms")
+    print(f"estimated end-to-end p99 = {args.frame_ms} (frame) + {transport_p99:.2f} (transport) "
+          f"+ {CLIENT_PREBUFFER_MS} (prebuffer) = {e2e_p99:.1f} ms "
+          f"[{'OK' if e2e_p99 < TARGET_MS else 'OVER'} target {TARGET_MS} ms]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--codec", choices=["pcm16", "ulaw"], default="ulaw")
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--sample-rate", type=int, default=12000)
+    asyncio.run(run(parser.parse_args()))
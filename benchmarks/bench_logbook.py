@@ -0,0 +1,76 @@
+"""Benchmark logbook dupe checks, batched commits and ADIF export.
+
+Fills a temporary logbook with N contacts (default 50000) and reports:
+
+  log()        queueing one contact (includes the dupe check)
+  is_dupe()    dupe lookup with N contacts logged
+  commit       write-behind batches of batch_size contacts
+  query(call)  indexed callsign lookup
+  export       streaming ADIF export of the whole log
+
+Usage: python benchmarks/bench_logbook.py [contacts]
+"""
+
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from logbook import Logbook  # noqa: E402
+
+BANDS = [1830000, 3525000, 7025000, 14025000, 21025000, 28025000]
+
+
+def random_call(rng: random.Random) -> str:
+    return (rng.choice(string.ascii_uppercase) + rng.choice(string.ascii_uppercase + string.digits)
+            + str(rng.randrange(10)) + "".join(rng.choices(string.ascii_uppercase, k=rng.randrange(1, 4))))
+
+
+def main(contacts: int) -> None:
+    rng = random.Random(1)
+    calls = [random_call(rng) for _ in range(contacts)]
+    with tempfile.TemporaryDirectory() as tmp:
+        book = Logbook(str(Path(tmp) / "log.db"), batch_size=50)
+
+        start = time.perf_counter()
+        for i, call in enumerate(calls):
+            book.log({"call": call, "freq": rng.choice(BANDS), "mode": "CW", "time_on": 1_700_000_000 + i})
+        log_us = (time.perf_counter() - start) / contacts * 1e6
+
+        start = time.perf_counter()
+        batches = 0
+        while book.pending:
+            batch, book._pending = book._pending[:book.batch_size], book._pending[book.batch_size:]
+            book._commit(batch)
+            batches += 1
+        commit_ms = (time.perf_counter() - start) / batches * 1000
+
+        start = time.perf_counter()
+        for call in calls[:10000]:
+            book.is_dupe(call, "20m", "CW")
+        dupe_us = (time.perf_counter() - start) / 10000 * 1e6
+
+        start = time.perf_counter()
+        for call in calls[:1000]:
+            book.query(call=call)
+        query_us = (time.perf_counter() - start) / 1000 * 1e6
+
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in book.export_adif())
+        export_s = time.perf_counter() - start
+        book._db.close()
+
+    print(f"{contacts} contacts")
+    print(f"  log()        {log_us:8.2f} us/contact")
+    print(f"  is_dupe()    {dupe_us:8.2f} us")
+    print(f"  commit       {commit_ms:8.2f} ms/batch of {book.batch_size}")
+    print(f"  query(call)  {query_us:8.2f} us")
+    print(f"  export       {export_s:8.2f} s ({size / 1e6:.1f} MB ADIF)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
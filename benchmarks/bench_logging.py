@@ -0,0 +1,93 @@
+"""Benchmark poll-cycle time under different logging setups.
+
+Runs RigClient.get_state() against an in-process fake rigctld and logs
+to a temporary file, comparing:
+
+  sync-debug    logging.basicConfig(level=DEBUG): the old setup, where
+                every command formats and writes on the event loop
+  queue-debug   setup_logging() at DEBUG (writes on the listener thread),
+                rate limit off so it writes the same lines as sync-debug
+  queue-info    setup_logging() at INFO, as shipped in config.yaml
+
+Compare sync-debug and queue-debug only when their "log lines" match.
+
+Usage: python benchmarks/bench_logging.py [cycles]
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_rigctld import FakeRigctld  # noqa: E402
+from logging_setup import setup_logging  # noqa: E402
+from rig_client import RigClient  # noqa: E402
+
+
+def reset_logging():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    for name in ("rig_client",):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+async def measure(port: int, cycles: int) -> list:
+    client = RigClient("127.0.0.1", port)
+    await client.connect()
+    for _ in range(20):  # Warm up
+        await client.get_state()
+    times = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        await client.get_state()
+        times.append((time.perf_counter() - start) * 1000)
+    await client.disconnect()
+    return times
+
+
+async def main(cycles: int):
+    rig = FakeRigctld()
+    port = await rig.start()
+    print(f"{'setup':<12} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'log lines':>10}")
+
+    for name in ("sync-debug", "queue-debug", "queue-info"):
+        reset_logging()
+        with tempfile.NamedTemporaryFile("w+", suffix=".log") as log_file:
+            pipeline = None
+            if name == "sync-debug":
+                logging.basicConfig(
+                    level=logging.DEBUG,
+                    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                    stream=log_file,
+                )
+            else:
+                level = "DEBUG" if name == "queue-debug" else "INFO"
+                pipeline = setup_logging({"level": level, "rate_limit": {"enabled": False}}, stream=log_file)
+
+            times = await measure(port, cycles)
+            if pipeline:
+                pipeline.stop()
+            log_file.flush()
+            log_file.seek(0)
+            lines = sum(1 for _ in log_file)
+
+        times.sort()
+        print(
+            f"{name:<12} {statistics.fmean(times):>8.3f} {times[len(times) // 2]:>8.3f} "
+            f"{times[int(len(times) * 0.99)]:>8.3f} {lines:>10}"
+        )
+
+    reset_logging()
+    await rig.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
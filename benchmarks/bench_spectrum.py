@@ -0,0 +1,74 @@
+"""Benchmark spectrum engine CPU cost per FFT size and per subscriber.
+
+Feeds 10 s of synthetic 12 kHz audio through SpectrumEngine in 20 ms
+chunks (as AudioHub does) and reports:
+- FFT cost: CPU time per second of audio and per row, for each FFT size,
+  with one subscriber (nothing is computed without one) and the rows
+  published per second
+- fan-out cost: extra CPU per second of audio per added subscriber (mixed bins)
+
+Usage: python benchmarks/bench_spectrum.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spectrum import SpectrumEngine  # noqa: E402
+
+SAMPLE_RATE = 12000
+SECONDS = 10
+CHUNK = SAMPLE_RATE * 20 // 1000
+
+
+def make_chunks():
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * SECONDS) / SAMPLE_RATE
+    signal = 0.3 * np.sin(2 * np.pi * 700 * t) + 0.01 * rng.standard_normal(len(t))
+    pcm = (signal * 32767).astype("<i2").tobytes()
+    return [pcm[i:i + CHUNK * 2] for i in range(0, len(pcm), CHUNK * 2)]
+
+
+def run(engine, chunks):
+    start = time.process_time()
+    for chunk in chunks:
+        engine.feed(chunk)
+        # Pretend every client is due on each batch (worst case fan-out)
+        for subscription in engine.subscribers:
+            subscription.last_sent = 0.0
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+    return time.process_time() - start
+
+
+def main():
+    chunks = make_chunks()
+
+    print("FFT cost (one subscriber)")
+    print(f"{'fft':>6} {'rows/s':>7} {'sent/s':>7} {'cpu ms/s audio':>15} {'us/row':>8}")
+    for fft_size in (256, 512, 1024, 2048, 4096):
+        engine = SpectrumEngine(SAMPLE_RATE, fft_size=fft_size)
+        engine.subscribe()
+        cpu = run(engine, chunks)
+        print(f"{fft_size:>6} {engine.rows_computed / SECONDS:>7.1f} {engine.seq / SECONDS:>7.1f} "
+              f"{cpu / SECONDS * 1000:>15.3f} {cpu / engine.rows_computed * 1e6:>8.1f}")
+
+    print("\nFan-out cost (fft 1024, bins 128/256/512 mixed)")
+    print(f"{'subs':>6} {'cpu ms/s audio':>15} {'per sub ms/s':>13}")
+    engine = SpectrumEngine(SAMPLE_RATE, fft_size=1024)
+    engine.subscribe(bins=128)
+    base = run(engine, chunks)
+    for count in (10, 100, 500):
+        engine = SpectrumEngine(SAMPLE_RATE, fft_size=1024)
+        for i in range(count):
+            engine.subscribe(bins=(128, 256, 512)[i % 3])
+        cpu = run(engine, chunks)
+        print(f"{count:>6} {cpu / SECONDS * 1000:>15.3f} {(cpu - base) / SECONDS * 1000 / (count - 1):>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark SpotStore window queries vs. number of live spots.
+
+Usage: python benchmarks/bench_spots.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dx_cluster import Spot, SpotStore  # noqa: E402
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'spots':>8} {'add us':>8} {'query us':>9} {'hits':>6}")
+    for count in (1000, 10000, 50000, 100000):
+        store = SpotStore()
+        spots = [Spot(freq=rng.randrange(1800000, 30000000), dx=f"C{i}", spotter="X") for i in range(count)]
+
+        start = time.perf_counter()
+        for spot in spots:
+            store.add(spot)
+        add_us = (time.perf_counter() - start) / count * 1e6
+
+        queries = 10000
+        hits = 0
+        start = time.perf_counter()
+        for _ in range(queries):
+            freq = rng.randrange(1800000, 30000000)
+            hits += len(store.query(freq - 11200, freq + 11200))
+        query_us = (time.perf_counter() - start) / queries * 1e6
+
+        print(f"{count:>8} {add_us:>8.2f} {query_us:>9.2f} {hits / queries:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Minimal in-process rigctld for benchmarks.
+
+Answers the subset of the protocol RigClient uses (f/F, m/M, l/L, u/U,
+j/J, b and \\stop_morse, and Thetis ZZGT/ZZAR via `w`), with an optional
+per-command delay to simulate rig round-trip time. CW text is recorded
+with its arrival time in `morse`, so tests can check keying timing.
+
+    rig = FakeRigctld(latency=0.002)
+    port = await rig.start()
+    ...
+    await rig.stop()
+"""
+
+import asyncio
+import random
+import time
+
+
+class FakeRigctld:
+    """TCP server speaking enough rigctld to drive RigClient."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.host = host
+        self.commands = 0
+        self.morse = []          # (time.monotonic() received, text) per `b`
+        self.morse_stops = 0
+        self.state = {
+            "freq": 14074000,
+            "mode": "USB",
+            "width": 2400,
+            "RFPOWER": 0.5,
+            "BKIN": 0,
+            "rit": 0,
+            "agc": 3,
+            "zzar": 80,
+        }
+        self._server = None
+
+    async def start(self, port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def reply(self, line: str) -> bytes:
+        """Response bytes for one command line."""
+        state = self.state
+        parts = line.split()
+        if not parts:
+            return b""
+        cmd, args = parts[0], parts[1:]
+
+        if cmd == "f":
+            return f"{state['freq']}\n".encode()
+        if cmd == "F":
+            state["freq"] = int(args[0])
+        elif cmd == "m":
+            return f"{state['mode']}\n{state['width']}\n".encode()
+        elif cmd == "M":
+            state["mode"] = args[0]
+            if len(args) > 1 and int(args[1]):
+                state["width"] = int(args[1])
+        elif cmd == "l":
+            if args[0] == "STRENGTH":
+                return f"{random.randint(-110, -60)}\n".encode()
+            return f"{state.get(args[0], 0.0)}\n".encode()
+        elif cmd == "L":
+            state[args[0]] = float(args[1])
+        elif cmd == "u":
+            return f"{state.get(args[0], 0)}\n".encode()
+        elif cmd == "U":
+            state[args[0]] = int(args[1])
+        elif cmd == "j":
+            return f"{state['rit']}\n".encode()
+        elif cmd == "J":
+            state["rit"] = int(args[0])
+        elif cmd == "b":
+            self.morse.append((time.monotonic(), line[2:]))
+        elif cmd == "\\stop_morse":
+            self.morse_stops += 1
+        elif cmd == "w":
+            raw = args[0] if args else ""
+            if raw == "ZZGT;":
+                return f"ZZGT{state['agc']};\x00".encode()
+            if raw == "ZZAR;":
+                return f"ZZAR{state['zzar']:+04d};\x00".encode()
+            if raw.startswith("ZZGT"):
+                state["agc"] = int(raw[4])
+            elif raw.startswith("ZZAR"):
+                state["zzar"] = int(raw[4:8])
+            return b""  # Raw SETs get no reply
+        return b"RPRT 0\n"
+
+    async def _handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                self.commands += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                response = self.reply(line.decode().strip())
+                if response:
+                    writer.write(response)
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
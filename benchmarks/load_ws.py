@@ -0,0 +1,305 @@
+"""WebSocket load generator for capacity planning.
+
+Opens N authenticated /ws connections per step and measures how state
+broadcasts reach them:
+
+- delivery latency: receive time minus the state message's `ts`
+  (server wall clock, so run on the same host or with synced clocks)
+- drops: gaps in the state `seq` (the server drops the oldest queued
+  messages for clients that fall behind)
+- command round-trip: `set_*` send -> `ack`, for the active clients,
+  and how many commands were refused by rate limiting / admission control
+- server side, from /healthz after each step: missed poll deadlines,
+  poll cycle p99 and event-loop lag p99
+
+By default it starts its own server in a child process, backed by the
+in-process fake rigctld (benchmarks/fake_rigctld.py), so client load
+doesn't share an event loop with the server. Pass --url to load an
+already running instance instead.
+
+Usage:
+    python benchmarks/load_ws.py --clients 100,500,1000,2000 --seconds 10 \\
+        --active 0.05 --set-rate 2 --slow 0.1 --slow-delay-ms 500
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import resource
+import socket
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+
+USERNAME, PASSWORD = "operator", "loadtest"
+
+
+@dataclass
+class StepStats:
+    """Measurements from every client in one step."""
+
+    latencies_ms: List[float] = field(default_factory=list)
+    ack_ms: List[float] = field(default_factory=list)
+    messages: int = 0
+    gaps: int = 0
+    connected: int = 0
+    failed: int = 0
+    rejected: int = 0  # Commands refused with a retry-after error
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def serve(port: int, poll_ms: int, rig_latency_ms: float) -> None:
+    """Child process: fake rigctld + the app on `port`."""
+    import uvicorn
+
+    import main
+    from fake_rigctld import FakeRigctld
+
+    raise_fd_limit()
+
+    async def run():
+        rig = FakeRigctld(latency=rig_latency_ms / 1000)
+        rig_port = await rig.start()
+        tmp = Path(tempfile.mkdtemp())
+        config = dict(main.get_config())
+        config.update({
+            "rigctld": {"host": "127.0.0.1", "port": rig_port},
+            "auth": {"username": USERNAME, "password": PASSWORD},
+            "polling": {"interval_ms": poll_ms},
+            # Everything the server writes goes to tmp, never the operator's data/
+            "channels": {"db_path": str(tmp / "channels.db")},
+            "logbook": {"db_path": str(tmp / "logbook.db")},
+            "snapshot": {"enabled": True, "path": str(tmp / "snapshot.json")},
+            "cw": {"enabled": False},
+            "dx_cluster": {"enabled": False},
+            "audio": {"enabled": False},
+            "spectrum": {"enabled": False},
+            "recorder": {"enabled": False},
+            "replay": {"enabled": False},
+            "logging": {"level": "WARNING"},
+        })
+        original_get_config = main.get_config
+        main.get_config = lambda: config
+        main.app.dependency_overrides[original_get_config] = lambda: config
+        server = uvicorn.Server(uvicorn.Config(
+            main.app, host="127.0.0.1", port=port, log_level="warning",
+        ))
+        await server.serve()
+
+    asyncio.run(run())
+
+
+async def client(url: str, stats: StepStats, stop: asyncio.Event, connect_gate: asyncio.Semaphore,
+                 set_rate: float, slow_delay: float) -> None:
+    try:
+        async with connect_gate:
+            ws = await websockets.connect(url, max_size=None, open_timeout=30)
+    except Exception:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    sent_at: List[float] = []
+
+    async def commander():
+        rng = random.Random()
+        while not stop.is_set():
+            await asyncio.sleep(rng.expovariate(set_rate))
+            command = rng.choice([
+                {"cmd": "set_freq", "value": 14074000 + rng.randrange(-5000, 5000)},
+                {"cmd": "set_rf_gain", "value": rng.randrange(0, 101)},
+                {"cmd": "set_power", "value": rng.randrange(5, 101)},
+            ])
+            sent_at.append(time.monotonic())
+            await ws.send(json.dumps(command))
+
+    commander_task = asyncio.create_task(commander()) if set_rate > 0 else None
+    last_seq = None
+    try:
+        while not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            now = time.time()
+            message = json.loads(raw)
+            kind = message.get("type")
+            if kind == "state" and "ts" in message:
+                stats.messages += 1
+                stats.latencies_ms.append((now - message["ts"]) * 1000)
+                seq = message.get("seq")
+                if last_seq is not None and seq is not None and seq > last_seq + 1:
+                    stats.gaps += seq - last_seq - 1
+                last_seq = seq
+            elif kind == "ack" and sent_at:
+                stats.ack_ms.append((time.monotonic() - sent_at.pop(0)) * 1000)
+            elif kind == "error" and sent_at:
+                sent_at.pop(0)
+                stats.rejected += "retry_after_ms" in message
+            if slow_delay:
+                await asyncio.sleep(slow_delay)
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        if commander_task:
+            commander_task.cancel()
+        await ws.close()
+
+
+async def server_health(base_url: str) -> dict:
+    try:
+        async with httpx.AsyncClient(timeout=10) as http:
+            return (await http.get(f"{base_url}/healthz")).json()
+    except Exception:
+        return {}
+
+
+async def run_step(args, ws_url: str, base_url: str, count: int) -> dict:
+    stats = StepStats()
+    slow = StepStats()  # Slow readers are reported separately
+    stop = asyncio.Event()
+    gate = asyncio.Semaphore(args.connect_concurrency)
+    rng = random.Random(count)
+
+    tasks = []
+    for i in range(count):
+        is_slow = rng.random() < args.slow
+        is_active = not is_slow and rng.random() < args.active
+        tasks.append(asyncio.create_task(client(
+            ws_url, slow if is_slow else stats, stop, gate,
+            set_rate=args.set_rate if is_active else 0.0,
+            slow_delay=args.slow_delay_ms / 1000 if is_slow else 0.0,
+        )))
+
+    # Let every connection finish its handshake, then measure a clean window
+    while stats.connected + stats.failed + slow.connected + slow.failed < count:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(1.0)
+    for s in (stats, slow):
+        s.latencies_ms.clear()
+        s.ack_ms.clear()
+        s.messages = s.gaps = s.rejected = 0
+    health_before = await server_health(base_url)
+
+    await asyncio.sleep(args.seconds)
+    health = await server_health(base_url)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    poll = health.get("poll") or {}
+    missed = poll.get("missed_deadlines", 0) - ((health_before.get("poll") or {}).get("missed_deadlines", 0))
+    return {
+        "clients": count,
+        "connected": stats.connected + slow.connected,
+        "failed": stats.failed + slow.failed,
+        "msgs_per_s": (stats.messages + slow.messages) / args.seconds,
+        "p50": percentile(stats.latencies_ms, 50),
+        "p95": percentile(stats.latencies_ms, 95),
+        "p99": percentile(stats.latencies_ms, 99),
+        "max": max(stats.latencies_ms, default=float("nan")),
+        "drops": stats.gaps,
+        "slow_drops": slow.gaps,
+        "ack_p99": percentile(stats.ack_ms, 99),
+        "rejected": stats.rejected,
+        "missed": missed,
+        "cycle_p99": (poll.get("cycle_ms") or {}).get("p99"),
+        "lag_p99": (health.get("loop_lag_ms") or {}).get("p99"),
+    }
+
+
+def print_report(rows: List[dict]) -> None:
+    columns = ["clients", "connected", "failed", "msgs_per_s", "p50", "p95", "p99", "max",
+               "drops", "slow_drops", "ack_p99", "rejected", "missed", "cycle_p99", "lag_p99"]
+
+    def cell(value) -> str:
+        if value is None:
+            return "-"
+        return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+    widths = [max(len(name), 7) for name in columns]
+    print(" ".join(name.rjust(width) for name, width in zip(columns, widths)))
+    for row in rows:
+        print(" ".join(cell(row[name]).rjust(width) for name, width in zip(columns, widths)))
+    print("ms: state delivery latency (non-slow clients), ack round-trip, poll cycle, loop lag; "
+          "drops: missed seq numbers")
+
+
+async def run(args) -> None:
+    raise_fd_limit()
+    process = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        process = multiprocessing.Process(
+            target=serve, args=(port, args.poll_ms, args.rig_latency_ms), daemon=True,
+        )
+        process.start()
+        base_url = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            if await server_health(base_url):
+                break
+            await asyncio.sleep(0.1)
+
+    ws_url = base_url.replace("http", "ws", 1) + f"/ws?token={args.username}:{args.password}"
+    rows = []
+    try:
+        for count in args.clients:
+            rows.append(await run_step(args, ws_url, base_url, count))
+            print(f"  step {count}: p99 {rows[-1]['p99']:.1f} ms", file=sys.stderr)
+    finally:
+        if process:
+            process.terminate()
+            process.join()
+
+    print_report(rows)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=lambda v: [int(n) for n in v.split(",")], default=[50, 200, 1000],
+                        help="comma-separated client counts, one step each")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measurement window per step")
+    parser.add_argument("--active", type=float, default=0.0, help="fraction of clients sending set_* commands")
+    parser.add_argument("--set-rate", type=float, default=1.0, help="commands/s per active client")
+    parser.add_argument("--slow", type=float, default=0.0, help="fraction of slow readers")
+    parser.add_argument("--slow-delay-ms", type=float, default=500.0, help="delay after each message read")
+    parser.add_argument("--poll-ms", type=int, default=200, help="server poll interval (local server only)")
+    parser.add_argument("--rig-latency-ms", type=float, default=1.0, help="fake rigctld per-command delay")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="handshakes in flight")
+    parser.add_argument("--url", help="target a running instance (http://host:port) instead")
+    parser.add_argument("--username", default=USERNAME)
+    parser.add_argument("--password", default=PASSWORD)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
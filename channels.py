@@ -0,0 +1,280 @@
+"""Memory channel store (nets, beacons, contest run frequencies).
+
+Channels live in SQLite with indexes on frequency, band and tag, so
+paginated queries never scan the table. A sorted in-memory copy of the
+channel frequencies answers "nearest channel to the current freq" with a
+binary search, cheap enough to run on every poll.
+
+Bulk import accepts CSV (header row with name, freq, mode, tags, notes)
+and ADIF-style records (<FREQ:6>14.074<MODE:3>FT8<NAME:..>...<EOR>).
+"""
+
+import bisect
+import csv
+import io
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+# IARU Region 1 amateur bands: (label, low Hz, high Hz)
+BAND_PLAN = [
+    ("160m", 1810000, 2000000),
+    ("80m", 3500000, 3800000),
+    ("60m", 5351500, 5366500),
+    ("40m", 7000000, 7200000),
+    ("30m", 10100000, 10150000),
+    ("20m", 14000000, 14350000),
+    ("17m", 18068000, 18168000),
+    ("15m", 21000000, 21450000),
+    ("12m", 24890000, 24990000),
+    ("10m", 28000000, 29700000),
+    ("6m", 50000000, 52000000),
+    ("2m", 144000000, 146000000),
+    ("70cm", 430000000, 440000000),
+]
+
+MAX_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    freq INTEGER NOT NULL,
+    mode TEXT,
+    band TEXT,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_channels_freq ON channels(freq);
+CREATE INDEX IF NOT EXISTS idx_channels_band_freq ON channels(band, freq);
+CREATE TABLE IF NOT EXISTS channel_tags (
+    channel_id INTEGER NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, channel_id)
+);
+CREATE INDEX IF NOT EXISTS idx_channel_tags_channel ON channel_tags(channel_id);
+"""
+
+
+def band_for(freq: int) -> Optional[str]:
+    """Return the band label for a frequency in Hz, or None if out of band."""
+    for label, low, high in BAND_PLAN:
+        if low <= freq <= high:
+            return label
+    return None
+
+
+def parse_freq(value: str) -> int:
+    """Parse a frequency: decimal values are MHz, integers are Hz."""
+    value = value.strip()
+    if "." in value:
+        return int(round(float(value) * 1000000))
+    return int(value)
+
+
+def parse_tags(value: Optional[str]) -> List[str]:
+    """Split a tag list separated by ';', ',' or spaces."""
+    if not value:
+        return []
+    return [tag.lower() for tag in re.split(r"[;,\s]+", value) if tag]
+
+
+def parse_csv(text: str) -> List[dict]:
+    """Parse CSV channel rows (header: name, freq, mode, tags, notes)."""
+    channels = []
+    for row in csv.DictReader(io.StringIO(text)):
+        row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+        if not row.get("freq"):
+            continue
+        channels.append({
+            "name": row.get("name") or row["freq"],
+            "freq": parse_freq(row["freq"]),
+            "mode": row.get("mode") or None,
+            "tags": parse_tags(row.get("tags")),
+            "notes": row.get("notes") or None,
+        })
+    return channels
+
+
+_ADIF_TAG = re.compile(r"<(\w+)(?::(\d+)(?::\w)?)?>")
+
+
+def parse_adif(text: str) -> List[dict]:
+    """Parse ADIF-style records into channels.
+
+    Uses FREQ (MHz), MODE, NAME (or CALL), COMMENT and the app-defined
+    APP_WEBRADIO_TAGS field. Anything before <EOH> is header and ignored.
+    """
+    channels = []
+    record: dict = {}
+    pos = 0
+    while True:
+        match = _ADIF_TAG.search(text, pos)
+        if not match:
+            break
+        name = match.group(1).upper()
+        pos = match.end()
+
+        if match.group(2) is not None:
+            length = int(match.group(2))
+            record[name] = text[pos:pos + length]
+            pos += length
+        elif name == "EOH":
+            record = {}
+        elif name == "EOR":
+            if "FREQ" in record:
+                channels.append({
+                    "name": record.get("NAME") or record.get("CALL") or record["FREQ"],
+                    "freq": int(round(float(record["FREQ"]) * 1000000)),
+                    "mode": record.get("MODE"),
+                    "tags": parse_tags(record.get("APP_WEBRADIO_TAGS")),
+                    "notes": record.get("COMMENT"),
+                })
+            record = {}
+    return channels
+
+
+class ChannelStore:
+    """SQLite-backed channel store with an in-memory frequency index.
+
+    Methods are synchronous and thread-safe; the server calls the
+    potentially slow ones (import, query) through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+        # Sorted frequencies + matching channel summaries for nearest().
+        # Swapped as one tuple so lookups never see a half-built index.
+        self._index: Tuple[List[int], List[dict]] = ([], [])
+        self._rebuild_index()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return len(self._index[0])
+
+    def _rebuild_index(self) -> None:
+        rows = self._db.execute("SELECT id, name, freq, mode FROM channels ORDER BY freq, id").fetchall()
+        self._index = (
+            [row["freq"] for row in rows],
+            [{"id": row["id"], "name": row["name"], "freq": row["freq"], "mode": row["mode"]} for row in rows],
+        )
+
+    def add_many(self, channels: Iterable[dict]) -> int:
+        """Insert channels in one transaction. Returns the number added."""
+        count = 0
+        with self._lock:
+            with self._db:
+                for channel in channels:
+                    cursor = self._db.execute(
+                        "INSERT INTO channels (name, freq, mode, band, notes) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            channel["name"],
+                            int(channel["freq"]),
+                            channel.get("mode"),
+                            band_for(int(channel["freq"])),
+                            channel.get("notes"),
+                        ),
+                    )
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO channel_tags (channel_id, tag) VALUES (?, ?)",
+                        [(cursor.lastrowid, tag) for tag in channel.get("tags", [])],
+                    )
+                    count += 1
+            self._rebuild_index()
+        return count
+
+    def import_text(self, text: str, fmt: str = "csv") -> int:
+        """Bulk import CSV or ADIF text. Returns the number of channels added."""
+        if fmt == "csv":
+            return self.add_many(parse_csv(text))
+        if fmt == "adif":
+            return self.add_many(parse_adif(text))
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    def delete(self, channel_id: int) -> bool:
+        """Delete a channel. Returns True if it existed."""
+        with self._lock:
+            with self._db:
+                cursor = self._db.execute("DELETE FROM channels WHERE id = ?", (channel_id,))
+            self._rebuild_index()
+        return cursor.rowcount > 0
+
+    def query(
+        self,
+        band: Optional[str] = None,
+        tag: Optional[str] = None,
+        min_freq: Optional[int] = None,
+        max_freq: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> dict:
+        """Return one page of channels ordered by frequency.
+
+        Returns: {"total", "offset", "limit", "items": [...]}
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+
+        where, params = [], []
+        if band:
+            where.append("c.band = ?")
+            params.append(band)
+        if tag:
+            where.append("c.id IN (SELECT channel_id FROM channel_tags WHERE tag = ?)")
+            params.append(tag.lower())
+        if min_freq is not None:
+            where.append("c.freq >= ?")
+            params.append(int(min_freq))
+        if max_freq is not None:
+            where.append("c.freq <= ?")
+            params.append(int(max_freq))
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM channels c {clause}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"""
+                SELECT c.*, (SELECT group_concat(tag, ';') FROM channel_tags t WHERE t.channel_id = c.id) AS tags
+                FROM channels c {clause}
+                ORDER BY c.freq, c.id
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset],
+            ).fetchall()
+
+        items = []
+        for row in rows:
+            item = dict(row)
+            item["tags"] = sorted(item["tags"].split(";")) if item["tags"] else []
+            items.append(item)
+        return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+    def nearest(self, freq: int, max_distance: Optional[int] = None) -> Optional[dict]:
+        """Return the channel closest to freq (binary search, no DB access).
+
+        Returns: Channel summary with "offset" (freq - channel freq) in Hz,
+                 or None if the store is empty or nothing is within max_distance.
+        """
+        freqs, summaries = self._index
+        if not freqs:
+            return None
+
+        i = bisect.bisect_left(freqs, freq)
+        if i == len(freqs) or (i > 0 and freq - freqs[i - 1] <= freqs[i] - freq):
+            i -= 1
+        if max_distance is not None and abs(freqs[i] - freq) > max_distance:
+            return None
+
+        channel = dict(summaries[i])
+        channel["offset"] = freq - channel["freq"]
+        return channel
@@ -0,0 +1,249 @@
+"""CW keying: text from clients to the rig's keyer, paced and abortable.
+
+Clients send text with `cw_send`. It is queued and fed to the rig one
+word at a time with rigctld's `b` (send_morse). Those commands take the
+rig connection ahead of polling (PRIORITY_KEYING in rig_client.py), so a
+word waits for at most one in-flight poll command.
+
+Words are paced from the keyer speed. The rig is never given more than
+`lead` seconds of CW beyond what it is already sending, so the sound
+has no gaps and `cw_abort` stops within about `lead` (at once if the rig
+honours \\stop_morse). A speed change applies from the next word.
+
+Per-message latency is measured from cw_send to the rig accepting the
+first word (`queue_ms`), and per word as the time `b` took including
+waiting for the connection (`rig_ms`). Both are reported in /healthz.
+cw_send is acked with the message id. Progress goes to every client as
+`cw` messages:
+    {"type": "cw", "event": "started" | "done" | "aborted" | "error" | "speed", "id": .., ...}
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+
+from health import percentiles
+
+logger = logging.getLogger(__name__)
+
+MIN_WPM, MAX_WPM = 5, 60
+
+# Dits and dahs per character
+MORSE = {
+    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".", "F": "..-.", "G": "--.", "H": "....",
+    "I": "..", "J": ".---", "K": "-.-", "L": ".-..", "M": "--", "N": "-.", "O": "---", "P": ".--.",
+    "Q": "--.-", "R": ".-.", "S": "...", "T": "-", "U": "..-", "V": "...-", "W": ".--", "X": "-..-",
+    "Y": "-.--", "Z": "--..",
+    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-",
+    "5": ".....", "6": "-....", "7": "--...", "8": "---..", "9": "----.",
+    ".": ".-.-.-", ",": "--..--", "?": "..--..", "/": "-..-.", "=": "-...-", "+": ".-.-.",
+    "-": "-....-", "@": ".--.-.", "'": ".----.", "(": "-.--.", ")": "-.--.-", ":": "---...",
+}
+
+
+def morse_units(text: str) -> int:
+    """Length of `text` in dit units (PARIS timing), including the gap after it."""
+    units = 0
+    for word in text.split():
+        for char in word:
+            code = MORSE.get(char, "")
+            units += sum(1 if element == "." else 3 for element in code) + len(code) - 1 + 3
+        units += 4  # Inter-character gap (3) + 4 = word gap (7)
+    return units
+
+
+def unit_seconds(wpm: float) -> float:
+    """One dit at `wpm` (PARIS: 50 units per word)."""
+    return 1.2 / wpm
+
+
+def clean_text(text: str) -> str:
+    """Upper-case, keep only keyable characters, collapse spaces."""
+    return " ".join("".join(c for c in word if c in MORSE) for word in str(text).upper().split()).strip()
+
+
+class CWJob:
+    """One cw_send message."""
+
+    __slots__ = ("id", "text", "words", "enqueued", "started")
+
+    def __init__(self, job_id: int, text: str):
+        self.id = job_id
+        self.text = text
+        self.words = [word + " " for word in text.split()]
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+
+
+class CWKeyer:
+    """Queues CW text and feeds it to the rig word by word."""
+
+    def __init__(
+        self,
+        rig,
+        on_event: Optional[Callable[[dict], Awaitable]] = None,
+        wpm: int = 20,
+        lead: float = 1.0,
+        max_queue: int = 20,
+        history: int = 200,
+    ):
+        self.rig = rig
+        self.on_event = on_event
+        self.wpm = wpm
+        self.lead = lead
+        self.max_queue = max_queue
+        self.sent_words = 0
+        self.aborted = 0
+        self.queue_times: Deque[float] = deque(maxlen=history)
+        self.rig_times: Deque[float] = deque(maxlen=history)
+        self._jobs: Deque[CWJob] = deque()
+        self._ids = itertools.count(1)
+        self._current: Optional[CWJob] = None
+        self._keyed_until = 0.0    # monotonic time the rig's buffered CW should end
+        self._speed_synced = False  # Pacing assumes the rig keys at self.wpm
+        self._wake: Optional[asyncio.Event] = None
+        self._abort: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, rig, cw_config: dict, on_event=None) -> "CWKeyer":
+        return cls(
+            rig,
+            on_event=on_event,
+            wpm=cw_config.get("wpm", 20),
+            lead=cw_config.get("lead_s", 1.0),
+            max_queue=cw_config.get("max_queue", 20),
+        )
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None or bool(self._jobs)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._abort = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def send(self, text: str) -> CWJob:
+        """Queue text for keying.
+
+        Raises: ValueError if nothing is keyable or the queue is full
+        """
+        text = clean_text(text)
+        if not text:
+            raise ValueError("No sendable CW characters")
+        if len(self._jobs) >= self.max_queue:
+            raise ValueError("CW queue full")
+        job = CWJob(next(self._ids), text)
+        self._jobs.append(job)
+        if self._wake:
+            self._wake.set()
+        return job
+
+    async def abort(self) -> int:
+        """Drop queued text and stop the current message. Returns messages dropped."""
+        dropped = len(self._jobs) + (self._current is not None)
+        for job in self._jobs:
+            await self._emit("aborted", job)
+        self._jobs.clear()
+        if self._current is not None and self._abort:
+            self._abort.set()
+        if self._keyed_until > time.monotonic():
+            try:
+                await self.rig.stop_morse()
+            except Exception as e:
+                logger.warning("CW stop failed: %s", e)
+            self._keyed_until = 0.0
+        self.aborted += dropped
+        return dropped
+
+    async def set_speed(self, wpm: int) -> bool:
+        """Change the keyer speed (from the next word on).
+
+        Returns False (speed unchanged) if the rig refused it.
+        Raises: ValueError if out of range
+        """
+        wpm = int(wpm)
+        if not MIN_WPM <= wpm <= MAX_WPM:
+            raise ValueError(f"CW speed must be {MIN_WPM}-{MAX_WPM} WPM")
+        if not await self.rig.set_keyer_speed(wpm):
+            return False
+        self._speed_synced = True
+        self.wpm = wpm
+        if self.on_event:
+            await self.on_event({"type": "cw", "event": "speed", "wpm": wpm})
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "wpm": self.wpm,
+            "queued": len(self._jobs),
+            "sending": self._current.id if self._current else None,
+            "sent_words": self.sent_words,
+            "aborted": self.aborted,
+            "queue_ms": percentiles(t * 1000 for t in self.queue_times),
+            "rig_ms": percentiles(t * 1000 for t in self.rig_times),
+        }
+
+    async def _emit(self, event: str, job: CWJob, **extra) -> None:
+        if self.on_event:
+            await self.on_event({"type": "cw", "event": event, "id": job.id, **extra})
+
+    async def _run(self) -> None:
+        while True:
+            if not self._jobs:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            job = self._current = self._jobs.popleft()
+            self._abort.clear()
+            try:
+                await self._key(job)
+            except Exception as e:
+                logger.error("CW keying failed: %s", e)
+                await self._emit("error", job, message=str(e))
+            finally:
+                self._current = None
+
+    async def _key(self, job: CWJob) -> None:
+        if not self._speed_synced:
+            self._speed_synced = await self.rig.set_keyer_speed(self.wpm)
+        for word in job.words:
+            # Keep at most `lead` seconds buffered in the rig
+            wait = self._keyed_until - self.lead - time.monotonic()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self._abort.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            if self._abort.is_set():
+                await self._emit("aborted", job)
+                return
+
+            started = time.monotonic()
+            if not await self.rig.send_morse(word):
+                await self._emit("error", job, message="Rig rejected CW")
+                return
+            accepted = time.monotonic()
+            self.rig_times.append(accepted - started)
+            self.sent_words += 1
+            if job.started is None:
+                job.started = accepted
+                self.queue_times.append(accepted - job.enqueued)
+                await self._emit("started", job, queue_ms=round((accepted - job.enqueued) * 1000, 1))
+            duration = morse_units(word) * unit_seconds(self.wpm)
+            self._keyed_until = max(self._keyed_until, accepted) + duration
+        await self._emit("done", job)
@@ -0,0 +1,222 @@
+"""DX cluster spot ingestion for the band-map overlay.
+
+DXClusterClient is a small async telnet client: it logs in with the
+configured callsign, parses "DX de ..." lines and feeds a SpotStore.
+
+SpotStore keeps live spots in arrays sorted by frequency, so "spots within
+freq ± window" is two binary searches plus a slice, well under a
+millisecond even with tens of thousands of spots. Spots expire after a TTL
+(oldest first, from an arrival-ordered deque), and a new spot for the same
+call within 1 kHz replaces the old one.
+
+Spot line format (DX Spider / AR-Cluster / CC Cluster):
+    DX de IK3XX:     14025.0  JA1ABC       CW 599 up 2               1234Z
+"""
+
+import asyncio
+import bisect
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+_SPOT_LINE = re.compile(
+    r"^DX de\s+([A-Z0-9/#\-]+)[:\s]\s*(\d+(?:\.\d+)?)\s+([A-Z0-9/]+)\s+(.*?)\s*(\d{4}Z)?\s*$",
+    re.IGNORECASE,
+)
+
+# Telnet option negotiation (IAC + command [+ option])
+_TELNET_IAC = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]", re.DOTALL)
+
+
+@dataclass
+class Spot:
+    """A single DX spot."""
+
+    freq: int  # Hz
+    dx: str
+    spotter: str
+    comment: str = ""
+    utc: Optional[str] = None  # "HHMMZ" as reported by the cluster
+    received: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> dict:
+        return {
+            "freq": self.freq,
+            "dx": self.dx,
+            "spotter": self.spotter,
+            "comment": self.comment,
+            "utc": self.utc,
+        }
+
+
+def parse_spot(line: str) -> Optional[Spot]:
+    """Parse a "DX de ..." cluster line. Returns None for other lines."""
+    match = _SPOT_LINE.match(line.strip())
+    if not match:
+        return None
+    spotter, khz, dx, comment, utc = match.groups()
+    return Spot(
+        freq=int(round(float(khz) * 1000)),
+        dx=dx.upper(),
+        spotter=spotter.upper(),
+        comment=comment,
+        utc=utc.upper() if utc else None,
+    )
+
+
+class SpotStore:
+    """Time-expiring spots indexed by frequency (sorted arrays + bisect)."""
+
+    def __init__(self, ttl: float = 900.0, dedupe_hz: int = 1000):
+        self.ttl = ttl
+        self.dedupe_hz = dedupe_hz
+        self.version = 0  # Bumped on every add/expire
+
+        # Parallel arrays sorted by (freq, seq)
+        self._keys: List[Tuple[int, int]] = []
+        self._spots: List[Spot] = []
+        # Arrival order for expiry: (seq, spot)
+        self._arrivals: Deque[Tuple[int, Spot]] = deque()
+        # (dx call, freq bucket) -> (seq, spot), for dedupe
+        self._by_call: Dict[Tuple[str, int], Tuple[int, Spot]] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._spots)
+
+    def _remove(self, seq: int, spot: Spot) -> None:
+        i = bisect.bisect_left(self._keys, (spot.freq, seq))
+        if i < len(self._keys) and self._keys[i] == (spot.freq, seq):
+            del self._keys[i]
+            del self._spots[i]
+
+    def add(self, spot: Spot) -> None:
+        """Add a spot, replacing an earlier spot of the same call nearby."""
+        bucket = (spot.dx, spot.freq // self.dedupe_hz)
+        previous = self._by_call.get(bucket)
+        if previous:
+            self._remove(*previous)
+
+        self._seq += 1
+        key = (spot.freq, self._seq)
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._spots.insert(i, spot)
+        self._arrivals.append((self._seq, spot))
+        self._by_call[bucket] = (self._seq, spot)
+        self.version += 1
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop spots older than the TTL. Returns the number removed."""
+        cutoff = (now if now is not None else time.monotonic()) - self.ttl
+        removed = 0
+        while self._arrivals and self._arrivals[0][1].received < cutoff:
+            seq, spot = self._arrivals.popleft()
+            bucket = (spot.dx, spot.freq // self.dedupe_hz)
+            if self._by_call.get(bucket, (None,))[0] == seq:
+                del self._by_call[bucket]
+                self._remove(seq, spot)
+                removed += 1
+            # else: already replaced by a newer spot and removed then
+        if removed:
+            self.version += 1
+        return removed
+
+    def query(self, low: int, high: int) -> List[Spot]:
+        """Return spots with low <= freq <= high, ordered by frequency."""
+        i = bisect.bisect_left(self._keys, (low, 0))
+        j = bisect.bisect_right(self._keys, (high, self._seq + 1))
+        return self._spots[i:j]
+
+
+class DXClusterClient:
+    """Async telnet client that streams cluster spots into a SpotStore."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        callsign: str,
+        store: SpotStore,
+        on_spot: Optional[Callable[[Spot], None]] = None,
+        reconnect_delay: float = 5.0,
+        reconnect_max: float = 300.0,
+    ):
+        self.host = host
+        self.port = port
+        self.callsign = callsign
+        self.store = store
+        self.on_spot = on_spot
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max = reconnect_max
+        self.connected = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self.session()
+                delay = self.reconnect_delay
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                logger.warning("DX cluster %s:%s: %s", self.host, self.port, str(e) or type(e).__name__)
+            except Exception as e:
+                # Over-long lines (ValueError from readline) or anything else odd the
+                # cluster sends must not end ingestion for good
+                logger.error("DX cluster %s:%s session failed: %s", self.host, self.port, e, exc_info=True)
+            self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(self.reconnect_max, delay * 2)
+
+    async def session(self) -> None:
+        """Connect, log in and ingest spots until the cluster hangs up."""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=10.0
+        )
+        try:
+            # Wait briefly for the login prompt (it has no trailing newline)
+            try:
+                await asyncio.wait_for(reader.readuntil(b":"), timeout=5.0)
+            except (asyncio.TimeoutError, asyncio.LimitOverrunError):
+                pass
+            writer.write(f"{self.callsign}\r\n".encode())
+            await writer.drain()
+            self.connected = True
+            logger.info("Logged in to DX cluster %s:%s as %s", self.host, self.port, self.callsign)
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                text = _TELNET_IAC.sub(b"", line).decode("latin-1")
+                spot = parse_spot(text)
+                if spot:
+                    self.store.add(spot)
+                    if self.on_spot:
+                        self.on_spot(spot)
+        finally:
+            self.connected = False
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
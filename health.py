@@ -0,0 +1,196 @@
+"""Timing health: fixed-rate scheduling and event-loop lag sampling.
+
+FixedRateScheduler replaces "sleep interval after each cycle" (which
+drifts by however long the cycle took) with absolute deadlines. When a
+cycle overruns, the missed ticks are counted and skipped rather than
+run back to back.
+
+The scheduler can also burst: burst() (on an interactive tuning command
+or an external frequency change) moves the next tick forward and polls at
+`burst_interval` for `burst_hold` seconds, then the interval doubles
+each tick back to the base rate. Every tick faster than the base rate
+takes a token from a bucket (`budget` ticks, refilled at `budget_rate`
+per second); with the bucket empty the base rate applies. A burst tick
+that overruns is not counted as missed, but the next one waits at least
+as long as the cycle took, so bursting never keeps the CAT link more
+than half busy.
+
+LoopLagMonitor measures how late the event loop wakes a task that asked
+to sleep for a fixed interval. The lateness is time the loop spent busy
+elsewhere.
+
+Both feed /healthz and /readyz in main.py.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional
+
+from ratelimit import TokenBucket
+
+
+def percentiles(values: Iterable[float], points=(50, 95, 99)) -> dict:
+    """Nearest-rank percentiles plus max, e.g. {"p50": .., "p95": .., "max": ..}."""
+    ordered = sorted(values)
+    if not ordered:
+        return {**{f"p{p}": None for p in points}, "max": None}
+    result = {f"p{p}": ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in points}
+    result["max"] = ordered[-1]
+    return result
+
+
+class FixedRateScheduler:
+    """Wakes at absolute multiples of `interval`, counting missed deadlines."""
+
+    def __init__(
+        self,
+        interval: float,
+        history: int = 300,
+        burst_interval: Optional[float] = None,
+        burst_hold: float = 1.0,
+        budget: float = 40,
+        budget_rate: float = 5.0,
+    ):
+        self.interval = interval
+        self.burst_interval = burst_interval   # None: bursting disabled
+        self.burst_hold = burst_hold
+        self.budget = TokenBucket(budget_rate, budget)
+        self.cycles = 0
+        self.missed = 0
+        self.bursts = 0
+        self.burst_ticks = 0
+        self.cycle_times: Deque[float] = deque(maxlen=history)
+        self._deadline: Optional[float] = None
+        self._cycle_start: Optional[float] = None
+        self._burst_until = 0.0
+        self._current: Optional[float] = None    # Interval of the last fast tick (None: base rate)
+        self._wake: Optional[asyncio.Event] = None
+
+    @classmethod
+    def from_config(cls, polling_config: dict) -> "FixedRateScheduler":
+        burst_config = polling_config.get("burst", {})
+        enabled = burst_config.get("enabled", False)
+        return cls(
+            polling_config["interval_ms"] / 1000,
+            burst_interval=burst_config.get("interval_ms", 50) / 1000 if enabled else None,
+            burst_hold=burst_config.get("hold_s", 1.0),
+            budget=burst_config.get("budget", 40),
+            budget_rate=burst_config.get("budget_per_s", 5.0),
+        )
+
+    @property
+    def bursting(self) -> bool:
+        return self._current is not None
+
+    def burst(self, now: Optional[float] = None) -> None:
+        """Poll fast for the next `burst_hold` seconds (extends a running burst)."""
+        if self.burst_interval is None or self.burst_interval >= self.interval:
+            return
+        now = time.monotonic() if now is None else now
+        if now >= self._burst_until:
+            self.bursts += 1
+        self._burst_until = now + self.burst_hold
+        if self._deadline is not None and self._cycle_start is not None:
+            # Bring the pending tick forward to the burst rate
+            self._deadline = min(self._deadline, max(now, self._cycle_start + self.burst_interval))
+            if self._wake:
+                self._wake.set()
+
+    def _next_interval(self, now: float) -> Optional[float]:
+        """Interval to the next tick if it's a fast one (takes a budget token), else None."""
+        if now < self._burst_until:
+            interval = self.burst_interval
+        elif self._current is not None:
+            interval = self._current * 2  # Decay towards the base rate
+        else:
+            return None
+        if interval >= self.interval or self.budget.retry_after(now) > 0:
+            return None
+        self.budget.take()
+        return interval
+
+    async def wait(self) -> None:
+        """Sleep until the next deadline (first call returns immediately)."""
+        now = time.monotonic()
+        cycle_time = 0.0
+        if self._cycle_start is not None:
+            cycle_time = now - self._cycle_start
+            self.cycle_times.append(cycle_time)
+
+        if self._deadline is None:
+            self._deadline = now
+        else:
+            self._current = self._next_interval(now)
+            if self._current is not None:
+                # Fast tick: no missed deadlines, but leave the link idle as long as it was busy
+                self.burst_ticks += 1
+                self._deadline = max(self._cycle_start + self._current, now + cycle_time)
+            else:
+                self._deadline += self.interval
+                if now > self._deadline:
+                    # Overran: skip the missed ticks instead of bursting to catch up
+                    late_by = int((now - self._deadline) // self.interval) + 1
+                    self.missed += late_by
+                    self._deadline += late_by * self.interval
+            await self._sleep_until_deadline()
+
+        self.cycles += 1
+        self._cycle_start = time.monotonic()
+
+    async def _sleep_until_deadline(self) -> None:
+        # burst() may move the deadline forward while we sleep
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        while True:
+            delay = self._deadline - time.monotonic()
+            if delay <= 0:
+                return
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                return
+
+    def stats(self) -> dict:
+        cycle_ms = percentiles(t * 1000 for t in self.cycle_times)
+        return {
+            "interval_ms": self.interval * 1000,
+            "cycles": self.cycles,
+            "missed_deadlines": self.missed,
+            "cycle_ms": cycle_ms,
+            "bursting": self.bursting,
+            "bursts": self.bursts,
+            "burst_ticks": self.burst_ticks,
+        }
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag every `interval` seconds."""
+
+    def __init__(self, interval: float = 0.1, history: int = 600):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.monotonic() - start - self.interval))
+
+    def stats(self) -> dict:
+        return {k: (v * 1000 if v is not None else None) for k, v in percentiles(self.samples).items()}
@@ -0,0 +1,397 @@
+"""Contact logbook (QSOs) in SQLite.
+
+Contacts are auto-filled with the current frequency, mode and time from
+the polled radio state, so no other program has to poll rigctld for
+them. log() never touches the disk. It appends to a write-behind queue
+that a background task commits in batches (one transaction each) on a
+worker thread, every `flush_interval` seconds or every `batch_size`
+contacts.
+
+log() validates what it stores: time_on must be epoch seconds (millisecond
+values, as from JavaScript's Date.now(), are converted) no later than a
+day from now, and freq a positive number of Hz up to 300 GHz. Export
+skips (and logs) rows it can't render instead of failing the whole file.
+
+Contacts keep the rig's Hamlib mode (USB, PKTUSB, CWR, ...). ADIF export
+and dupe checks use the ADIF MODE it maps to (USB -> SSB with SUBMODE
+USB, CWR -> CW, ...), so USB and LSB contacts are the same mode.
+
+Duplicate checks use an in-memory dict keyed by (call, band, ADIF mode),
+holding the latest contact time. It is loaded at startup and updated as
+soon as a contact is logged, so checks are O(1) even during a contest
+with tens of thousands of contacts, and see contacts still in the queue.
+
+SQLite indexes cover call, band + time and time range queries. ADIF
+export streams the log in id-ordered chunks, so it never holds the whole
+log in memory.
+"""
+
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from channels import band_for
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+EXPORT_CHUNK = 500
+
+MAX_FREQ = 300_000_000_000        # Hz (ADIF's top band is 241 GHz)
+MS_TIMESTAMP = 100_000_000_000    # Larger time_on values are milliseconds (year 5138+ in seconds)
+MAX_CLOCK_AHEAD = 86400           # Seconds a contact may be ahead of our clock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    call TEXT NOT NULL,
+    time_on INTEGER NOT NULL,
+    freq INTEGER NOT NULL,
+    band TEXT,
+    mode TEXT,
+    rst_sent TEXT,
+    rst_rcvd TEXT,
+    name TEXT,
+    qth TEXT,
+    grid TEXT,
+    comment TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_call ON contacts(call, band, mode);
+CREATE INDEX IF NOT EXISTS idx_contacts_band_time ON contacts(band, time_on);
+CREATE INDEX IF NOT EXISTS idx_contacts_time ON contacts(time_on);
+"""
+
+COLUMNS = ("call", "time_on", "freq", "band", "mode", "rst_sent", "rst_rcvd", "name", "qth", "grid", "comment")
+TEXT_FIELDS = ("rst_sent", "rst_rcvd", "name", "qth", "grid", "comment")
+
+# Contact column -> ADIF field (QSO_DATE/TIME_ON/FREQ/BAND/MODE are derived)
+ADIF_FIELDS = {
+    "call": "CALL",
+    "rst_sent": "RST_SENT",
+    "rst_rcvd": "RST_RCVD",
+    "name": "NAME",
+    "qth": "QTH",
+    "grid": "GRIDSQUARE",
+    "comment": "COMMENT",
+}
+ADIF_HEADER = "Web Radio logbook export\n<ADIF_VER:5>3.1.4\n<PROGRAMID:9>Web Radio\n<EOH>\n"
+
+
+# Hamlib rig modes (and common digital mode names) -> ADIF (MODE, SUBMODE).
+# The PKT* modes don't say which digital mode is in use; clients that know
+# should log it ("FT8", "FT4", ...) as the contact's mode.
+ADIF_MODES = {
+    "USB": ("SSB", "USB"),
+    "LSB": ("SSB", "LSB"),
+    "ECSSUSB": ("SSB", "USB"),
+    "ECSSLSB": ("SSB", "LSB"),
+    "CW": ("CW", None),
+    "CWR": ("CW", None),
+    "AM": ("AM", None),
+    "SAM": ("AM", None),
+    "FM": ("FM", None),
+    "WFM": ("FM", None),
+    "RTTY": ("RTTY", None),
+    "RTTYR": ("RTTY", None),
+    "PKTUSB": ("PKT", None),
+    "PKTLSB": ("PKT", None),
+    "PKTFM": ("PKT", None),
+    "FT4": ("MFSK", "FT4"),
+    "JS8": ("MFSK", "JS8"),
+    "PSK31": ("PSK", "PSK31"),
+    "PSK63": ("PSK", "PSK63"),
+}
+
+
+def adif_mode(mode: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """ADIF (MODE, SUBMODE) for a rig or user mode; unknown modes pass through."""
+    if not mode:
+        return None, None
+    mode = str(mode).strip().upper()
+    return ADIF_MODES.get(mode, (mode, None))
+
+
+def normalize_call(call: str) -> str:
+    call = (call or "").strip().upper()
+    if not call or any(c.isspace() for c in call):
+        raise ValueError(f"Invalid callsign: {call!r}")
+    return call
+
+
+def finite_number(value, name: str) -> float:
+    """A finite int/float (or numeric string), for contact fields.
+
+    Raises: ValueError on anything else (bools, NaN, infinity, ...)
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    return number
+
+
+def epoch_seconds(value) -> int:
+    """time_on as whole epoch seconds, converting millisecond timestamps."""
+    seconds = finite_number(value, "time_on")
+    if seconds >= MS_TIMESTAMP:
+        seconds /= 1000
+    return int(seconds)
+
+
+def adif_field(name: str, value) -> str:
+    text = str(value)
+    return f"<{name}:{len(text)}>{text}"
+
+
+def adif_record(contact: dict) -> str:
+    """One contact as an ADIF record, ending in <EOR>."""
+    when = datetime.fromtimestamp(epoch_seconds(contact["time_on"]), timezone.utc)
+    parts = [
+        adif_field("CALL", contact["call"]),
+        adif_field("QSO_DATE", when.strftime("%Y%m%d")),
+        adif_field("TIME_ON", when.strftime("%H%M%S")),
+        adif_field("FREQ", f"{contact['freq'] / 1e6:.6f}"),
+    ]
+    if contact.get("band"):
+        parts.append(adif_field("BAND", contact["band"]))
+    mode, submode = adif_mode(contact.get("mode"))
+    if mode:
+        parts.append(adif_field("MODE", mode))
+    if submode:
+        parts.append(adif_field("SUBMODE", submode))
+    for column, name in ADIF_FIELDS.items():
+        if column != "call" and contact.get(column):
+            parts.append(adif_field(name, contact[column]))
+    return "".join(parts) + "<EOR>\n"
+
+
+class Logbook:
+    """SQLite contact log with write-behind inserts and in-memory dupe checks.
+
+    log(), is_dupe() and the background flusher run on the event loop;
+    query() and export_adif() are synchronous and meant for
+    asyncio.to_thread / a streaming response's thread pool.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        dupe_window: float = 0.0,
+    ):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dupe_window = dupe_window    # Seconds; 0 = any earlier contact is a dupe
+        self.committed = 0
+        self._pending: List[tuple] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # (call, band, ADIF mode) -> latest time_on
+        self._worked: Dict[Tuple[str, Optional[str], Optional[str]], int] = {}
+        for row in self._db.execute("SELECT call, band, mode, MAX(time_on) FROM contacts GROUP BY call, band, mode"):
+            key = (row[0], row[1], adif_mode(row[2])[0])
+            self._worked[key] = max(row[3], self._worked.get(key, 0))
+
+    @classmethod
+    def from_config(cls, base_dir: Path, logbook_config: dict) -> "Logbook":
+        return cls(
+            str(base_dir / logbook_config.get("db_path", "data/logbook.db")),
+            batch_size=logbook_config.get("batch_size", 50),
+            flush_interval=logbook_config.get("flush_interval_s", 1.0),
+            dupe_window=logbook_config.get("dupe_window_h", 0) * 3600,
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and commit whatever is still queued."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+        self._db.close()
+
+    def is_dupe(self, call: str, band: Optional[str], mode: Optional[str], at: Optional[float] = None) -> bool:
+        last = self._worked.get((call.upper(), band, adif_mode(mode)[0]))
+        if last is None:
+            return False
+        return not self.dupe_window or (at or time.time()) - last < self.dupe_window
+
+    def log(self, contact: dict, state=None) -> dict:
+        """Queue a contact, filling freq/mode/time from `state` when missing.
+
+        Returns: The contact as it will be stored, plus "dupe"
+        Raises: TypeError if `contact` isn't a dict; ValueError on a bad
+            callsign, a missing or out of range frequency or a bad time
+        """
+        if not isinstance(contact, dict):
+            raise TypeError("Contact must be a JSON object")
+        call = normalize_call(contact.get("call"))
+        freq = contact.get("freq") or (state.get("freq") if state is not None else None)
+        if not freq:
+            raise ValueError("No frequency given and no radio state available")
+        freq = int(finite_number(freq, "freq"))
+        if not 0 < freq <= MAX_FREQ:
+            raise ValueError(f"Frequency out of range: {freq}")
+        mode = contact.get("mode") or (state.get("mode") if state is not None else None)
+        time_on = epoch_seconds(contact.get("time_on") or time.time())
+        if not 0 <= time_on <= time.time() + MAX_CLOCK_AHEAD:
+            raise ValueError(f"time_on out of range: {contact.get('time_on')!r}")
+        band = band_for(freq)
+
+        dupe = self.is_dupe(call, band, mode, time_on)
+        key = (call, band, adif_mode(mode)[0])
+        self._worked[key] = max(time_on, self._worked.get(key, 0))
+
+        record = {"call": call, "time_on": time_on, "freq": freq, "band": band, "mode": mode}
+        for name in TEXT_FIELDS:
+            value = contact.get(name)
+            record[name] = str(value) if value not in (None, "") else None
+        self._pending.append(tuple(record[name] for name in COLUMNS))
+        if len(self._pending) >= self.batch_size and self._wake:
+            self._wake.set()
+        return {**record, "dupe": dupe}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    await asyncio.to_thread(self._commit, batch)
+                except sqlite3.Error as e:
+                    logger.error("Logbook commit failed, will retry: %s", e)
+                    self._pending[:0] = batch
+                except Exception:
+                    # A row SQLite can't take: save the others, don't let the flusher die
+                    logger.error("Logbook commit failed, committing one by one", exc_info=True)
+                    await asyncio.to_thread(self._commit_each, batch)
+
+    def flush(self) -> int:
+        """Commit queued contacts now (synchronous). Returns how many."""
+        batch, self._pending = self._pending, []
+        if batch:
+            self._commit(batch)
+        return len(batch)
+
+    def _commit(self, batch: List[tuple]) -> None:
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    f"INSERT INTO contacts ({', '.join(COLUMNS)}) VALUES ({placeholders})", batch
+                )
+        self.committed += len(batch)
+
+    def _commit_each(self, batch: List[tuple]) -> None:
+        """Commit rows one at a time, dropping (and logging) the ones that fail."""
+        for row in batch:
+            try:
+                self._commit([row])
+            except Exception as e:
+                logger.error("Dropped contact %s from the logbook: %s", row, e)
+
+    def query(
+        self,
+        call: Optional[str] = None,
+        band: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> dict:
+        """Return one page of committed contacts, newest first.
+
+        Returns: {"total", "offset", "limit", "items": [...]}
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        clause, params = self._where(call, band, since, until)
+
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM contacts {clause}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT * FROM contacts {clause} ORDER BY time_on DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return {"total": total, "offset": offset, "limit": limit, "items": [dict(row) for row in rows]}
+
+    def export_adif(
+        self,
+        call: Optional[str] = None,
+        band: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Yield an ADIF file chunk by chunk (keyset pagination on id)."""
+        clause, params = self._where(call, band, since, until)
+        clause = f"{clause} AND id > ?" if clause else "WHERE id > ?"
+        yield ADIF_HEADER
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT * FROM contacts {clause} ORDER BY id LIMIT ?", params + [last_id, EXPORT_CHUNK]
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            records = []
+            for row in rows:
+                try:
+                    records.append(adif_record(dict(row)))
+                except (TypeError, ValueError, OverflowError, OSError) as e:
+                    logger.warning("ADIF export skipped contact %s: %s", row["id"], e)
+            yield "".join(records)
+
+    @staticmethod
+    def _where(call, band, since, until) -> Tuple[str, list]:
+        where, params = [], []
+        if call:
+            where.append("call = ?")
+            params.append(call.strip().upper())
+        if band:
+            where.append("band = ?")
+            params.append(band)
+        if since is not None:
+            where.append("time_on >= ?")
+            params.append(int(since))
+        if until is not None:
+            where.append("time_on <= ?")
+            params.append(int(until))
+        return (f"WHERE {' AND '.join(where)}" if where else ""), params
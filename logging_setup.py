@@ -0,0 +1,165 @@
+"""Queue-based logging that keeps formatting and I/O off the event loop.
+
+The event loop only puts LogRecords on a queue. A QueueListener thread
+applies the format (timestamp, level, name) and writes them out. The
+message itself is merged with its args before enqueueing, so a mutable
+argument changed after the call is still logged as it was. Pass
+arguments the %-style way, e.g. `logger.debug("→ rigctld: %s", cmd)`,
+not as f-strings: a suppressed level then costs only a cached
+isEnabledFor() check, and a rate-limited record is dropped before its
+message is built.
+
+High-rate messages are rate-limited by RateLimitFilter, keyed on the
+message template. Each key gets `burst` records per `window_s`, then
+every `sample_every`-th one is kept and tagged with how many were
+skipped. WARNING and above always pass.
+
+Config (config.yaml):
+    logging:
+      level: INFO
+      levels: {rig_client: WARNING, ...}
+      queue_size: 10000
+      rate_limit: {window_s: 1.0, burst: 20, sample_every: 100}
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    """Per-template burst limit plus 1-in-N sampling for noisy records."""
+
+    def __init__(self, window_s: float = 1.0, burst: int = 20, sample_every: int = 100, max_keys: int = 1000):
+        super().__init__()
+        self.window_s = window_s
+        self.burst = burst
+        self.sample_every = max(1, sample_every)
+        self.max_keys = max_keys
+        self.suppressed = 0
+        self._window_start = time.monotonic()
+        self._counts: Dict[Tuple[str, int, str], int] = {}
+        self._lock = threading.Lock()  # Filters also run on to_thread workers
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window_s or len(self._counts) >= self.max_keys:
+                self._window_start = now
+                self._counts.clear()
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+
+        if count <= self.burst:
+            return True
+        if (count - self.burst) % self.sample_every == 0:
+            record.sampled = self.sample_every  # See SampledFormatter
+            return True
+        self.suppressed += 1
+        return False
+
+
+class SampledFormatter(logging.Formatter):
+    """Marks records that stand in for a sampled-away run."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        sampled = getattr(record, "sampled", None)
+        return f"{text} [sampled 1/{sampled}]" if sampled else text
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves the format string to the listener thread.
+
+    The stock prepare() runs the full handler format on the calling
+    thread. Here only msg % args is done there, snapshotting the args
+    before the caller can change them; the listener adds the rest.
+    Records with exc_info still use the stock prepare(), so tracebacks
+    are rendered before the frames go away. Drops (and counts) records
+    when the queue is full instead of blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info or record.stack_info:
+            return super().prepare(record)
+        record = copy.copy(record)  # Other handlers may still see the original
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """Owns the queue, handler and listener thread set up by setup_logging()."""
+
+    def __init__(self, handler: DeferredQueueHandler, listener: logging.handlers.QueueListener,
+                 rate_limit: Optional[RateLimitFilter]):
+        self.handler = handler
+        self.listener = listener
+        self.rate_limit = rate_limit
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread (idempotent)."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        logging.getLogger().removeHandler(self.handler)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "rate_limited": self.rate_limit.suppressed if self.rate_limit else 0,
+        }
+
+
+def setup_logging(logging_config: dict, stream=None) -> LoggingPipeline:
+    """Route all logging through a queue to a background writer thread.
+
+    Replaces any handlers already on the root logger.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging_config.get("level", "INFO"))
+    for name, level in (logging_config.get("levels") or {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(SampledFormatter(logging_config.get("format", DEFAULT_FORMAT)))
+
+    log_queue = queue.Queue(maxsize=logging_config.get("queue_size", 10000))
+    handler = DeferredQueueHandler(log_queue)
+    rate_limit = None
+    rate_config = logging_config.get("rate_limit", {})
+    if rate_config.get("enabled", True):
+        rate_limit = RateLimitFilter(
+            window_s=rate_config.get("window_s", 1.0),
+            burst=rate_config.get("burst", 20),
+            sample_every=rate_config.get("sample_every", 100),
+        )
+        handler.addFilter(rate_limit)
+    root.addHandler(handler)
+
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    return LoggingPipeline(handler, listener, rate_limit)
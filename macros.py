@@ -0,0 +1,203 @@
+"""Named presets and macros, executed as pipelined rig batches.
+
+Both are loaded from config.yaml:
+
+- `presets`: declarative rig setups (freq, mode, filter_width, agc, rf_gain,
+  power, break_in, rit). Fields are applied in a fixed, rig-friendly order.
+- `macros`: explicit ordered steps using the WebSocket command vocabulary
+  (`{cmd: set_freq, value: 7030000}`, ...).
+
+Either way the steps are turned into one RigBatch and sent to rigctld in a
+single write, so retuning the whole rig costs about one round-trip. With
+`rollback: true`, if any step fails, every touched field is restored to
+its last polled value (again as one batch).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from rig_client import AGC_TO_THETIS, RigBatch, RigClient, rf_gain_to_thetis
+
+logger = logging.getLogger(__name__)
+
+
+# Preset fields in the order they are applied (mode/filter_width are one step)
+PRESET_FIELDS = ["freq", "mode", "filter_width", "agc", "rf_gain", "power", "break_in", "rit"]
+
+# Command -> radio_state field it changes (used for rollback)
+COMMAND_FIELDS = {
+    "set_freq": "freq",
+    "set_mode": "mode",
+    "set_filter_width": "filter_width",
+    "set_agc": "agc",
+    "set_rf_gain": "rf_gain",
+    "set_power": "power",
+    "set_break_in": "break_in",
+    "set_rit": "rit",
+}
+
+
+@dataclass
+class Macro:
+    """A named, ordered list of commands ({"cmd": ..., "value": ...})."""
+
+    name: str
+    label: str
+    steps: List[dict] = field(default_factory=list)
+    rollback: bool = False
+
+    def summary(self) -> dict:
+        return {"name": self.name, "label": self.label, "steps": len(self.steps)}
+
+
+def preset_steps(fields: dict) -> List[dict]:
+    """Convert a declarative preset into ordered commands."""
+    steps = []
+    if "freq" in fields:
+        steps.append({"cmd": "set_freq", "value": fields["freq"]})
+    if "filter_width" in fields:
+        step = {"cmd": "set_filter_width", "value": fields["filter_width"]}
+        if "mode" in fields:
+            step["mode"] = fields["mode"]
+        steps.append(step)
+    elif "mode" in fields:
+        steps.append({"cmd": "set_mode", "value": fields["mode"]})
+    for name in ("agc", "rf_gain", "power", "break_in", "rit"):
+        if name in fields:
+            steps.append({"cmd": f"set_{name}", "value": fields[name]})
+    return steps
+
+
+def load_macros(config: dict) -> Dict[str, Macro]:
+    """Load `presets` and `macros` config sections into Macro objects."""
+    macros: Dict[str, Macro] = {}
+
+    for name, entry in (config.get("presets") or {}).items():
+        fields = {k: v for k, v in entry.items() if k in PRESET_FIELDS}
+        macros[name] = Macro(
+            name=name,
+            label=entry.get("label", name),
+            steps=preset_steps(fields),
+            rollback=entry.get("rollback", False),
+        )
+
+    for name, entry in (config.get("macros") or {}).items():
+        steps = [dict(step) for step in entry.get("steps", [])]
+        for step in steps:
+            if step.get("cmd") not in COMMAND_FIELDS and step.get("cmd") != "set_spot":
+                raise ValueError(f"Macro {name}: unsupported command {step.get('cmd')!r}")
+        macros[name] = Macro(
+            name=name,
+            label=entry.get("label", name),
+            steps=steps,
+            rollback=entry.get("rollback", False),
+        )
+
+    return macros
+
+
+def build_batch(steps: List[dict], state: dict) -> RigBatch:
+    """Translate commands into rigctld batch steps (one per command).
+
+    Conversions match handle_command. A set_filter_width step without an
+    explicit mode uses the mode set earlier in the batch, else the current one.
+    """
+    batch = RigBatch()
+    mode = state.get("mode", "USB")
+
+    for step in steps:
+        cmd = step["cmd"]
+        value = step.get("value")
+        if cmd == "set_freq":
+            batch.set_freq(int(value))
+        elif cmd == "set_mode":
+            mode = str(value)
+            batch.set_mode(mode)
+        elif cmd == "set_filter_width":
+            mode = step.get("mode", mode)
+            batch.set_mode(mode, int(value))
+        elif cmd == "set_agc":
+            batch.set_agc_thetis(AGC_TO_THETIS.get(str(value).upper(), 3))
+        elif cmd == "set_rf_gain":
+            batch.set_rf_gain_thetis(rf_gain_to_thetis(int(value)))
+        elif cmd == "set_power":
+            batch.set_level("RFPOWER", int(value) / 100.0)
+        elif cmd == "set_break_in":
+            batch.set_func("BKIN", bool(value))
+        elif cmd == "set_rit":
+            batch.set_rit(int(value))
+        elif cmd == "set_spot":
+            batch.set_func("SPOT", bool(value))
+        else:
+            raise ValueError(f"Unsupported command: {cmd}")
+
+    return batch
+
+
+def rollback_steps(steps: List[dict], state: dict) -> List[dict]:
+    """Commands restoring every field touched by `steps` to `state` values."""
+    touched = []
+    for step in steps:
+        name = COMMAND_FIELDS.get(step["cmd"])
+        if name and name not in touched:
+            touched.append(name)
+
+    restore = {name: state[name] for name in touched if name in state}
+    # Restoring mode also needs the old width (and vice versa): one M command
+    if "mode" in restore or "filter_width" in restore:
+        if "mode" in state and "filter_width" in state:
+            restore["mode"] = state["mode"]
+            restore["filter_width"] = state["filter_width"]
+    return preset_steps(restore)
+
+
+async def run_macro(client: RigClient, macro: Macro, state: dict) -> dict:
+    """Execute a macro as one pipelined batch.
+
+    Args:
+        client: Connected RigClient
+        macro: Macro to run
+        state: Last polled radio state (used for defaults and rollback)
+
+    Returns: `macro_result` message with per-step results. If the batch
+    timed out or the link failed, every step is reported failed (some may
+    have been applied) and `error` says why.
+    """
+    batch = build_batch(macro.steps, state)
+    error = None
+    try:
+        results = await client.execute_batch(batch)
+    except (ConnectionError, asyncio.TimeoutError) as e:
+        error = str(e) or type(e).__name__
+        logger.error("Macro %s failed: %s", macro.name, error)
+        results = [False] * len(macro.steps)
+    success = all(results)
+
+    rolled_back: Optional[bool] = None
+    if not success and macro.rollback:
+        undo = rollback_steps(macro.steps, state)
+        logger.warning("Macro %s failed, rolling back %d step(s)", macro.name, len(undo))
+        if not client.connected:
+            logger.error("Can't roll back macro %s: rig not connected", macro.name)
+            rolled_back = False
+        else:
+            try:
+                rolled_back = all(await client.execute_batch(build_batch(undo, state)))
+            except Exception as e:
+                logger.error("Rollback of macro %s failed: %s", macro.name, e)
+                rolled_back = False
+
+    return {
+        "type": "macro_result",
+        "name": macro.name,
+        "success": success,
+        "steps": [
+            {"cmd": step["cmd"], "value": step.get("value"), "success": ok}
+            for step, ok in zip(macro.steps, results)
+        ],
+        "rolled_back": rolled_back,
+        "error": error,
+    }
+
@@ -4,66 +4,197 @@ import asyncio
 import logging
 import secrets
 from contextlib import asynccontextmanager
+import time
 from functools import lru_cache
 from pathlib import Path
-from typing import Annotated, List
+from typing import Annotated, Dict, List, Union
 
 import yaml
-from fastapi import Depends, FastAPI, HTTPException, status, WebSocket, WebSocketDisconnect, Query
+from fastapi import Depends, FastAPI, HTTPException, status, WebSocket, WebSocketDisconnect, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-
-from rig_client import RigClient
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
+from fastapi.websockets import WebSocketState
+
+from assets import INDEX, AssetPipeline
+from audio import AudioHub, source_from_config
+from channels import ChannelStore, band_for
+from cw import CWKeyer
+from dx_cluster import DXClusterClient, SpotStore
+from health import FixedRateScheduler, LoopLagMonitor
+from logbook import Logbook, normalize_call
+from logging_setup import LoggingPipeline, setup_logging
+from macros import Macro, load_macros, run_macro
+from profiling import Profiler
+from radio_state import RadioState
+from ratelimit import OVERLOADED, RATE_LIMITED, AdmissionControl, CommandLimiter, limits_from_config, overload_error
+from recorder import ReplayClient, StateRecorder
+from rig_client import AGC_TO_THETIS, RigClient, rf_gain_to_thetis
+from rig_supervisor import LINK_CONNECTED, RigSupervisor
+from sessions import ClientSession
+from snapshot import SnapshotWriter
+from spectrum import SpectrumEngine
+from triggers import TriggerEngine
 
 # Global state
 rig_client: RigClient = None
-connected_clients: List[WebSocket] = []
-radio_state: dict = {}
+rig_supervisor: RigSupervisor = None
+connected_clients: List[ClientSession] = []
+radio_state = RadioState()
+macros: Dict[str, Macro] = {}
+channel_store: ChannelStore = None
+logbook: Logbook = None
+spot_store: SpotStore = None
+audio_hub: AudioHub = None
+spectrum_engine: SpectrumEngine = None
+last_spots: list = []
+poll_scheduler: FixedRateScheduler = None
+loop_lag: LoopLagMonitor = None
+last_poll_ok: float = None  # time.monotonic() of the last successful poll
+profiler: Profiler = None
+log_pipeline: LoggingPipeline = None
+state_recorder: StateRecorder = None
+snapshot_writer: SnapshotWriter = None
+cw_keyer: CWKeyer = None
+trigger_engine: TriggerEngine = None
+admission = AdmissionControl()
+# Interactive commands that put the poller into burst mode
+BURST_COMMANDS = {"set_freq", "set_rit", "set_mode", "set_filter_width", "run_macro"}
+# Part of state ETags, so versions from before a restart never match
+boot_id = secrets.token_hex(4)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """App lifespan: connect to rigctld, start poller."""
-    global rig_client
+    """App lifespan: start rigctld connection supervisor and poller."""
+    global rig_client, rig_supervisor, macros, channel_store, logbook, spot_store, audio_hub, spectrum_engine
+    global loop_lag, log_pipeline, state_recorder, snapshot_writer, cw_keyer, trigger_engine, admission
     config = get_config()
-    logger = logging.getLogger(__name__)
-
-    rig_client = RigClient(
-        host=config["rigctld"]["host"],
-        port=config["rigctld"]["port"],
+    # Queue-based logging (see logging_setup.py), configured before anything logs
+    log_pipeline = setup_logging(config.get("logging", {}))
+    health_config = config.get("health", {})
+    loop_lag = LoopLagMonitor(interval=health_config.get("lag_sample_ms", 100) / 1000)
+    loop_lag.start()
+    macros = load_macros(config)
+    # Alert rules on the polled state (see triggers.py)
+    if config.get("triggers", {}).get("rules"):
+        trigger_engine = TriggerEngine.from_config(config["triggers"])
+    admission = AdmissionControl.from_config(config.get("rate_limits", {}))
+    limits_from_config(config.get("rate_limits", {}))  # Fail at startup, not on every connect
+
+    # Fingerprint and precompress static files before serving anything
+    await asyncio.to_thread(asset_pipeline.build)
+
+    channels_config = config.get("channels", {})
+    channel_store = ChannelStore(
+        str(Path(__file__).parent / channels_config.get("db_path", "data/channels.db"))
     )
 
-    # Try to connect (don't fail if rigctld not available)
-    try:
-        await rig_client.connect()
-        logger.info(f"Connected to rigctld at {config['rigctld']['host']}:{config['rigctld']['port']}")
-    except Exception as e:
-        logger.warning(f"Failed to connect to rigctld: {e}. Will retry in polling loop.")
+    base_dir = Path(__file__).parent
+    logbook = Logbook.from_config(base_dir, config.get("logbook", {}))
+    logbook.start()
+
+    replay_config = config.get("replay", {})
+    if replay_config.get("enabled"):
+        # Recorded session instead of a radio (see recorder.py)
+        rig_client = ReplayClient.from_config(base_dir, replay_config)
+    else:
+        rig_client = RigClient(
+            host=config["rigctld"]["host"],
+            port=config["rigctld"]["port"],
+        )
+
+    recorder_config = config.get("recorder", {})
+    if recorder_config.get("enabled") and not replay_config.get("enabled"):
+        state_recorder = StateRecorder.from_config(base_dir, recorder_config)
+
+    # Last known state (sent flagged stale until the first poll) and link tuning
+    snapshot_config = config.get("snapshot", {})
+    if snapshot_config.get("enabled") and not replay_config.get("enabled"):
+        snapshot_writer = SnapshotWriter.from_config(base_dir, snapshot_config)
+        await asyncio.to_thread(snapshot_writer.load, radio_state, rig_client)
+
+    # Connect in the background (don't fail if rigctld not available)
+    rigctld_config = config["rigctld"]
+    if replay_config.get("enabled"):
+        # Nothing to resolve or fail over to when replaying
+        rigctld_config = {**rigctld_config, "host": "127.0.0.1", "fallback": []}
+    rig_supervisor = RigSupervisor.from_config(rig_client, rigctld_config, on_change=broadcast)
+    rig_supervisor.start()
+
+    # CW keying from clients, ahead of polling on the rig connection
+    cw_config = config.get("cw", {})
+    if cw_config.get("enabled"):
+        cw_keyer = CWKeyer.from_config(rig_client, cw_config, on_event=broadcast)
+        cw_keyer.start()
+
+    # DX cluster spots (optional)
+    dx_config = config.get("dx_cluster", {})
+    dx_client = None
+    if dx_config.get("enabled"):
+        spot_store = SpotStore(ttl=dx_config.get("spot_ttl_s", 900))
+        dx_client = DXClusterClient(
+            host=dx_config["host"],
+            port=dx_config["port"],
+            callsign=dx_config["callsign"],
+            store=spot_store,
+        )
+        dx_client.start()
+
+    # RX audio streaming (optional)
+    audio_config = config.get("audio", {})
+    if audio_config.get("enabled"):
+        audio_hub = AudioHub(
+            source_from_config(audio_config),
+            frame_ms=audio_config.get("frame_ms", 20),
+            buffer_frames=audio_config.get("buffer_frames", 5),
+            reopen_delay=audio_config.get("reopen_delay_s", 1.0),
+        )
+        try:
+            await audio_hub.start()
+        except Exception as e:
+            logging.getLogger(__name__).error("Failed to start audio source: %s", e)
+            audio_hub = None
+
+    # Waterfall rows computed from the audio feed (optional, needs audio)
+    spectrum_config = config.get("spectrum", {})
+    if spectrum_config.get("enabled") and audio_hub:
+        spectrum_engine = SpectrumEngine.from_config(audio_hub.source.sample_rate, spectrum_config)
+        audio_hub.taps.append(spectrum_engine.feed)
 
     # Start polling task
-    poll_task = asyncio.create_task(poll_radio_state(config["polling"]["interval_ms"]))
+    poll_task = asyncio.create_task(poll_radio_state(config["polling"]))
 
     yield
 
+    # Wait for the poller, so no recorder/snapshot write is still in flight
     poll_task.cancel()
-    if rig_client.connected:
-        await rig_client.disconnect()
+    try:
+        await poll_task
+    except asyncio.CancelledError:
+        pass
+    if cw_keyer:
+        await cw_keyer.stop()
+    await loop_lag.stop()
+    if dx_client:
+        await dx_client.stop()
+    if audio_hub:
+        await audio_hub.stop()
+    await rig_supervisor.stop()
+    if snapshot_writer:
+        await asyncio.to_thread(snapshot_writer.save, radio_state, rig_client)
+    channel_store.close()
+    await logbook.stop()
+    if state_recorder:
+        await asyncio.to_thread(state_recorder.close)
+    log_pipeline.stop()
 
 
 app = FastAPI(title="Web Radio", lifespan=lifespan)
 security = HTTPBasic()
 
-# Mount static files
+# Static files: fingerprinted + precompressed (see assets.py)
 static_path = Path(__file__).parent / "static"
-app.mount("/static", StaticFiles(directory=static_path), name="static")
+asset_pipeline = AssetPipeline(static_path)
 
 
 @lru_cache
@@ -98,61 +229,116 @@ def verify_credentials(
     return credentials.username
 
 
-async def poll_radio_state(interval_ms: int):
+async def poll_radio_state(polling_config: dict):
     """Poll rigctld and broadcast state to clients.
 
-    Automatically reconnects if connection is lost.
+    Reconnection is handled by the RigSupervisor in the background; the
+    poller only reports a lost link and skips cycles until it is back.
+
+    Cycles start on a fixed-rate schedule (see health.py), so a slow
+    cycle doesn't push every later one back; overruns are counted as
+    missed deadlines. Tuning commands and frequency/RIT changes seen in a
+    poll start a short burst of faster polls (`polling.burst`).
     """
-    global rig_client, radio_state
+    global poll_scheduler, last_poll_ok
     logger = logging.getLogger(__name__)
     config = get_config()
-    reconnect_attempts = 0
+    nearest_max_hz = config.get("channels", {}).get("nearest_max_hz", 5000)
+    spot_window_hz = config.get("dx_cluster", {}).get("window_hz", 10000)
+    spectrum_margin = config.get("spectrum", {}).get("span_margin", 1.25)
+    poll_scheduler = FixedRateScheduler.from_config(polling_config)
+    broadcast_version = -1
 
     while True:
+        await poll_scheduler.wait()
         try:
-            # Try to reconnect if not connected
+            if state_recorder is not None:
+                await state_recorder.flush_if_due()  # Every tick, linked or not
+
+            # Hand reconnection off to the supervisor
             if rig_client and not rig_client.connected:
-                if reconnect_attempts == 0:
-                    logger.info("Attempting to connect to rigctld...")
-                try:
-                    await rig_client.connect()
-                    logger.info(f"Connected to rigctld at {config['rigctld']['host']}:{config['rigctld']['port']}")
-                    reconnect_attempts = 0
-                except Exception as e:
-                    reconnect_attempts += 1
-                    if reconnect_attempts % 10 == 1:  # Log every 10 attempts
-                        logger.warning(f"Cannot connect to rigctld (attempt {reconnect_attempts}): {e}")
-                    await asyncio.sleep(interval_ms / 1000)
-                    continue
+                if rig_supervisor:
+                    rig_supervisor.connection_lost()
+                if trigger_engine is not None:
+                    run_triggers([])  # Link rules still need their ticks
+                continue
 
             # Poll radio state if connected
             if rig_client and rig_client.connected:
-                radio_state = await rig_client.get_state()
-                radio_state["type"] = "state"
-                await broadcast(radio_state)
+                # Updated in place; version only moves when something changed
+                await rig_client.get_state(radio_state)
+                last_poll_ok = time.monotonic()
+                if channel_store is not None:
+                    radio_state.update(channel=channel_store.nearest(radio_state.freq, nearest_max_hz))
+                changed = radio_state.take_dirty()
+                if "freq" in changed or "rit" in changed:
+                    poll_scheduler.burst()  # Someone is tuning: follow the knob closely
+                if radio_state.version != broadcast_version:
+                    broadcast_version = radio_state.version
+                    if state_recorder is not None:
+                        state_recorder.record(radio_state)
+                    await broadcast(radio_state.encode())
+                if trigger_engine is not None:
+                    run_triggers(changed)
+                if snapshot_writer is not None:
+                    await snapshot_writer.save_if_due(radio_state, rig_client)
+                if spot_store is not None:
+                    await broadcast_spots(radio_state, spot_window_hz)
+                if spectrum_engine is not None:
+                    spectrum_engine.set_span(radio_state.filter_width * spectrum_margin)
         except Exception as e:
-            logger.error(f"Error polling radio state: {e}", exc_info=True)
+            logger.error("Error polling radio state: %s", e, exc_info=True)
             # Disconnect to trigger reconnection
             if rig_client and rig_client.connected:
                 try:
                     await rig_client.disconnect()
                 except Exception:
                     pass
+            if rig_supervisor:
+                rig_supervisor.connection_lost(str(e))
 
-        await asyncio.sleep(interval_ms / 1000)
 
+def run_triggers(changed_fields: List[str]):
+    """Evaluate alert rules for one poll tick; send matches to subscribed clients."""
+    changed = {name: radio_state[name] for name in changed_fields}
+    link = rig_supervisor.state if rig_supervisor else None
+    if link != trigger_engine.values.get("link"):
+        changed["link"] = link
+    for event in trigger_engine.update(changed):
+        for session in connected_clients:
+            if session.wants_event(event["rule"]):
+                session.send(event)
+
+
+def polled_state():
+    """radio_state once polled (not just restored from a snapshot), else None."""
+    return radio_state if radio_state.version and not radio_state.stale else None
+
+
+async def broadcast(message: Union[dict, str]):
+    """Queue message (a dict, or pre-encoded JSON) for all WebSocket clients (never blocks)."""
+    for session in list(connected_clients):
+        if session.closed:
+            connected_clients.remove(session)
+        else:
+            session.send(message)
 
-async def broadcast(message: dict):
-    """Send message to all connected WebSocket clients."""
-    disconnected = []
-    for client in connected_clients:
-        try:
-            await client.send_json(message)
-        except Exception:
-            disconnected.append(client)
 
-    for client in disconnected:
-        connected_clients.remove(client)
+def spots_near(state: dict, window_hz: int) -> list:
+    """Live spots within the current passband ± window_hz."""
+    spot_store.expire()
+    half_width = state.get("filter_width", 0) // 2 + window_hz
+    freq = state.get("freq", 0)
+    return [spot.to_dict() for spot in spot_store.query(freq - half_width, freq + half_width)]
+
+
+async def broadcast_spots(state: dict, window_hz: int):
+    """Broadcast nearby spots, only when the visible set changed."""
+    global last_spots
+    spots = spots_near(state, window_hz)
+    if spots != last_spots:
+        last_spots = spots
+        await broadcast({"type": "spots", "spots": spots})
 
 
 def verify_ws_token(token: str, config: dict) -> bool:
@@ -181,9 +367,81 @@ async def handle_command(data: dict, websocket: WebSocket):
     - set_power: Set TX power 0-100%
     - set_break_in: Enable/disable break-in (full QSK)
     - set_rit: Set RIT offset in Hz
-    - get_state: Request full radio state
+    - run_macro: Run a named preset/macro as one pipelined batch
+    - get_state: Request full radio state (as last polled)
+    - get_channels: Query memory channels (band, tag, min_freq, max_freq, offset, limit)
+    - log_contact: Log a contact (call, rst_sent, ...); freq/mode/time default to the current state
+    - check_dupe: Is `call` a dupe on the current (or given) band and mode?
+    - cw_send: Key CW text (queued, sent word by word ahead of polling)
+    - cw_abort: Stop the CW being sent and drop queued text
+    - cw_speed: Set the keyer speed in WPM
+    - subscribe_events: Receive trigger `event` messages (`rules`: names, default all)
+    - unsubscribe_events: Stop receiving trigger events
     """
     logger = logging.getLogger(__name__)
+    cmd = data.get("cmd")
+
+    # Local commands (don't need the rig)
+    if cmd == "get_channels":
+        if channel_store is None:
+            await websocket.send_json({"type": "error", "message": "Channel store not available"})
+            return
+        try:
+            page = await asyncio.to_thread(
+                channel_store.query,
+                band=data.get("band"),
+                tag=data.get("tag"),
+                min_freq=data.get("min_freq"),
+                max_freq=data.get("max_freq"),
+                offset=data.get("offset", 0),
+                limit=data.get("limit", 50),
+            )
+        except (TypeError, ValueError) as e:
+            await websocket.send_json({"type": "error", "message": str(e)})
+            return
+        await websocket.send_json({"type": "channels", **page})
+        return
+
+    if cmd in ("log_contact", "check_dupe"):
+        if logbook is None:
+            await websocket.send_json({"type": "error", "message": "Logbook not available"})
+            return
+        try:
+            if cmd == "log_contact":
+                contact = logbook.log(data.get("contact") or {}, polled_state())
+                await websocket.send_json({"type": "contact_logged", "contact": contact})
+            else:
+                call = normalize_call(data.get("call"))
+                band = data.get("band") or band_for(radio_state.freq)
+                mode = data.get("mode") or radio_state.mode
+                await websocket.send_json({
+                    "type": "dupe", "call": call, "band": band, "mode": mode,
+                    "dupe": logbook.is_dupe(call, band, mode),
+                })
+        except (TypeError, ValueError) as e:
+            await websocket.send_json({"type": "error", "cmd": cmd, "message": str(e)})
+        return
+
+    if cmd in ("subscribe_events", "unsubscribe_events"):
+        session = next((s for s in connected_clients if s.websocket is websocket), None)
+        if trigger_engine is None or session is None:
+            await websocket.send_json({"type": "error", "cmd": cmd, "message": "Triggers not available"})
+            return
+        if cmd == "unsubscribe_events":
+            session.events = None
+        else:
+            rules = set(data.get("rules") or ())
+            unknown = rules - trigger_engine.rules.keys()
+            if unknown:
+                await websocket.send_json({
+                    "type": "error", "cmd": cmd, "message": f"Unknown rules: {', '.join(sorted(unknown))}",
+                })
+                return
+            session.events = rules
+        await websocket.send_json({
+            "type": "events", "subscribed": session.events is not None, "rules": trigger_engine.summary(),
+        })
+        return
 
     if not rig_client or not rig_client.connected:
         await websocket.send_json({
@@ -192,11 +450,46 @@ async def handle_command(data: dict, websocket: WebSocket):
         })
         return
 
-    cmd = data.get("cmd")
+    # CW goes through the keyer's queue, not admission control
+    if cmd in ("cw_send", "cw_abort", "cw_speed"):
+        if cw_keyer is None:
+            await websocket.send_json({"type": "error", "cmd": cmd, "message": "CW keying not enabled"})
+            return
+        try:
+            if cmd == "cw_send":
+                job = cw_keyer.send(data.get("text", ""))
+                await websocket.send_json({"type": "ack", "cmd": cmd, "success": True, "id": job.id})
+            elif cmd == "cw_abort":
+                dropped = await cw_keyer.abort()
+                await websocket.send_json({"type": "ack", "cmd": cmd, "success": True, "dropped": dropped})
+            elif await cw_keyer.set_speed(data.get("value")):
+                await websocket.send_json({"type": "ack", "cmd": cmd, "success": True})
+            else:
+                await websocket.send_json({"type": "error", "cmd": cmd, "message": "Rig refused keyer speed"})
+        except (TypeError, ValueError) as e:
+            await websocket.send_json({"type": "error", "cmd": cmd, "message": str(e)})
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            await websocket.send_json({"type": "error", "cmd": cmd, "message": f"Rig error: {str(e) or type(e).__name__}"})
+        return
+
+    if cmd == "get_state":
+        # The poller keeps radio_state current; a cache read needs no rig slot
+        await websocket.send_text(radio_state.encode())
+        return
+
+    # Reject rather than queue behind the shared rigctld connection
+    if not admission.try_enter():
+        await websocket.send_json(overload_error(OVERLOADED, cmd, admission.retry_after))
+        return
+
     value = data.get("value")
 
     # Log SET commands at INFO level to make them visible
-    logger.info(f"WebSocket command: {cmd} = {value}")
+    logger.info("WebSocket command: %s = %s", cmd, value)
+    if trigger_engine is not None:
+        trigger_engine.note_command()  # Our own retune, not someone else's
+    if poll_scheduler is not None and cmd in BURST_COMMANDS:
+        poll_scheduler.burst()
 
     try:
         if cmd == "set_freq":
@@ -210,25 +503,17 @@ async def handle_command(data: dict, websocket: WebSocket):
             success = await rig_client.set_func("SPOT", bool(value))
         elif cmd == "set_agc":
             # Use Thetis native ZZGT command instead of hamlib L AGC
-            # Thetis values: 0=Fixed, 1=Long, 2=Slow, 3=Med, 4=Fast, 5=Custom
-            agc_map = {
-                "OFF": 0,      # Fixed
-                "SLOW": 2,     # Slow
-                "MED": 3,      # Med
-                "FAST": 4      # Fast
-            }
-            agc_value = agc_map.get(str(value).upper(), 3)
-            logger.info(f"Setting AGC: {value} → ZZGT{agc_value}")
+            agc_value = AGC_TO_THETIS.get(str(value).upper(), 3)
+            logger.info("Setting AGC: %s → ZZGT%d", value, agc_value)
             success = await rig_client.set_agc_thetis(agc_value)
-            logger.info(f"Set AGC result: {success}")
+            logger.info("Set AGC result: %s", success)
         elif cmd == "set_rf_gain":
             # Use Thetis native ZZAR (AGC Threshold) command
             # UI range: 0-100%
             # Thetis range: -20 to +120
-            # Conversion: thetis_value = (ui_percent / 100) * 140 - 20
             rf_gain_pct = int(value)
-            rf_gain_thetis = int((rf_gain_pct / 100) * 140 - 20)
-            logger.info(f"Setting RF Gain: {rf_gain_pct}% → ZZAR{rf_gain_thetis:+04d}")
+            rf_gain_thetis = rf_gain_to_thetis(rf_gain_pct)
+            logger.info("Setting RF Gain: %d%% → ZZAR%+04d", rf_gain_pct, rf_gain_thetis)
             success = await rig_client.set_rf_gain_thetis(rf_gain_thetis)
         elif cmd == "set_break_in":
             # BKIN = Full break-in (QSK) for CW
@@ -238,10 +523,15 @@ async def handle_command(data: dict, websocket: WebSocket):
             success = await rig_client.set_level("RFPOWER", int(value) / 100.0)
         elif cmd == "set_rit":
             success = await rig_client.set_rit(int(value))
-        elif cmd == "get_state":
-            state = await rig_client.get_state()
-            state["type"] = "state"
-            await websocket.send_json(state)
+        elif cmd == "run_macro":
+            macro = macros.get(str(value))
+            if macro is None:
+                await websocket.send_json({"type": "error", "message": f"Unknown macro: {value}"})
+                return
+            # Snapshot: the poller keeps updating radio_state while the macro runs
+            result = await run_macro(rig_client, macro, radio_state.to_dict())
+            logger.info("Macro %s: success=%s", macro.name, result["success"])
+            await websocket.send_json(result)
             return
         else:
             await websocket.send_json({"type": "error", "message": f"Unknown command: {cmd}"})
@@ -250,13 +540,258 @@ async def handle_command(data: dict, websocket: WebSocket):
         await websocket.send_json({"type": "ack", "cmd": cmd, "success": success})
     except Exception as e:
         await websocket.send_json({"type": "error", "message": str(e)})
+    finally:
+        admission.leave()
 
 
 @app.get("/")
-async def root(username: Annotated[str, Depends(verify_credentials)]):
-    """Serve main UI page."""
-    static_file = Path(__file__).parent / "static" / "index.html"
-    return FileResponse(static_file)
+async def root(request: Request, username: Annotated[str, Depends(verify_credentials)]):
+    """Serve main UI page (rewritten to reference hashed asset names)."""
+    return asset_pipeline.response(asset_pipeline.lookup(INDEX), request, immutable=False)
+
+
+def health_report() -> dict:
+    """Timing and link details shared by /healthz and /readyz."""
+    link = rig_supervisor.status() if rig_supervisor else {"state": None}
+    return {
+        "link": {k: v for k, v in link.items() if k != "type"},
+        "last_poll_age_s": round(time.monotonic() - last_poll_ok, 3) if last_poll_ok is not None else None,
+        "poll": poll_scheduler.stats() if poll_scheduler else None,
+        "loop_lag_ms": loop_lag.stats() if loop_lag else None,
+        "clients": [session.stats() for session in connected_clients],
+        "logging": log_pipeline.stats() if log_pipeline else None,
+        "admission": admission.stats(),
+        "cw": cw_keyer.stats() if cw_keyer else None,
+        "triggers": trigger_engine.stats() if trigger_engine else None,
+    }
+
+
+@app.get("/healthz")
+async def healthz(config: Annotated[dict, Depends(get_config)]):
+    """Liveness: the event loop is answering. Always 200, with details."""
+    return {"status": "ok", **health_report()}
+
+
+@app.get("/readyz")
+async def readyz(config: Annotated[dict, Depends(get_config)]):
+    """Readiness: rig linked, polls fresh and loop lag within limits (else 503)."""
+    health_config = config.get("health", {})
+    report = health_report()
+    problems = []
+    if report["link"]["state"] != LINK_CONNECTED:
+        problems.append("rig link not connected")
+    age = report["last_poll_age_s"]
+    if age is None or age > health_config.get("max_poll_age_s", 5):
+        problems.append("no recent successful poll")
+    lag_p95 = (report["loop_lag_ms"] or {}).get("p95")
+    if lag_p95 is not None and lag_p95 > health_config.get("max_loop_lag_ms", 200):
+        problems.append("event loop lag too high")
+
+    body = {"status": "ready" if not problems else "not_ready", "problems": problems, **report}
+    return JSONResponse(body, status_code=status.HTTP_503_SERVICE_UNAVAILABLE if problems else status.HTTP_200_OK)
+
+
+def get_profiler(config: Annotated[dict, Depends(get_config)]) -> Profiler:
+    """Dependency: the profiler (404 unless `profiling.enabled`)."""
+    global profiler
+    profiling_config = config.get("profiling", {})
+    if not profiling_config.get("enabled", False):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling disabled")
+    if profiler is None:
+        profiler = Profiler.from_config(profiling_config)
+    return profiler
+
+
+@app.post("/api/admin/profile")
+async def capture_profile(
+    username: Annotated[str, Depends(verify_credentials)],
+    profiler: Annotated[Profiler, Depends(get_profiler)],
+    mode: str = "sample",
+    duration: float = 10.0,
+    scope: str = "hot",
+):
+    """Profile the event loop for a bounded window and download the result.
+
+    mode=sample returns collapsed stacks (scope=hot keeps only
+    poll/broadcast/command handling); mode=cprofile returns a pstats file.
+    """
+    logger = logging.getLogger(__name__)
+    logger.info("Profiling capture by %s: mode=%s duration=%ss scope=%s", username, mode, duration, scope)
+    try:
+        capture = await profiler.capture(mode=mode, duration=duration, scope=scope)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return Response(
+        capture.content,
+        media_type=capture.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{capture.filename}"'},
+    )
+
+
+@app.get("/static/{path:path}")
+async def static_asset(path: str, request: Request):
+    """Serve a static asset; hashed names are cached forever."""
+    asset = asset_pipeline.lookup(path)
+    if asset is None or asset.name == INDEX:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return asset_pipeline.response(asset, request, immutable=path == asset.hashed_name)
+
+
+@app.get("/api/state")
+async def get_state_api(
+    request: Request,
+    username: Annotated[str, Depends(verify_credentials)],
+    config: Annotated[dict, Depends(get_config)],
+    wait: int = None,
+    timeout: float = None,
+):
+    """Current radio state from the poller's cache (never touches the rig).
+
+    The ETag changes with the state version, so If-None-Match gets a 304
+    while nothing changed. With `?wait=<version>` the request is held
+    until the version moves on or `timeout` seconds pass (capped by
+    `state_api.max_wait_s`).
+    """
+    if wait is not None:
+        max_wait = config.get("state_api", {}).get("max_wait_s", 30)
+        await radio_state.wait_changed(wait, min(timeout or max_wait, max_wait))
+
+    if not radio_state.version:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No state polled yet")
+
+    etag = f'"{boot_id}-{radio_state.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(radio_state.encode(), media_type="application/json", headers=headers)
+
+
+def get_channel_store() -> ChannelStore:
+    """Dependency: the channel store (503 until the app has started)."""
+    if channel_store is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Channel store not available")
+    return channel_store
+
+
+@app.get("/api/channels")
+async def list_channels(
+    username: Annotated[str, Depends(verify_credentials)],
+    store: Annotated[ChannelStore, Depends(get_channel_store)],
+    band: str = None,
+    tag: str = None,
+    min_freq: int = None,
+    max_freq: int = None,
+    offset: int = 0,
+    limit: int = 50,
+):
+    """Query memory channels, one page at a time, ordered by frequency."""
+    return await asyncio.to_thread(
+        store.query,
+        band=band, tag=tag, min_freq=min_freq, max_freq=max_freq, offset=offset, limit=limit,
+    )
+
+
+@app.post("/api/channels/import")
+async def import_channels(
+    request: Request,
+    username: Annotated[str, Depends(verify_credentials)],
+    store: Annotated[ChannelStore, Depends(get_channel_store)],
+    format: str = "csv",
+):
+    """Bulk import channels from a CSV or ADIF request body."""
+    text = (await request.body()).decode("utf-8", errors="replace")
+    try:
+        count = await asyncio.to_thread(store.import_text, text, format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"imported": count, "total": len(store)}
+
+
+@app.delete("/api/channels/{channel_id}")
+async def delete_channel(
+    channel_id: int,
+    username: Annotated[str, Depends(verify_credentials)],
+    store: Annotated[ChannelStore, Depends(get_channel_store)],
+):
+    """Delete a memory channel."""
+    if not await asyncio.to_thread(store.delete, channel_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Channel not found")
+    return {"deleted": channel_id}
+
+
+def get_logbook() -> Logbook:
+    """Dependency: the contact logbook (503 until the app has started)."""
+    if logbook is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Logbook not available")
+    return logbook
+
+
+@app.get("/api/logbook")
+async def list_contacts(
+    username: Annotated[str, Depends(verify_credentials)],
+    book: Annotated[Logbook, Depends(get_logbook)],
+    call: str = None,
+    band: str = None,
+    since: int = None,
+    until: int = None,
+    offset: int = 0,
+    limit: int = 50,
+):
+    """Query committed contacts, newest first (since/until: Unix time)."""
+    return await asyncio.to_thread(
+        book.query, call=call, band=band, since=since, until=until, offset=offset, limit=limit,
+    )
+
+
+@app.post("/api/logbook")
+async def log_contact(
+    request: Request,
+    username: Annotated[str, Depends(verify_credentials)],
+    book: Annotated[Logbook, Depends(get_logbook)],
+):
+    """Log a contact; freq, mode and time default to the current radio state."""
+    try:
+        contact = book.log(await request.json(), polled_state())
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return JSONResponse(contact, status_code=status.HTTP_201_CREATED)
+
+
+@app.get("/api/logbook/dupe")
+async def check_dupe(
+    call: str,
+    username: Annotated[str, Depends(verify_credentials)],
+    book: Annotated[Logbook, Depends(get_logbook)],
+    band: str = None,
+    mode: str = None,
+):
+    """Dupe check against the current band/mode unless given."""
+    try:
+        call = normalize_call(call)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    band = band or band_for(radio_state.freq)
+    mode = mode or radio_state.mode
+    return {"call": call, "band": band, "mode": mode, "dupe": book.is_dupe(call, band, mode)}
+
+
+@app.get("/api/logbook/export.adif")
+async def export_contacts(
+    username: Annotated[str, Depends(verify_credentials)],
+    book: Annotated[Logbook, Depends(get_logbook)],
+    call: str = None,
+    band: str = None,
+    since: int = None,
+    until: int = None,
+):
+    """Stream the log as ADIF (chunks are read on the thread pool)."""
+    return StreamingResponse(
+        book.export_adif(call=call, band=band, since=since, until=until),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="logbook.adi"'},
+    )
 
 
 @app.websocket("/ws")
@@ -271,15 +806,129 @@ async def websocket_endpoint(
         return
 
     await websocket.accept()
-    connected_clients.append(websocket)
 
-    # Send current state immediately
-    if radio_state:
-        await websocket.send_json(radio_state)
+    # Send current link status, macro list and state immediately
+    if rig_supervisor:
+        await websocket.send_json(rig_supervisor.status())
+    if macros:
+        await websocket.send_json({
+            "type": "macros",
+            "macros": [macro.summary() for macro in macros.values()],
+        })
+    if radio_state.version:
+        await websocket.send_text(radio_state.encode())
+    if last_spots:
+        await websocket.send_json({"type": "spots", "spots": last_spots})
+
+    # Broadcasts go through the session's queue from here on
+    session = ClientSession(websocket, config.get("health", {}).get("client_backlog", 50))
+    session.start()
+    connected_clients.append(session)
+    limiter = CommandLimiter.from_config(config.get("rate_limits", {}))
 
     try:
         while True:
             data = await websocket.receive_json()
+            retry_after = limiter.check(data.get("cmd"))
+            if retry_after:
+                await websocket.send_json(overload_error(RATE_LIMITED, data.get("cmd"), retry_after))
+                continue
             await handle_command(data, websocket)
     except WebSocketDisconnect:
-        connected_clients.remove(websocket)
+        pass
+    except RuntimeError:
+        # Starlette raises RuntimeError for a reply sent after the client went
+        # away; anything else is a handler bug and must not vanish silently
+        if WebSocketState.DISCONNECTED not in (websocket.client_state, websocket.application_state):
+            logging.getLogger(__name__).error("WebSocket handler failed", exc_info=True)
+            await websocket.close(code=1011)  # Internal error; don't leave the client waiting
+    finally:
+        if session in connected_clients:
+            connected_clients.remove(session)
+        await session.close()
+
+
+@app.websocket("/ws/audio")
+async def audio_endpoint(
+    websocket: WebSocket,
+    token: str = Query(None),
+    codec: str = Query(None),
+    config: dict = Depends(get_config),
+):
+    """WebSocket endpoint streaming RX audio as binary frames.
+
+    Sends one `audio_format` JSON text message, then binary frames
+    (see audio.py for the layout) until the client disconnects.
+    """
+    if not token or not verify_ws_token(token, config):
+        await websocket.close(code=4001)
+        return
+    if audio_hub is None or not audio_hub.running:
+        await websocket.close(code=4003)
+        return
+
+    try:
+        subscription = audio_hub.subscribe(codec or config.get("audio", {}).get("codec", "pcm16"))
+    except ValueError:
+        await websocket.close(code=4002)
+        return
+
+    async def pump():
+        while True:
+            frame = await subscription.queue.get()
+            await websocket.send_bytes(frame)
+
+    await websocket.accept()
+    await websocket.send_json(audio_hub.format(subscription.codec))
+    pump_task = asyncio.create_task(pump())
+    try:
+        # Nothing to receive; just wait for the client to go away
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        pump_task.cancel()
+        audio_hub.unsubscribe(subscription)
+
+
+@app.websocket("/ws/spectrum")
+async def spectrum_endpoint(
+    websocket: WebSocket,
+    token: str = Query(None),
+    fps: float = Query(None),
+    bins: int = Query(None),
+    config: dict = Depends(get_config),
+):
+    """WebSocket endpoint streaming waterfall rows as binary frames.
+
+    `fps` and `bins` request a rate and resolution; both are capped by the
+    server limits. Sends one `spectrum_format` JSON text message first.
+    """
+    if not token or not verify_ws_token(token, config):
+        await websocket.close(code=4001)
+        return
+    if spectrum_engine is None:
+        await websocket.close(code=4003)
+        return
+
+    subscription = spectrum_engine.subscribe(fps=fps, bins=bins)
+
+    async def pump():
+        while True:
+            row = await subscription.queue.get()
+            await websocket.send_bytes(row)
+
+    await websocket.accept()
+    await websocket.send_json({
+        "type": "spectrum_format",
+        "fps": subscription.fps,
+        "bins": subscription.bins,
+        "db_floor": spectrum_engine.db_floor,
+        "db_ceiling": spectrum_engine.db_ceiling,
+    })
+    pump_task = asyncio.create_task(pump())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        pump_task.cancel()
+        spectrum_engine.unsubscribe(subscription)
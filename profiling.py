@@ -0,0 +1,158 @@
+"""On-demand profiling of the event-loop hot paths.
+
+Nothing is installed until a capture is requested, so there is no cost
+when profiling is off. A capture runs for a bounded window and returns
+a downloadable file:
+
+- mode "cprofile": cProfile on the event-loop thread. Returns a pstats
+  file (load it with `python -m pstats` or snakeviz).
+- mode "sample": a background thread samples the event-loop thread's
+  stack every `sample_interval` seconds. Returns collapsed stacks
+  ("frame;frame;frame count" lines) for flamegraph.pl / speedscope. With
+  scope "hot", only samples inside poll_radio_state, broadcast,
+  handle_command or a client's sender task (where WebSocket sends
+  happen) are kept, and they are trimmed to start there.
+
+Only one capture can run at a time.
+"""
+
+import asyncio
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+MODES = ("cprofile", "sample")
+SCOPES = ("hot", "all")
+
+# Coroutines whose time we want to attribute (main.py, sessions.py), by
+# qualified name: other classes have a _run too
+HOT_PATHS = {"poll_radio_state", "broadcast", "handle_command", "ClientSession._run"}
+
+
+@dataclass
+class Capture:
+    """A finished capture, ready to download."""
+
+    filename: str
+    media_type: str
+    content: bytes
+    samples: int = 0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, scope: str = "all") -> Optional[str]:
+    """Collapsed-stack key for a frame, outermost first (None if out of scope)."""
+    labels = []
+    hot_index = None
+    while frame is not None:
+        if frame.f_code.co_qualname in HOT_PATHS:
+            hot_index = len(labels)  # Keeps the outermost hot frame
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+
+    if scope == "hot":
+        if hot_index is None:
+            return None
+        labels = labels[:hot_index + 1]
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Samples another thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float, scope: str = "all"):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.scope = scope
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            self.samples += 1
+            key = collapse_stack(frame, self.scope) if frame is not None else None
+            if key:
+                self.stacks[key] += 1
+
+    def collapsed(self) -> bytes:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()).encode("utf-8")
+
+
+class Profiler:
+    """Runs one bounded capture at a time on the calling (event-loop) thread."""
+
+    def __init__(self, max_duration: float = 60.0, sample_interval: float = 0.001):
+        self.max_duration = max_duration
+        self.sample_interval = sample_interval
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_config(cls, profiling_config: dict) -> "Profiler":
+        return cls(
+            max_duration=profiling_config.get("max_duration_s", 60),
+            sample_interval=profiling_config.get("sample_interval_ms", 1) / 1000,
+        )
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def capture(self, mode: str = "sample", duration: float = 10.0, scope: str = "hot") -> Capture:
+        """Profile the event loop for `duration` seconds (capped at max_duration).
+
+        Raises:
+            ValueError: Unknown mode or scope
+            RuntimeError: Another capture is running
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode} (expected one of {', '.join(MODES)})")
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown profiling scope: {scope} (expected one of {', '.join(SCOPES)})")
+        if self.busy:
+            raise RuntimeError("A profiling capture is already running")
+
+        duration = max(0.1, min(float(duration), self.max_duration))
+        async with self._lock:
+            if mode == "cprofile":
+                return await self._capture_cprofile(duration)
+            return await self._capture_samples(duration, scope)
+
+    async def _capture_cprofile(self, duration: float) -> Capture:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+        stats = pstats.Stats(profile)
+        # Same format as Stats.dump_stats()
+        return Capture("profile.pstats", "application/octet-stream", marshal.dumps(stats.stats))
+
+    async def _capture_samples(self, duration: float, scope: str) -> Capture:
+        sampler = StackSampler(threading.get_ident(), self.sample_interval, scope)
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+        return Capture("profile.collapsed", "text/plain; charset=utf-8", sampler.collapsed(), sampler.samples)
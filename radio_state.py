@@ -0,0 +1,156 @@
+"""Typed radio state with dirty tracking and a cached wire encoding.
+
+The poller keeps one RadioState and updates it in place. It used to
+build a new dict every tick. update() compares each field and records
+the changed ones in a bitmask. Any change bumps `version`. encode()
+serializes the state at most once per version, so a broadcast costs one
+json.dumps however many clients are connected, and an unchanged poll
+costs nothing. Each new encoding gets the next `seq`, so clients can
+count missed messages. wait_changed() lets a request (GET /api/state
+long-poll) sleep until the next version.
+
+restore() loads a saved state (see snapshot.py) flagged `stale`, so
+clients can show it right after a restart without taking it for live.
+The next update() clears the flag and bumps the version, even if the
+rig reports the same values.
+
+Read-only mapping access (state["freq"], state.get(...), "freq" in
+state) is kept for code that takes a plain state dict (macros, spots,
+recorder).
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+FIELDS = ("freq", "mode", "filter_width", "smeter", "agc", "rf_gain", "power", "break_in", "rit", "channel")
+_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(FIELDS)}
+
+# Values used until the rig has answered (and when it doesn't support a control)
+DEFAULTS = {
+    "freq": 0,
+    "mode": "USB",
+    "filter_width": 2400,
+    "smeter": -100,
+    "agc": "MED",
+    "rf_gain": 80,
+    "power": 50,
+    "break_in": False,
+    "rit": 0,
+    "channel": None,
+}
+
+
+class RadioState:
+    """Current rig state, versioned per change. Change fields through update()."""
+
+    __slots__ = FIELDS + ("version", "updated", "seq", "stale", "_dirty", "_wire", "_wire_version", "_waiters")
+
+    def __init__(self, **values):
+        for name in FIELDS:
+            setattr(self, name, DEFAULTS[name])
+        self.version = 0
+        self.updated = 0.0       # time.time() of the last change
+        self.seq = 0             # Count of distinct encodings (gaps = missed messages)
+        self.stale = False       # Restored from a snapshot, not polled yet
+        self._dirty = 0
+        self._wire: Optional[str] = None
+        self._wire_version = -1
+        self._waiters: List[asyncio.Future] = []
+        if values:
+            self.update(**values)
+
+    def update(self, **values) -> int:
+        """Set fields; returns the bitmask of fields that actually changed."""
+        changed = 0
+        for name, value in values.items():
+            bit = _BITS.get(name)
+            if bit is None:
+                raise KeyError(f"Unknown state field: {name}")
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed |= bit
+        if changed or (self.stale and values):
+            self.stale = False
+            self._dirty |= changed
+            self.version += 1
+            self.updated = time.time()
+            if self._waiters:
+                self._wake()
+        return changed
+
+    def restore(self, values: dict, updated: float) -> None:
+        """Load saved values (unknown fields ignored) and flag the state stale."""
+        self.update(**{name: value for name, value in values.items() if name in _BITS})
+        self.stale = True
+        self.updated = updated
+        self.version += 1  # Encodings cached before now lack the flag
+
+    def _wake(self) -> None:
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def wait_changed(self, version: int, timeout: float) -> bool:
+        """Wait until `version` is no longer current. Returns False on timeout.
+
+        Waiters are woken from update() and resume after the updating code
+        yields, so they see the whole poll tick, not just its first field.
+        """
+        if self.version != version:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    @property
+    def dirty(self) -> List[str]:
+        """Fields changed since the last take_dirty()."""
+        return [name for name in FIELDS if self._dirty & _BITS[name]]
+
+    def take_dirty(self) -> List[str]:
+        """Return and clear the changed fields."""
+        fields = self.dirty
+        self._dirty = 0
+        return fields
+
+    def to_dict(self) -> dict:
+        """Snapshot as a `state` message (ts = time of change)."""
+        message = {"type": "state"}
+        for name in FIELDS:
+            message[name] = getattr(self, name)
+        message["version"] = self.version
+        message["seq"] = self.seq
+        message["ts"] = self.updated
+        if self.stale:
+            message["stale"] = True
+        return message
+
+    def encode(self) -> str:
+        """JSON `state` message, computed once per version."""
+        if self._wire_version != self.version:
+            self.seq += 1
+            self._wire = json.dumps(self.to_dict(), separators=(",", ":"))
+            self._wire_version = self.version
+        return self._wire
+
+    # Read-only mapping access for code written against state dicts
+    def __getitem__(self, name: str):
+        if name not in _BITS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in _BITS
+
+    def get(self, name: str, default=None):
+        return getattr(self, name) if name in _BITS else default
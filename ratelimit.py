@@ -0,0 +1,171 @@
+"""Command rate limiting and admission control for WebSocket clients.
+
+Each connection has a CommandLimiter. It holds one token bucket for the
+connection as a whole and one per command class (tuning, controls,
+queries, ...), so a client spamming set_rit can't use up the budget for
+everything else. A global AdmissionControl caps how many rig-bound
+operations may be in flight at once across all clients; they all share
+one rigctld connection, and polling must not starve.
+
+Nothing is queued. A command over a limit is rejected at once, with a
+hint for when to retry:
+    {"type": "error", "code": "rate_limited" | "overloaded", "cmd": ..,
+     "message": .., "retry_after_ms": ..}
+"""
+
+import time
+from typing import Dict, Optional
+
+RATE_LIMITED = "rate_limited"
+OVERLOADED = "overloaded"
+
+COMMAND_CLASSES = {
+    "set_freq": "tune",
+    "set_rit": "tune",
+    "set_mode": "tune",
+    "set_filter_width": "tune",
+    "set_agc": "control",
+    "set_rf_gain": "control",
+    "set_power": "control",
+    "set_break_in": "control",
+    "set_spot": "control",
+    "run_macro": "macro",
+    "get_state": "query",
+    "get_channels": "local",
+    "log_contact": "local",
+    "check_dupe": "local",
+    "subscribe_events": "local",
+    "unsubscribe_events": "local",
+    "cw_send": "keying",
+    "cw_abort": "keying",
+    "cw_speed": "keying",
+}
+DEFAULT_CLASS = "other"
+
+# Used when config.yaml has no rate_limits section: (rate per s, burst)
+DEFAULT_LIMITS = {
+    "connection": (20.0, 40),
+    "tune": (10.0, 20),
+    "control": (5.0, 10),
+    "macro": (0.5, 2),
+    "query": (2.0, 4),
+    "local": (5.0, 10),
+    "keying": (10.0, 20),
+    DEFAULT_CLASS: (5.0, 10),
+}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/s, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def retry_after(self, now: Optional[float] = None) -> float:
+        """Seconds until a token is available (0 if one is now)."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class CommandLimiter:
+    """A connection's buckets: one overall, one per command class."""
+
+    def __init__(self, limits: Dict[str, tuple]):
+        self.limits = limits
+        self.connection = TokenBucket(*limits["connection"])
+        self.classes: Dict[str, TokenBucket] = {}
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, rate_config: dict) -> "CommandLimiter":
+        return cls(limits_from_config(rate_config))
+
+    def check(self, cmd: str, now: Optional[float] = None) -> float:
+        """Charge one command. Returns 0 if allowed, else seconds to wait."""
+        now = time.monotonic() if now is None else now
+        command_class = COMMAND_CLASSES.get(cmd, DEFAULT_CLASS)
+        bucket = self.classes.get(command_class)
+        if bucket is None:
+            bucket = self.classes[command_class] = TokenBucket(*self.limits[command_class], now=now)
+
+        # Only charge when both buckets allow it
+        wait = max(self.connection.retry_after(now), bucket.retry_after(now))
+        if wait > 0:
+            self.rejected += 1
+            return wait
+        self.connection.take()
+        bucket.take()
+        return 0.0
+
+
+def limits_from_config(rate_config: dict) -> Dict[str, tuple]:
+    """Merge `rate_limits` from config.yaml over DEFAULT_LIMITS.
+
+    Raises: ValueError on a rate that isn't positive or a burst below 1
+    (a bucket that never refills would ask clients to retry in infinity)
+    """
+    limits = dict(DEFAULT_LIMITS)
+    entries = {"connection": rate_config.get("connection"), **(rate_config.get("classes") or {})}
+    for name, entry in entries.items():
+        if entry:
+            rate = float(entry["rate"])
+            burst = entry.get("burst", max(1, rate))
+            if not rate > 0 or burst < 1:
+                raise ValueError(f"rate_limits {name}: rate must be > 0 and burst >= 1")
+            limits[name] = (rate, burst)
+    return limits
+
+
+class AdmissionControl:
+    """Caps concurrent rig-bound operations; rejects rather than queues."""
+
+    def __init__(self, max_concurrent: int = 4, retry_after: float = 0.25):
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, rate_config: dict) -> "AdmissionControl":
+        return cls(
+            max_concurrent=rate_config.get("max_concurrent_rig_ops", 4),
+            retry_after=rate_config.get("overload_retry_ms", 250) / 1000,
+        )
+
+    def try_enter(self) -> bool:
+        if self.in_flight >= self.max_concurrent:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def leave(self) -> None:
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "max": self.max_concurrent, "rejected": self.rejected}
+
+
+def overload_error(code: str, cmd: str, retry_after: float) -> dict:
+    """Error message telling the client when to try again."""
+    message = "Too many commands" if code == RATE_LIMITED else "Radio busy"
+    return {
+        "type": "error",
+        "code": code,
+        "cmd": cmd,
+        "message": f"{message}, retry in {retry_after * 1000:.0f} ms",
+        "retry_after_ms": int(retry_after * 1000) + 1,
+    }
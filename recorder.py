@@ -0,0 +1,336 @@
+"""Compact columnar recording of rig state, and replay.
+
+StateRecorder appends a record each time the polled state changes. Each
+file holds a fixed number of records (`capacity`) and is laid out column
+by column:
+
+    header (64 bytes) | t[capacity] | freq[capacity] | ... | break_in[capacity]
+
+Every column is a fixed-width little-endian array (see COLUMNS), so a
+reader can memory-map the file and view each column as a NumPy array
+without parsing anything. Records are buffered in memory. A flush writes
+each column's new slice plus the record count in the header, so a
+partially written file is always readable up to `count`. A full file is
+rotated to a new one, and the oldest files past `max_files` are deleted.
+
+ReplayClient stands in for RigClient and serves recorded states at 1x
+or accelerated speed. The UI and the fan-out can then be driven without
+a radio.
+"""
+
+import asyncio
+import logging
+import mmap
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from radio_state import RadioState
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"RIGREC\x00\x01"
+HEADER = struct.Struct("<8sHHIId")  # magic, version, columns, capacity, count, created
+HEADER_SIZE = 64
+COUNT_OFFSET = 16  # Byte offset of `count` in HEADER
+VERSION = 1
+SUFFIX = ".rec"
+
+COLUMNS = [
+    ("t", "<f8"),            # Unix time
+    ("freq", "<i8"),
+    ("filter_width", "<i4"),
+    ("rit", "<i4"),
+    ("smeter", "<i2"),
+    ("rf_gain", "u1"),
+    ("power", "u1"),
+    ("agc", "u1"),
+    ("mode", "u1"),
+    ("break_in", "u1"),
+]
+
+# Enumerated columns: code = index (unknown values map to 0)
+MODES = ["", "USB", "LSB", "CW", "CWR", "AM", "FM", "WFM", "RTTY", "RTTYR", "PKTUSB", "PKTLSB", "PKTFM", "DATA"]
+AGC_MODES = ["", "OFF", "SLOW", "MED", "FAST"]
+_MODE_CODES = {name: code for code, name in enumerate(MODES)}
+_AGC_CODES = {name: code for code, name in enumerate(AGC_MODES)}
+
+
+def encode_state(state) -> tuple:
+    """State (dict or RadioState) -> column values (without t)."""
+    return (
+        int(state.get("freq", 0)),
+        int(state.get("filter_width", 0)),
+        int(state.get("rit", 0)),
+        max(-32768, min(32767, int(state.get("smeter", 0)))),
+        max(0, min(255, int(state.get("rf_gain", 0)))),
+        max(0, min(255, int(state.get("power", 0)))),
+        _AGC_CODES.get(state.get("agc"), 0),
+        _MODE_CODES.get(state.get("mode"), 0),
+        1 if state.get("break_in") else 0,
+    )
+
+
+def decode_record(columns: Dict[str, np.ndarray], index: int) -> dict:
+    """One record of a recording -> state dict (as RigClient.get_state())."""
+    return {
+        "freq": int(columns["freq"][index]),
+        "mode": MODES[columns["mode"][index]] or "USB",
+        "filter_width": int(columns["filter_width"][index]),
+        "smeter": int(columns["smeter"][index]),
+        "agc": AGC_MODES[columns["agc"][index]] or "MED",
+        "rf_gain": int(columns["rf_gain"][index]),
+        "power": int(columns["power"][index]),
+        "break_in": bool(columns["break_in"][index]),
+        "rit": int(columns["rit"][index]),
+    }
+
+
+def _column_offsets(capacity: int) -> Dict[str, int]:
+    offsets, offset = {}, HEADER_SIZE
+    for name, dtype in COLUMNS:
+        offsets[name] = offset
+        offset += np.dtype(dtype).itemsize * capacity
+    return offsets
+
+
+class RecordingFile:
+    """Read-only, memory-mapped view of one recording file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_columns, self.capacity, self.count, self.created = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or n_columns != len(COLUMNS):
+            self._mmap.close()
+            raise ValueError(f"Not a rig state recording: {self.path}")
+
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, offset in _column_offsets(self.capacity).items():
+            dtype = dict(COLUMNS)[name]
+            self.columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=self.count, offset=offset)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def state(self, index: int) -> dict:
+        return decode_record(self.columns, index)
+
+    def close(self) -> None:
+        self.columns = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # Views still exported; released with them
+
+
+def recording_paths(path: Union[str, Path]) -> List[Path]:
+    """A .rec file, or every .rec file in a directory (oldest first)."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob(f"*{SUFFIX}"))
+    return [path]
+
+
+def load_recordings(path: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """Concatenate the columns of one or more recordings, ordered by time."""
+    files = [RecordingFile(p) for p in recording_paths(path)]
+    files = [f for f in files if len(f)]
+    if not files:
+        raise FileNotFoundError(f"No recorded states in {path}")
+    columns = {name: np.concatenate([f.columns[name] for f in files]) for name, _ in COLUMNS}
+    for f in files:
+        f.close()
+    order = np.argsort(columns["t"], kind="stable")
+    return {name: column[order] for name, column in columns.items()}
+
+
+class StateRecorder:
+    """Appends state changes to rotating columnar files."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        capacity: int = 65536,
+        flush_interval: float = 5.0,
+        max_files: int = 50,
+    ):
+        self.directory = Path(directory)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_files = max_files
+        self.offsets = _column_offsets(capacity)
+        self.path: Optional[Path] = None
+        self.count = 0            # Records flushed to the current file
+        self.records_written = 0
+        self._pending: List[tuple] = []
+        self._last: Optional[tuple] = None
+        self._last_flush = time.monotonic()
+        self._file = None
+
+    @classmethod
+    def from_config(cls, base_dir: Path, recorder_config: dict) -> "StateRecorder":
+        return cls(
+            base_dir / recorder_config.get("directory", "data/recordings"),
+            capacity=recorder_config.get("file_records", 65536),
+            flush_interval=recorder_config.get("flush_interval_s", 5.0),
+            max_files=recorder_config.get("max_files", 50),
+        )
+
+    def record(self, state: dict, t: Optional[float] = None) -> bool:
+        """Buffer the state if it differs from the last one. Returns True if recorded."""
+        values = encode_state(state)
+        if values == self._last:
+            return False
+        self._last = values
+        self._pending.append((time.time() if t is None else t,) + values)
+        return True
+
+    @property
+    def flush_due(self) -> bool:
+        return bool(self._pending) and (
+            time.monotonic() - self._last_flush >= self.flush_interval
+            or len(self._pending) >= self.capacity - self.count
+        )
+
+    async def flush_if_due(self) -> None:
+        """Flush on a worker thread when the interval elapsed (poll loop hook).
+
+        If the caller is cancelled mid-write, it still waits for the thread,
+        so close() never runs under an in-flight write.
+        """
+        if self.flush_due:
+            pending, self._pending = self._pending, []
+            write = asyncio.ensure_future(asyncio.to_thread(self._write, pending))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                await write
+                raise
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        self._write(pending)
+
+    def close(self) -> None:
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _open_new(self) -> None:
+        if self._file:
+            self._file.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        created = time.time()
+        stamp = datetime.fromtimestamp(created, timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+        self.path = self.directory / f"rig-{stamp}{SUFFIX}"
+        self._file = open(self.path, "w+b")
+        total = self.offsets[COLUMNS[-1][0]] + np.dtype(COLUMNS[-1][1]).itemsize * self.capacity
+        self._file.truncate(total)
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), self.capacity, 0, created))
+        self.count = 0
+        self._prune()
+
+    def _prune(self) -> None:
+        files = recording_paths(self.directory)
+        for old in files[:max(0, len(files) - self.max_files)]:
+            old.unlink(missing_ok=True)
+
+    def _write(self, records: List[tuple]) -> None:
+        while records:
+            if self._file is None or self.count >= self.capacity:
+                self._open_new()
+            chunk, records = records[:self.capacity - self.count], records[self.capacity - self.count:]
+            for i, (name, dtype) in enumerate(COLUMNS):
+                values = np.array([record[i] for record in chunk], dtype=dtype)
+                self._file.seek(self.offsets[name] + values.itemsize * self.count)
+                self._file.write(values.tobytes())
+            self.count += len(chunk)
+            self.records_written += len(chunk)
+            # Count last, so readers never see unwritten records
+            self._file.seek(COUNT_OFFSET)
+            self._file.write(struct.pack("<I", self.count))
+            self._file.flush()
+        self._last_flush = time.monotonic()
+
+
+class ReplayClient:
+    """Serves recorded states through the RigClient interface.
+
+    get_state() returns the latest record at or before the replay clock,
+    which runs at `speed` times real time from the first record. Commands
+    are accepted and ignored, since a recording can't be retuned.
+    """
+
+    def __init__(self, path: Union[str, Path], speed: float = 1.0, loop: bool = True):
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+        self.columns: Dict[str, np.ndarray] = {}
+        self._connected = False
+        self._started = 0.0
+
+    @classmethod
+    def from_config(cls, base_dir: Path, replay_config: dict) -> "ReplayClient":
+        return cls(
+            base_dir / replay_config.get("path", "data/recordings"),
+            speed=replay_config.get("speed", 1.0),
+            loop=replay_config.get("loop", True),
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def duration(self) -> float:
+        t = self.columns["t"]
+        return float(t[-1] - t[0])
+
+    async def connect(self, host: str = None, port: int = None, timeout: float = None) -> None:
+        if not self.columns:
+            try:
+                self.columns = await asyncio.to_thread(load_recordings, self.path)
+            except ValueError as e:
+                raise OSError(str(e)) from e  # Reported by the supervisor like a failed connect
+            logger.info("Replaying %d states (%.0f s) from %s at %gx",
+                        len(self.columns["t"]), self.duration, self.path, self.speed)
+        self._started = time.monotonic()
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    def position(self, now: Optional[float] = None) -> int:
+        """Index of the record due at wall-clock `now` (monotonic)."""
+        t = self.columns["t"]
+        elapsed = ((now if now is not None else time.monotonic()) - self._started) * self.speed
+        if self.loop and self.duration > 0:
+            elapsed %= self.duration
+        index = int(np.searchsorted(t, t[0] + elapsed, side="right")) - 1
+        return max(0, min(index, len(t) - 1))
+
+    async def get_state(self, state: Optional[RadioState] = None) -> RadioState:
+        if not self._connected:
+            raise ConnectionError("Replay not started")
+        if state is None:
+            state = RadioState()
+        state.update(**decode_record(self.columns, self.position()))
+        return state
+
+    async def _ignored(self, *args, **kwargs) -> bool:
+        return True
+
+    set_freq = set_mode = set_level = set_func = set_parm = set_rit = _ignored
+    set_agc_thetis = set_rf_gain_thetis = _ignored
+    send_morse = stop_morse = set_keyer_speed = _ignored
+
+    async def execute_batch(self, batch, timeout: float = 5.0) -> List[bool]:
+        return [True] * len(batch)
@@ -16,6 +16,7 @@ Common commands:
 - u <name> / U <name> <val> : Get/Set function (SPOT, BKIN) 0/1
 - p <name> / P <name> <val> : Get/Set parameter (AGC) integer
 - j / J <offset>         : Get/Set RIT offset in Hz
+- b <text>               : Send CW (morse) text; \\stop_morse aborts it
 
 Responses:
 - GET commands: return value on success
@@ -25,32 +26,255 @@ Documentation: https://hamlib.sourceforge.net/html/rigctld.1.html
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
-from typing import Optional, Tuple
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from radio_state import DEFAULTS, RadioState
 
 logger = logging.getLogger(__name__)
 
 
+# UI AGC mode -> Thetis ZZGT value
+# Thetis values: 0=Fixed, 1=Long, 2=Slow, 3=Med, 4=Fast, 5=Custom
+AGC_TO_THETIS = {
+    "OFF": 0,      # Fixed
+    "SLOW": 2,     # Slow
+    "MED": 3,      # Med
+    "FAST": 4      # Fast
+}
+
+
+# Thetis ZZGT value -> UI AGC mode (indexable; np.take works on whole arrays)
+THETIS_TO_AGC = (
+    "OFF",   # 0 Fixed
+    "SLOW",  # 1 Long
+    "SLOW",  # 2 Slow
+    "MED",   # 3 Med
+    "FAST",  # 4 Fast
+    "MED",   # 5 Custom
+)
+
+# Thetis ZZAR AGC threshold (-20 to +120) <-> UI RF gain (0-100%)
+ZZAR_MIN, ZZAR_MAX = -20, 120
+ZZAR_TO_RF_GAIN = tuple(int((value + 20) / 140 * 100) for value in range(ZZAR_MIN, ZZAR_MAX + 1))
+RF_GAIN_TO_ZZAR = tuple(int((pct / 100) * 140 - 20) for pct in range(101))
+
+
+def thetis_to_agc(value: int) -> str:
+    """Convert a Thetis ZZGT value to the UI AGC mode."""
+    return THETIS_TO_AGC[value] if 0 <= value < len(THETIS_TO_AGC) else "MED"
+
+
+def zzar_to_rf_gain(value: int) -> int:
+    """Convert a Thetis ZZAR AGC threshold (-20 to +120) to UI RF gain (0-100%)."""
+    return ZZAR_TO_RF_GAIN[min(max(value, ZZAR_MIN), ZZAR_MAX) - ZZAR_MIN]
+
+
+def rf_gain_to_thetis(pct: int) -> int:
+    """Convert UI RF gain (0-100%) to Thetis ZZAR AGC threshold (-20 to +120)."""
+    return RF_GAIN_TO_ZZAR[min(max(int(pct), 0), 100)]
+
+
+def format_zzar(value: int) -> str:
+    """Format a Thetis ZZAR value with sign and 3 digits: +080, -020, +120."""
+    if value >= 0:
+        return f"+{value:03d}"
+    return f"{value:04d}"  # Negative sign counts as character
+
+
+class RigBatch:
+    """Ordered SET commands sent to rigctld as a single pipelined write.
+
+    Methods mirror the RigClient setters. Each step records the command
+    line and whether rigctld answers it ("RPRT n"); Thetis SET commands
+    sent via 'w' get no reply.
+    """
+
+    def __init__(self):
+        self.steps: List[Tuple[str, bool]] = []
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def set_freq(self, freq: int) -> "RigBatch":
+        self.steps.append((f"F {freq}", True))
+        return self
+
+    def set_mode(self, mode: str, passband: int = 0) -> "RigBatch":
+        self.steps.append((f"M {mode} {passband}", True))
+        return self
+
+    def set_level(self, level_name: str, value: float) -> "RigBatch":
+        self.steps.append((f"L {level_name} {value}", True))
+        return self
+
+    def set_func(self, func_name: str, enable: bool) -> "RigBatch":
+        self.steps.append((f"U {func_name} {'1' if enable else '0'}", True))
+        return self
+
+    def set_rit(self, offset: int) -> "RigBatch":
+        self.steps.append((f"J {offset}", True))
+        return self
+
+    def set_agc_thetis(self, value: int) -> "RigBatch":
+        self.steps.append((f"w ZZGT{value};", False))
+        return self
+
+    def set_rf_gain_thetis(self, value: int) -> "RigBatch":
+        self.steps.append((f"w ZZAR{format_zzar(value)};", False))
+        return self
+
+
+# Lock priorities: lower goes first (CW keying must not wait behind polling)
+PRIORITY_KEYING = 0
+PRIORITY_NORMAL = 10
+
+
+class PriorityLock:
+    """asyncio lock whose waiters are served by priority, then arrival.
+
+    `async with lock` waits at PRIORITY_NORMAL; `async with
+    lock.priority(p)` at `p`. The holder is never preempted, so a
+    high-priority waiter gets the connection after at most one
+    in-flight command.
+    """
+
+    def __init__(self):
+        self._locked = False
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def locked(self) -> bool:
+        return self._locked
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Handed the lock just as we were cancelled
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)  # Ownership passes on; stays locked
+                return
+        self._locked = False
+
+    @asynccontextmanager
+    async def priority(self, priority: int):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+# Command timeouts once a round-trip time is known: RTT * factor, within bounds
+DEFAULT_TIMEOUT = 5.0
+MIN_TIMEOUT = 1.0
+TIMEOUT_FACTOR = 10
+RTT_ALPHA = 0.2        # EWMA weight of a new sample
+# Controls marked unsupported are skipped, but re-tried every N polls
+PROBE_EVERY = 300
+OPTIONAL_CONTROLS = ("agc", "rf_gain", "power", "break_in", "rit")
+
+
+def command_key(cmd: str) -> str:
+    """RTT bucket for a command: "F 14074000" -> "F", "l STRENGTH" -> "l STRENGTH"."""
+    parts = cmd.split()
+    if parts[0] in ("l", "L", "u", "U", "p", "P") and len(parts) > 1:
+        return f"{parts[0]} {parts[1]}"
+    if parts[0] == "w" and len(parts) > 1:
+        return f"w {parts[1][:4]}"
+    return parts[0]
+
+
 class RigClient:
-    """Async client to communicate with rigctld."""
+    """Async client to communicate with rigctld.
+
+    Learns as it goes: a smoothed round-trip time per command (used to
+    size timeouts) and which optional controls the rig supports (so
+    polls skip the rest). tuning()/restore_tuning() carry both across
+    restarts (see snapshot.py).
+    """
 
     def __init__(self, host: str = "127.0.0.1", port: int = 4532):
         self.host = host
         self.port = port
         self._reader: Optional[asyncio.StreamReader] = None
         self._writer: Optional[asyncio.StreamWriter] = None
-        self._lock = asyncio.Lock()
+        self._lock = PriorityLock()
+        self.rtt: Dict[str, float] = {}            # command_key() -> seconds (EWMA)
+        self.capabilities: Dict[str, bool] = {}    # OPTIONAL_CONTROLS entry -> supported
+        self.polls = 0
 
     @property
     def connected(self) -> bool:
         return self._writer is not None and not self._writer.is_closing()
 
-    async def connect(self) -> None:
-        """Connect to rigctld."""
-        self._reader, self._writer = await asyncio.open_connection(
-            self.host, self.port
+    async def connect(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Connect to rigctld.
+
+        Args:
+            host: Address to connect to (default: self.host)
+            port: Port to connect to (default: self.port)
+            timeout: Connect timeout in seconds (default: no timeout)
+        """
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(host or self.host, port or self.port),
+            timeout=timeout,
         )
 
+    def record_rtt(self, key: str, seconds: float) -> None:
+        previous = self.rtt.get(key)
+        self.rtt[key] = seconds if previous is None else previous + RTT_ALPHA * (seconds - previous)
+
+    def timeout_for(self, key: str) -> float:
+        """Timeout for a command: a multiple of its RTT once one is known."""
+        rtt = self.rtt.get(key)
+        if rtt is None:
+            return DEFAULT_TIMEOUT
+        return min(DEFAULT_TIMEOUT, max(MIN_TIMEOUT, rtt * TIMEOUT_FACTOR))
+
+    def tuning(self) -> dict:
+        """Learned RTTs and capabilities, for saving."""
+        return {"rtt": dict(self.rtt), "capabilities": dict(self.capabilities)}
+
+    def restore_tuning(self, tuning: dict) -> None:
+        """Start from saved RTTs and capabilities instead of cold defaults."""
+        self.rtt.update({
+            key: float(value) for key, value in (tuning.get("rtt") or {}).items()
+            if isinstance(value, (int, float)) and value > 0
+        })
+        self.capabilities.update({
+            name: bool(value) for name, value in (tuning.get("capabilities") or {}).items()
+            if name in OPTIONAL_CONTROLS
+        })
+
     async def disconnect(self) -> None:
         """Disconnect from rigctld."""
         if self._writer:
@@ -59,12 +283,15 @@ class RigClient:
             self._writer = None
             self._reader = None
 
-    async def _send_command(self, cmd: str, timeout: float = 5.0) -> str:
+    async def _send_command(
+        self, cmd: str, timeout: Optional[float] = None, priority: int = PRIORITY_NORMAL,
+    ) -> str:
         """Send command and return response.
 
         Args:
             cmd: Command to send
-            timeout: Timeout in seconds (default: 5.0)
+            timeout: Timeout in seconds (default: from the command's RTT)
+            priority: Place in the queue for the connection (see PriorityLock)
 
         Raises:
             ConnectionError: If not connected
@@ -73,28 +300,34 @@ class RigClient:
         if not self.connected:
             raise ConnectionError("Not connected to rigctld")
 
-        async with self._lock:
+        key = command_key(cmd)
+        if timeout is None:
+            timeout = self.timeout_for(key)
+
+        async with self._lock.priority(priority):
             cmd_bytes = f"{cmd}\n".encode()
-            logger.debug(f"→ rigctld: {cmd}")
+            logger.debug("→ rigctld: %s", cmd)
 
             try:
+                started = time.monotonic()
                 self._writer.write(cmd_bytes)
                 await asyncio.wait_for(self._writer.drain(), timeout=timeout)
                 response = await asyncio.wait_for(self._reader.readline(), timeout=timeout)
+                self.record_rtt(key, time.monotonic() - started)
                 response_str = response.decode().strip()
-                logger.debug(f"← rigctld: {response_str}")
+                logger.debug("← rigctld: %s", response_str)
 
                 # Log length for debugging
                 if len(response) != len(response_str) + 1:  # +1 for newline
-                    logger.warning(f"Response length mismatch: raw={len(response)} stripped={len(response_str)}")
+                    logger.warning("Response length mismatch: raw=%d stripped=%d", len(response), len(response_str))
 
                 return response_str
             except asyncio.TimeoutError:
-                logger.error(f"Timeout waiting for rigctld response to command: {cmd}")
+                logger.error("Timeout waiting for rigctld response to command: %s", cmd)
                 # Try to read any pending data to prevent buffer pollution
                 try:
                     pending = await asyncio.wait_for(self._reader.read(1024), timeout=0.1)
-                    logger.warning(f"Found pending data after timeout: {pending}")
+                    logger.warning("Found pending data after timeout: %r", pending)
                 except:
                     pass
                 raise
@@ -107,7 +340,7 @@ class RigClient:
         response = await self._send_command("f")
         return int(response)
 
-    async def get_mode(self, timeout: float = 5.0) -> Tuple[str, int]:
+    async def get_mode(self, timeout: Optional[float] = None) -> Tuple[str, int]:
         """Get current mode and passband width.
 
         rigctld command: m
@@ -115,14 +348,18 @@ class RigClient:
         Note: Uses direct I/O instead of _send_command for multi-line response
 
         Args:
-            timeout: Timeout in seconds (default: 5.0)
+            timeout: Timeout in seconds (default: from the command's RTT)
         """
+        if timeout is None:
+            timeout = self.timeout_for("m")
         async with self._lock:
             try:
+                started = time.monotonic()
                 self._writer.write(b"m\n")
                 await asyncio.wait_for(self._writer.drain(), timeout=timeout)
                 mode_line = await asyncio.wait_for(self._reader.readline(), timeout=timeout)
                 width_line = await asyncio.wait_for(self._reader.readline(), timeout=timeout)
+                self.record_rtt("m", time.monotonic() - started)
                 mode = mode_line.decode().strip()
                 width = int(width_line.decode().strip())
                 return mode, width
@@ -176,6 +413,8 @@ class RigClient:
         Returns: "1" if enabled, "0" if disabled
         """
         response = await self._send_command(f"u {func_name}")
+        if response.startswith("RPRT"):
+            raise ValueError(f"u {func_name} failed: {response}")
         return response == "1"
 
     async def get_parm(self, parm_name: str) -> int:
@@ -238,7 +477,32 @@ class RigClient:
         response = await self._send_command(f"J {offset}")
         return response == "RPRT 0"
 
-    async def send_raw_command(self, cmd: str, timeout: float = 5.0) -> str:
+    async def send_morse(self, text: str) -> bool:
+        """Queue CW text in the rig's keyer, ahead of polling. Returns True on success.
+
+        rigctld command: b <text>
+        Response: RPRT 0 once the rig accepted the text
+        """
+        response = await self._send_command(f"b {text}", priority=PRIORITY_KEYING)
+        return response == "RPRT 0"
+
+    async def stop_morse(self) -> bool:
+        """Abort CW being sent. Returns True on success.
+
+        rigctld command: \\stop_morse
+        """
+        response = await self._send_command("\\stop_morse", priority=PRIORITY_KEYING)
+        return response == "RPRT 0"
+
+    async def set_keyer_speed(self, wpm: int) -> bool:
+        """Set the keyer speed in WPM. Returns True on success.
+
+        rigctld command: L KEYSPD <wpm>
+        """
+        response = await self._send_command(f"L KEYSPD {wpm}", priority=PRIORITY_KEYING)
+        return response == "RPRT 0"
+
+    async def send_raw_command(self, cmd: str, timeout: Optional[float] = None) -> str:
         """Send raw command to rig via rigctld 'w' (write_cmd).
 
         For sending native rig commands (like Thetis ZZGT, Kenwood GT, etc)
@@ -249,7 +513,7 @@ class RigClient:
 
         Args:
             cmd: Native rig command (e.g. "ZZGT;" for Thetis)
-            timeout: Timeout in seconds (default: 5.0)
+            timeout: Timeout in seconds (default: from the command's RTT)
 
         Note: Commands sent via 'w' return responses terminated with '\x00' (null byte)
               instead of '\n' (newline), so we must use readuntil(b';') instead of readline()
@@ -257,12 +521,17 @@ class RigClient:
         if not self.connected:
             raise ConnectionError("Not connected to rigctld")
 
+        key = command_key(f"w {cmd}")
+        if timeout is None:
+            timeout = self.timeout_for(key)
+
         async with self._lock:
             cmd_full = f"w {cmd}\n"
             cmd_bytes = cmd_full.encode()
-            logger.debug(f"→ rigctld: w {cmd}")
+            logger.debug("→ rigctld: w %s", cmd)
 
             try:
+                started = time.monotonic()
                 self._writer.write(cmd_bytes)
                 await asyncio.wait_for(self._writer.drain(), timeout=timeout)
 
@@ -272,17 +541,92 @@ class RigClient:
                     timeout=timeout
                 )
 
+                self.record_rtt(key, time.monotonic() - started)
+
                 # Read the trailing null byte
                 await asyncio.wait_for(self._reader.read(1), timeout=0.1)
 
                 response_str = response.decode().strip()
-                logger.debug(f"← rigctld: {response_str}")
+                logger.debug("← rigctld: %s", response_str)
 
                 return response_str
             except asyncio.TimeoutError:
-                logger.error(f"Timeout waiting for rigctld response to command: w {cmd}")
+                logger.error("Timeout waiting for rigctld response to command: w %s", cmd)
                 raise
 
+    async def execute_batch(self, batch: RigBatch, timeout: float = 5.0) -> List[bool]:
+        """Send all batch steps in one write, then read the replies in order.
+
+        The whole batch costs roughly one round-trip instead of one per
+        command. The lock is held throughout, so polling can't interleave.
+
+        Args:
+            batch: Steps to send
+            timeout: Overall timeout in seconds for writing and all replies
+
+        Returns: Per-step success (steps without a reply count as success)
+
+        Raises:
+            ConnectionError: If not connected
+            asyncio.TimeoutError: If rigctld doesn't answer every step in time.
+                The late replies are read off (for up to `timeout` more)
+                so later commands get their own; if they don't come, the
+                connection is dropped for the supervisor to re-establish.
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected to rigctld")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        expected = sum(1 for _, expects_reply in batch.steps if expects_reply)
+
+        async with self._lock:
+            payload = "".join(f"{line}\n" for line, _ in batch.steps)
+            logger.debug("→ rigctld (batch of %d): %r", len(batch), payload)
+
+            unread = None  # Unknown until the whole batch is written
+            try:
+                self._writer.write(payload.encode())
+                await asyncio.wait_for(self._writer.drain(), timeout=timeout)
+
+                unread = expected
+                results = []
+                for line, expects_reply in batch.steps:
+                    if not expects_reply:
+                        results.append(True)
+                        continue
+                    response = await asyncio.wait_for(
+                        self._reader.readline(), timeout=max(0.0, deadline - loop.time())
+                    )
+                    unread -= 1
+                    results.append(response.decode().strip() == "RPRT 0")
+                logger.debug("← rigctld (batch): %s", results)
+                return results
+            except asyncio.TimeoutError:
+                logger.error("Timeout waiting for rigctld replies to batch of %d", len(batch))
+                await self._resync(unread, timeout)
+                raise
+
+    async def _resync(self, unread: Optional[int], grace: float) -> None:
+        """Read `unread` late replies off the stream, or drop the connection.
+
+        Called with the lock held. unread=None means the write itself
+        didn't finish, so there is no telling what rigctld got.
+        """
+        try:
+            if unread is None:
+                raise ConnectionError("batch write timed out")
+            for _ in range(unread):
+                await asyncio.wait_for(self._reader.readline(), timeout=grace)
+            logger.warning("Resynced with rigctld after %d late replies", unread)
+        except (asyncio.TimeoutError, ConnectionError, OSError) as e:
+            logger.error("rigctld stream out of sync (%s), dropping the connection", str(e) or type(e).__name__)
+            try:
+                await self.disconnect()
+            except OSError:
+                self._writer = None
+                self._reader = None
+
     async def get_agc_thetis(self) -> int:
         """Get AGC using Thetis native ZZGT command.
 
@@ -308,7 +652,7 @@ class RigClient:
 
         async with self._lock:
             cmd = f"w ZZGT{value};\n"
-            logger.debug(f"→ rigctld: w ZZGT{value};")
+            logger.debug("→ rigctld: w ZZGT%d;", value)
             self._writer.write(cmd.encode())
             await self._writer.drain()
             # No response expected from SET commands
@@ -335,11 +679,7 @@ class RigClient:
 
         Returns: True (always - SET commands don't return responses via rigctld 'w')
         """
-        # Format with sign and 3 digits: +080, -020, +120
-        if value >= 0:
-            value_str = f"+{value:03d}"
-        else:
-            value_str = f"{value:04d}"  # Negative sign counts as character
+        value_str = format_zzar(value)
 
         # SET commands via rigctld 'w' don't return responses, just send and assume success
         if not self.connected:
@@ -347,92 +687,81 @@ class RigClient:
 
         async with self._lock:
             cmd = f"w ZZAR{value_str};\n"
-            logger.debug(f"→ rigctld: w ZZAR{value_str};")
+            logger.debug("→ rigctld: w ZZAR%s;", value_str)
             self._writer.write(cmd.encode())
             await self._writer.drain()
             # No response expected from SET commands
             return True
 
-    async def get_state(self) -> dict:
+    async def get_state(self, state: Optional[RadioState] = None) -> RadioState:
         """Get full radio state with extended controls.
 
         Uses try/except for each command to handle unsupported features gracefully.
-        If a command fails, a default value is used instead.
+        If a command fails, a default value is used instead. Optional controls
+        the rig rejected are skipped until the next probe (see PROBE_EVERY).
+
+        Args:
+            state: RadioState to update in place (a new one if omitted)
+
+        Returns: The updated state; its version only changes if a value did
         """
-        state = {}
+        if state is None:
+            state = RadioState()
+        self.polls += 1
 
         # Core controls (required)
         try:
-            state["freq"] = await self.get_freq()
+            freq = await self.get_freq()
         except Exception as e:
-            logger.warning(f"Failed to get frequency: {e}")
-            state["freq"] = 0
+            logger.warning("Failed to get frequency: %s", e)
+            freq = DEFAULTS["freq"]
 
         try:
             mode, width = await self.get_mode()
-            state["mode"] = mode
-            state["filter_width"] = width
         except Exception as e:
-            logger.warning(f"Failed to get mode: {e}")
-            state["mode"] = "USB"
-            state["filter_width"] = 2400
+            logger.warning("Failed to get mode: %s", e)
+            mode, width = DEFAULTS["mode"], DEFAULTS["filter_width"]
 
         try:
-            state["smeter"] = await self.get_smeter()
+            smeter = await self.get_smeter()
         except Exception as e:
-            logger.warning(f"Failed to get S-meter: {e}")
-            state["smeter"] = -100
+            logger.warning("Failed to get S-meter: %s", e)
+            smeter = DEFAULTS["smeter"]
 
         # Extended controls (optional - use defaults if not supported)
         # Execute Thetis commands FIRST to avoid mixing with standard commands
-        try:
-            # Use Thetis native ZZGT command instead of hamlib l AGC
-            # Thetis values: 0=Fixed, 1=Long, 2=Slow, 3=Med, 4=Fast, 5=Custom
-            agc_value = await self.get_agc_thetis()
-            logger.debug(f"AGC from Thetis ZZGT: {agc_value}")
-            # Map Thetis values to UI strings
-            agc_map = {
-                0: "OFF",   # Fixed
-                1: "SLOW",  # Long (map to SLOW)
-                2: "SLOW",  # Slow
-                3: "MED",   # Med
-                4: "FAST",  # Fast
-                5: "MED"    # Custom (map to MED)
-            }
-            state["agc"] = agc_map.get(agc_value, "MED")
-        except Exception as e:
-            logger.debug(f"AGC not supported: {e}")
-            state["agc"] = "MED"
-
-        try:
-            # Use Thetis native ZZAR (AGC Threshold) command
-            # Thetis range: -20 to +120
-            # UI range: 0% to 100%
-            rf_gain_thetis = await self.get_rf_gain_thetis()
-            logger.debug(f"RF Gain from Thetis ZZAR: {rf_gain_thetis}")
-            # Convert Thetis range (-20 to +120) to percentage (0-100)
-            state["rf_gain"] = int((rf_gain_thetis + 20) / 140 * 100)
-        except Exception as e:
-            logger.debug(f"RFGAIN not supported: {e}")
-            state["rf_gain"] = 80
-
-        try:
-            power = await self.get_level("RFPOWER")
-            state["power"] = int(power * 100)
-        except Exception as e:
-            logger.debug(f"RFPOWER not supported: {e}")
-            state["power"] = 50
+        # Thetis native ZZGT / ZZAR (AGC threshold) instead of hamlib l AGC / RFGAIN
+        agc = await self._poll_optional("agc", self.get_agc_thetis, thetis_to_agc)
+        rf_gain = await self._poll_optional("rf_gain", self.get_rf_gain_thetis, zzar_to_rf_gain)
+        power = await self._poll_optional("power", partial(self.get_level, "RFPOWER"), lambda v: int(v * 100))
+        break_in = await self._poll_optional("break_in", partial(self.get_func, "BKIN"), bool)
+        rit = await self._poll_optional("rit", self.get_rit, int)
+
+        # One update, so the state never shows a half-polled mix
+        state.update(
+            freq=freq, mode=mode, filter_width=width, smeter=smeter, agc=agc,
+            rf_gain=rf_gain, power=power, break_in=break_in, rit=rit,
+        )
+        return state
 
-        try:
-            state["break_in"] = await self.get_func("BKIN")
-        except Exception as e:
-            logger.debug(f"BKIN not supported: {e}")
-            state["break_in"] = False
+    async def _poll_optional(self, name: str, fetch: Callable[[], Awaitable], convert: Callable):
+        """Read an optional control, tracking whether the rig supports it.
 
+        A rejected command marks the control unsupported; a timeout or a
+        connection error doesn't (the link may just be slow or gone). Unsupported controls read as their
+        default without asking the rig, except on every PROBE_EVERY-th poll.
+        """
+        if self.capabilities.get(name) is False and self.polls % PROBE_EVERY:
+            return DEFAULTS[name]
         try:
-            state["rit"] = await self.get_rit()
+            value = convert(await fetch())
+        except (asyncio.TimeoutError, OSError) as e:
+            logger.debug("%s failed: %r", name, e)
+            return DEFAULTS[name]
         except Exception as e:
-            logger.debug(f"RIT not supported: {e}")
-            state["rit"] = 0
-
-        return state
+            if self.capabilities.get(name) is not False:
+                logger.debug("%s not supported: %s", name, e)
+            self.capabilities[name] = False
+            return DEFAULTS[name]
+        self.capabilities[name] = True
+        return value
@@ -0,0 +1,237 @@
+"""Connection supervisor for RigClient.
+
+Keeps the rigctld link up in the background so the poller never blocks on
+DNS lookups or TCP connect timeouts:
+
+- Connection attempts run in their own task with capped exponential backoff
+  and jitter between failed passes.
+- DNS results are cached (with TTL) so a slow resolver for e.g. "yaesu.lan"
+  is only hit once in a while, not on every attempt.
+- An ordered list of endpoints is tried on each pass: the primary rigctld
+  first, then the fallbacks.
+- Every link state change is reported through a callback, so the server can
+  tell clients when the displayed data is stale.
+"""
+
+import asyncio
+import logging
+import random
+import socket
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rig_client import RigClient
+
+logger = logging.getLogger(__name__)
+
+
+# Link states reported to clients
+LINK_CONNECTING = "connecting"
+LINK_CONNECTED = "connected"
+LINK_BACKOFF = "backoff"
+LINK_DISCONNECTED = "disconnected"
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """A rigctld endpoint (host may be a DNS name or an IP literal)."""
+
+    host: str
+    port: int = 4532
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def endpoints_from_config(rigctld_config: dict) -> List[Endpoint]:
+    """Build the ordered endpoint list from the `rigctld` config section.
+
+    The primary host/port comes first, followed by `fallback` entries.
+    """
+    endpoints = [Endpoint(rigctld_config["host"], int(rigctld_config["port"]))]
+    for entry in rigctld_config.get("fallback") or []:
+        endpoints.append(Endpoint(entry["host"], int(entry.get("port", 4532))))
+    return endpoints
+
+
+class DNSCache:
+    """TTL cache in front of the loop's getaddrinfo.
+
+    If a refresh fails but a stale entry exists, the stale address is used:
+    a flaky local resolver should not take the rig link down with it.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[str, float]] = {}
+
+    async def resolve(self, host: str, port: int) -> str:
+        """Return an IP address for host, using the cache when fresh."""
+        key = (host, port)
+        cached = self._entries.get(key)
+        now = time.monotonic()
+        if cached and now - cached[1] < self.ttl:
+            return cached[0]
+
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            if cached:
+                logger.warning("DNS lookup for %s failed, using cached %s", host, cached[0])
+                return cached[0]
+            raise
+
+        address = infos[0][4][0]
+        self._entries[key] = (address, now)
+        return address
+
+    def invalidate(self, host: str, port: int) -> None:
+        """Drop a cached entry (e.g. after connecting to it failed)."""
+        self._entries.pop((host, port), None)
+
+
+class RigSupervisor:
+    """Keeps a RigClient connected, trying endpoints in order with backoff."""
+
+    def __init__(
+        self,
+        client: RigClient,
+        endpoints: List[Endpoint],
+        on_change: Optional[Callable[[dict], Awaitable[None]]] = None,
+        connect_timeout: float = 3.0,
+        backoff_initial: float = 0.25,
+        backoff_max: float = 10.0,
+        jitter: float = 0.2,
+        dns_ttl: float = 300.0,
+    ):
+        if not endpoints:
+            raise ValueError("At least one rigctld endpoint is required")
+        self.client = client
+        self.endpoints = endpoints
+        self.on_change = on_change
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.dns = DNSCache(ttl=dns_ttl)
+
+        self.state = LINK_DISCONNECTED
+        self.endpoint: Optional[Endpoint] = None
+        self.attempt = 0
+        self.retry_in: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(
+        cls,
+        client: RigClient,
+        rigctld_config: dict,
+        on_change: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ) -> "RigSupervisor":
+        """Create a supervisor from the `rigctld` config section."""
+        backoff = rigctld_config.get("backoff") or {}
+        return cls(
+            client,
+            endpoints_from_config(rigctld_config),
+            on_change=on_change,
+            connect_timeout=rigctld_config.get("connect_timeout_s", 3.0),
+            backoff_initial=backoff.get("initial_ms", 250) / 1000,
+            backoff_max=backoff.get("max_ms", 10000) / 1000,
+            jitter=backoff.get("jitter", 0.2),
+            dns_ttl=rigctld_config.get("dns_ttl_s", 300),
+        )
+
+    def status(self) -> dict:
+        """Link status message, as sent to WebSocket clients."""
+        return {
+            "type": "link",
+            "state": self.state,
+            "endpoint": str(self.endpoint) if self.endpoint else None,
+            "attempt": self.attempt,
+            "retry_in_ms": int(self.retry_in * 1000) if self.retry_in is not None else None,
+            "error": self.last_error,
+        }
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Delay before pass number `attempt` (1-based), capped and jittered."""
+        delay = min(self.backoff_max, self.backoff_initial * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, min(self.backoff_max, delay))
+
+    def start(self) -> None:
+        """Start the background connect task (connects immediately)."""
+        if self._task is None:
+            self._wake.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the supervisor and close the rig connection."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client.connected:
+            await self.client.disconnect()
+
+    def connection_lost(self, error: Optional[str] = None) -> None:
+        """Tell the supervisor the link dropped. Safe to call repeatedly."""
+        if error:
+            self.last_error = error
+        self._wake.set()
+
+    async def _set_state(self, state: str) -> None:
+        self.state = state
+        if self.on_change:
+            try:
+                await self.on_change(self.status())
+            except Exception as e:
+                logger.debug("Link state callback failed: %s", e)
+
+    async def _try_endpoints(self) -> bool:
+        """Try each endpoint once, in order. Returns True once connected."""
+        for endpoint in self.endpoints:
+            self.endpoint = endpoint
+            try:
+                address = await self.dns.resolve(endpoint.host, endpoint.port)
+                await self.client.connect(address, endpoint.port, timeout=self.connect_timeout)
+                return True
+            except (OSError, asyncio.TimeoutError) as e:
+                self.last_error = f"{endpoint}: {str(e) or type(e).__name__}"
+                self.dns.invalidate(endpoint.host, endpoint.port)
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self.client.connected:
+                continue
+
+            self.attempt = 0
+            while True:
+                self.attempt += 1
+                self.retry_in = None
+                await self._set_state(LINK_CONNECTING)
+                if await self._try_endpoints():
+                    logger.info("Connected to rigctld at %s", self.endpoint)
+                    self.attempt = 0
+                    self.last_error = None
+                    await self._set_state(LINK_CONNECTED)
+                    break
+
+                self.retry_in = self.backoff_delay(self.attempt)
+                if self.attempt % 10 == 1:  # Log every 10 passes
+                    logger.warning("Cannot connect to rigctld (attempt %d): %s", self.attempt, self.last_error)
+                await self._set_state(LINK_BACKOFF)
+                await asyncio.sleep(self.retry_in)
+            # Drop wake-ups raised while we were still connecting
+            self._wake.clear()
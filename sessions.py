@@ -0,0 +1,78 @@
+"""Per-client WebSocket send queues.
+
+Broadcasting used to await each client's send in turn, so one slow
+client delayed everyone, including the poll loop. Now each ClientSession
+has a bounded queue drained by its own sender task. Broadcasting is a
+non-blocking enqueue. When a client falls `max_backlog` messages behind,
+its oldest messages are dropped; the next full state makes up for them.
+The queue depth is that client's backlog, reported by /healthz.
+"""
+
+import asyncio
+import logging
+from typing import Optional, Set, Union
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+
+class ClientSession:
+    """A connected WebSocket client with a bounded outgoing queue."""
+
+    def __init__(self, websocket: WebSocket, max_backlog: int = 50):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_backlog)
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self.events: Optional[Set[str]] = None  # Subscribed trigger rules (empty = all)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+    def send(self, message: Union[dict, str]) -> None:
+        """Queue a message without blocking, dropping the oldest when full."""
+        if self.closed:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def wants_event(self, rule: str) -> bool:
+        return self.events is not None and (not self.events or rule in self.events)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        self.closed = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                message = await self.queue.get()
+                if isinstance(message, str):
+                    await self.websocket.send_text(message)  # Pre-encoded (shared by all clients)
+                else:
+                    await self.websocket.send_json(message)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug("Client send failed: %s", e)
+            self.closed = True
+
+    def stats(self) -> dict:
+        return {"backlog": self.backlog, "sent": self.sent, "dropped": self.dropped}
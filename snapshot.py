@@ -0,0 +1,142 @@
+"""Last-known rig state and link tuning, persisted across restarts.
+
+Without it, a restarted server has nothing to show until the first
+successful poll, and the poller starts with cold defaults (5 s timeouts,
+probing every optional control). The snapshot holds the last polled
+state plus the rig client's learned round-trip times and capabilities
+(RigClient.tuning()):
+
+    {"format": 1, "saved": <unix time>, "state": {...}, "state_ts": ..,
+     "rig": {"rtt": {...}, "capabilities": {...}}}
+
+It is written atomically: to a temporary file in the same directory,
+fsynced, then renamed over the old one, so a crash mid-write leaves the
+previous snapshot intact. At startup the state is loaded with
+RadioState.restore(), which flags it stale until the first poll.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from radio_state import FIELDS, RadioState
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1
+
+
+def snapshot_data(state: RadioState, tuning: dict) -> dict:
+    """Copy what gets saved (on the event loop, so the poller can't change it mid-write)."""
+    return {
+        "format": FORMAT,
+        "saved": time.time(),
+        "state": {name: getattr(state, name) for name in FIELDS},
+        "state_ts": state.updated,
+        "rig": tuning,
+    }
+
+
+def write_snapshot(path: Union[str, Path], data: dict) -> None:
+    """Atomically replace the snapshot at `path`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def load_snapshot(path: Union[str, Path]) -> Optional[dict]:
+    """Read a snapshot; None if missing, unreadable or another format."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable snapshot %s: %s", path, e)
+        return None
+    if not isinstance(data, dict) or data.get("format") != FORMAT or not isinstance(data.get("state"), dict):
+        logger.warning("Ignoring snapshot %s: unknown format", path)
+        return None
+    return data
+
+
+class SnapshotWriter:
+    """Saves the state at most every `interval` seconds, and only when it changed."""
+
+    def __init__(self, path: Union[str, Path], interval: float = 10.0):
+        self.path = Path(path)
+        self.interval = interval
+        self.saved_version = None
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def from_config(cls, base_dir: Path, snapshot_config: dict) -> "SnapshotWriter":
+        return cls(
+            base_dir / snapshot_config.get("path", "data/snapshot.json"),
+            interval=snapshot_config.get("interval_s", 10.0),
+        )
+
+    def load(self, state: RadioState, rig_client=None) -> bool:
+        """Restore a saved state (flagged stale) and rig tuning. Returns True if found."""
+        data = load_snapshot(self.path)
+        if data is None:
+            return False
+        state.restore(data["state"], data.get("state_ts") or data.get("saved", 0.0))
+        if rig_client is not None and isinstance(data.get("rig"), dict):
+            rig_client.restore_tuning(data["rig"])
+        self.saved_version = state.version
+        logger.info("Restored state from %s (saved %.0f s ago)", self.path, time.time() - data.get("saved", 0))
+        return True
+
+    def save_due(self, state: RadioState) -> bool:
+        return (
+            not state.stale
+            and state.version != self.saved_version
+            and time.monotonic() - self._last_save >= self.interval
+        )
+
+    async def save_if_due(self, state: RadioState, rig_client) -> None:
+        """Save on a worker thread when due (poll loop hook)."""
+        if self.save_due(state):
+            data = snapshot_data(state, rig_client.tuning())
+            self.saved_version = state.version
+            self._last_save = time.monotonic()
+            write = asyncio.ensure_future(asyncio.to_thread(write_snapshot, self.path, data))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                await write  # Finish before the shutdown save writes the same file
+                raise
+
+    def save(self, state: RadioState, rig_client) -> None:
+        """Save now (at shutdown) unless there is nothing new since the last save."""
+        if state.stale or not state.version or state.version == self.saved_version:
+            return
+        write_snapshot(self.path, snapshot_data(state, rig_client.tuning()))
+        self.saved_version = state.version
+        self._last_save = time.monotonic()
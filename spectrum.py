@@ -0,0 +1,204 @@
+"""Server-side spectrum/waterfall rows computed from the RX audio feed.
+
+SpectrumEngine taps the AudioHub PCM stream and computes windowed,
+overlapping FFTs with NumPy, several frames per call (one rfft over a 2-D
+sliding-window view). Rows are converted to dBFS and quantized to uint8
+for the whole batch at once, then cropped to the span around the current
+filter width.
+
+A batch spans 1 / max_fps of audio and becomes one published row
+(max-hold over its frames, so short signals aren't lost): rows go out at
+max_fps and no computed frame is thrown away. `batch_rows` and `overlap`
+are minimums; both are raised as needed to fill the row period. Nothing
+is computed while nobody is subscribed.
+
+The computation is shared. Each subscriber only costs a rate check, plus
+max-pooling the row down to its requested number of bins. That result is
+cached per bin count, so clients with the same resolution share it too.
+
+Binary row layout (little endian), followed by `bins` uint8 values:
+    version u8 | flags u8 | bins u16 | seq u32 | low_hz f32 | high_hz f32
+"""
+
+import asyncio
+import logging
+import math
+import struct
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+
+ROW_HEADER = struct.Struct("<BBHIff")
+ROW_VERSION = 1
+
+# Slowest row rate a client can ask for (also keeps fps positive)
+MIN_FPS = 0.5
+
+
+@dataclass(eq=False)
+class SpectrumSubscription:
+    """A client's rate/resolution limits and bounded row queue."""
+
+    fps: float
+    bins: int
+    queue: asyncio.Queue
+    last_sent: float = 0.0
+    dropped: int = 0
+
+    def push(self, row: bytes) -> None:
+        """Enqueue a row, dropping the oldest one when full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(row)
+
+
+def pool_bins(row: np.ndarray, bins: int) -> np.ndarray:
+    """Max-pool a row down to `bins` values (peaks stay visible)."""
+    if bins >= len(row):
+        return row
+    edges = np.linspace(0, len(row), bins + 1).astype(np.intp)[:-1]
+    return np.maximum.reduceat(row, edges)
+
+
+class SpectrumEngine:
+    """Batched FFT rows from PCM, fanned out to rate-limited subscribers."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        fft_size: int = 1024,
+        overlap: float = 0.5,
+        batch_rows: int = 4,
+        db_floor: float = -120.0,
+        db_ceiling: float = 0.0,
+        max_fps: float = 10.0,
+        max_bins: int = 512,
+        buffer_rows: int = 4,
+    ):
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        # One batch per row period, hop no longer than `overlap` allows
+        period = sample_rate / max_fps
+        self.batch_rows = max(batch_rows, math.ceil(period / max(1, int(fft_size * (1 - overlap)))))
+        self.hop = max(1, int(period // self.batch_rows))
+        self.batch_s = self.batch_rows * self.hop / sample_rate
+        self.db_floor = db_floor
+        self.db_ceiling = db_ceiling
+        self.max_fps = max_fps
+        self.max_bins = max_bins
+        self.buffer_rows = buffer_rows
+
+        self.window = np.hanning(fft_size).astype(np.float32)
+        # Full-scale sine -> 0 dBFS
+        self._amplitude_scale = 2.0 / self.window.sum()
+        self.bin_hz = sample_rate / fft_size
+        self.span_hz = sample_rate / 2
+
+        self.subscribers: List[SpectrumSubscription] = []
+        self.seq = 0
+        self.rows_computed = 0
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+    @classmethod
+    def from_config(cls, sample_rate: int, spectrum_config: dict) -> "SpectrumEngine":
+        return cls(
+            sample_rate,
+            fft_size=spectrum_config.get("fft_size", 1024),
+            overlap=spectrum_config.get("overlap", 0.5),
+            batch_rows=spectrum_config.get("batch_rows", 4),
+            db_floor=spectrum_config.get("db_floor", -120.0),
+            db_ceiling=spectrum_config.get("db_ceiling", 0.0),
+            max_fps=spectrum_config.get("max_fps", 10.0),
+            max_bins=spectrum_config.get("max_bins", 512),
+        )
+
+    def subscribe(self, fps: Optional[float] = None, bins: Optional[int] = None) -> SpectrumSubscription:
+        """Add a subscriber; fps and bins are clamped to the configured limits."""
+        fps = max(MIN_FPS, min(fps or self.max_fps, self.max_fps))
+        bins = max(16, min(int(bins or self.max_bins), self.max_bins))
+        subscription = SpectrumSubscription(fps, bins, asyncio.Queue(maxsize=self.buffer_rows))
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SpectrumSubscription) -> None:
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+
+    def set_span(self, span_hz: float) -> None:
+        """Limit rows to 0..span_hz of the audio passband (capped at Nyquist)."""
+        self.span_hz = max(self.bin_hz * 16, min(span_hz, self.sample_rate / 2))
+
+    def compute(self, samples: np.ndarray) -> np.ndarray:
+        """FFT every full window in `samples` (float32, -1..1) in one batch.
+
+        Returns: uint8 rows, shape (n_rows, fft_size // 2 + 1)
+        """
+        frames = sliding_window_view(samples, self.fft_size)[::self.hop]
+        spectra = np.abs(np.fft.rfft(frames * self.window, axis=1)) * self._amplitude_scale
+        db = 20.0 * np.log10(np.maximum(spectra, 1e-12))
+        scale = 255.0 / (self.db_ceiling - self.db_floor)
+        return np.clip((db - self.db_floor) * scale, 0, 255).astype(np.uint8)
+
+    def feed(self, pcm: bytes) -> None:
+        """AudioHub tap: buffer s16le PCM, compute rows once a batch is ready."""
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        buffer = np.concatenate((self._buffer, samples))
+        if not self.subscribers:
+            self._buffer = buffer[-self.fft_size:]  # Nobody to send rows to
+            return
+        n_rows = (len(buffer) - self.fft_size) // self.hop + 1
+        if n_rows < self.batch_rows:
+            self._buffer = buffer
+            return
+
+        rows = self.compute(buffer[:(n_rows - 1) * self.hop + self.fft_size])
+        self._buffer = buffer[n_rows * self.hop:]
+        self.rows_computed += len(rows)
+        self.publish(rows)
+
+    def publish(self, rows: np.ndarray) -> None:
+        """Send a batch as one row to subscribers whose rate limit allows it."""
+        if not self.subscribers:
+            return
+        now = time.monotonic()
+        # Half a batch of slack: audio arrives in chunks, so batch completion
+        # jitters and a strict interval would skip every other batch
+        slack = self.batch_s / 2
+        due = [s for s in self.subscribers if now - s.last_sent >= 1.0 / s.fps - slack]
+        if not due:
+            return
+
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        span_bins = min(rows.shape[1], int(np.ceil(self.span_hz / self.bin_hz)) + 1)
+        row = rows[:, :span_bins].max(axis=0)
+        high_hz = (span_bins - 1) * self.bin_hz
+
+        frames: Dict[int, bytes] = {}
+        for subscription in due:
+            frame = frames.get(subscription.bins)
+            if frame is None:
+                pooled = pool_bins(row, subscription.bins)
+                frame = ROW_HEADER.pack(ROW_VERSION, 0, len(pooled), self.seq, 0.0, high_hz) + pooled.tobytes()
+                frames[subscription.bins] = frame
+            subscription.push(frame)
+            subscription.last_sent = now
+
+
+def parse_row(frame: bytes) -> dict:
+    """Decode a binary spectrum row (used by tests and benchmarks)."""
+    version, flags, bins, seq, low_hz, high_hz = ROW_HEADER.unpack_from(frame)
+    return {
+        "version": version,
+        "bins": bins,
+        "seq": seq,
+        "low_hz": low_hz,
+        "high_hz": high_hz,
+        "values": np.frombuffer(frame, dtype=np.uint8, offset=ROW_HEADER.size),
+    }
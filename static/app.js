@@ -1,3 +1,16 @@
+// G.711 mu-law -> float sample lookup for the audio stream
+const ULAW_TABLE = (() => {
+    const table = new Float32Array(256);
+    for (let i = 0; i < 256; i++) {
+        const u = ~i & 0xff;
+        const exponent = (u >> 4) & 0x07;
+        const magnitude = (((u & 0x0f) << 3) + 0x84) << exponent;
+        const sample = (u & 0x80) ? 0x84 - magnitude : magnitude - 0x84;
+        table[i] = sample / 32768;
+    }
+    return table;
+})();
+
 function radioApp() {
     return {
         // State
@@ -11,11 +24,29 @@ function radioApp() {
             agc: 'MED',
             break_in: false,
             rit: 0,
+            channel: null,  // Nearest memory channel { name, freq, mode, offset }
         },
         connectionStatus: 'disconnected',
+        stale: false,  // Showing the server's saved snapshot, not a fresh poll
+        cw: { text: '', wpm: 20, status: '' },
+        alerts: {},  // Active trigger rules: name -> last `event` message
+        audio: { enabled: false, ws: null, ctx: null, node: null },
+        waterfall: { enabled: false, ws: null, highHz: 0 },
+        link: { state: 'disconnected', endpoint: null, retry_in_ms: null },
         step: 1000,
         ws: null,
 
+        // Rendering: messages are merged into one patch per animation frame
+        pendingPatch: null,
+        frameRequested: false,
+        // Latest value sent per command, re-sent once when the server says "retry later"
+        lastSent: {},
+        retryTimers: {},
+        // S-meter is smoothed in its own rAF loop (fast attack, slow decay)
+        smeterTarget: -100,
+        smeterDisplay: -100,
+        smeterLastTick: 0,
+
         // Constants
         modes: ['LSB', 'USB', 'CW', 'AM', 'FM', 'DATA'],
         steps: [
@@ -38,21 +69,99 @@ function radioApp() {
             { label: '6m', freq: 50000000 },
         ],
         agcModes: ['OFF', 'SLOW', 'MED', 'FAST'],
+        macros: [],  // Server-side presets/macros: { name, label, steps }
+        spots: [],   // DX cluster spots near the current frequency
 
         // Computed
         get smeterPercent() {
             // Convert dBm (-120 to -20) to percentage
             const min = -120;
             const max = -20;
-            const clamped = Math.max(min, Math.min(max, this.state.smeter));
+            const clamped = Math.max(min, Math.min(max, this.smeterDisplay));
             return ((clamped - min) / (max - min)) * 100;
         },
 
+        get channelLabel() {
+            const ch = this.state.channel;
+            if (!ch) return '';
+            if (ch.offset === 0) return ch.name;
+            const sign = ch.offset > 0 ? '+' : '';
+            return `${ch.name} (${sign}${ch.offset} Hz)`;
+        },
+
+        get linkLabel() {
+            // Rig link status as reported by the server supervisor
+            const l = this.link;
+            if (l.state === 'connected') return `rig ${l.endpoint}`;
+            if (l.state === 'backoff' && l.retry_in_ms !== null) {
+                return `rig down, retry in ${(l.retry_in_ms / 1000).toFixed(1)}s`;
+            }
+            return `rig ${l.state}`;
+        },
+
         // Methods
         init() {
+            requestAnimationFrame((ts) => this.tickSmeter(ts));
+            if (new URLSearchParams(window.location.search).has('perf')) {
+                // Synthetic-load perf harness instead of a real connection
+                const script = document.createElement('script');
+                script.src = '/static/perf.js';
+                script.onload = () => window.radioPerf.start(this);
+                document.head.appendChild(script);
+                return;
+            }
             this.connect();
         },
 
+        tickSmeter(ts) {
+            const dt = this.smeterLastTick ? ts - this.smeterLastTick : 16;
+            this.smeterLastTick = ts;
+            const rising = this.smeterTarget > this.smeterDisplay;
+            const tau = rising ? 50 : 300;  // ms
+            const next = this.smeterDisplay + (this.smeterTarget - this.smeterDisplay) * (1 - Math.exp(-dt / tau));
+            // Skip sub-visible changes so idle meters don't re-render every frame
+            if (Math.abs(next - this.smeterDisplay) > 0.05) {
+                this.smeterDisplay = next;
+            }
+            requestAnimationFrame((t) => this.tickSmeter(t));
+        },
+
+        queuePatch(data) {
+            // Coalesce messages; only the latest value per field is applied
+            const patch = this.pendingPatch || (this.pendingPatch = {});
+            for (const key in data) {
+                // seq/ts/version/stale are delivery metadata, not state
+                if (key !== 'type' && key !== 'seq' && key !== 'ts' && key !== 'version' && key !== 'stale') {
+                    patch[key] = data[key];
+                }
+            }
+            if (!this.frameRequested) {
+                this.frameRequested = true;
+                requestAnimationFrame(() => this.flushPatch());
+            }
+        },
+
+        flushPatch() {
+            this.frameRequested = false;
+            const patch = this.pendingPatch;
+            this.pendingPatch = null;
+            if (patch) this.applyPatch(patch);
+        },
+
+        applyPatch(patch) {
+            // Assign only changed fields so Alpine re-evaluates only their bindings
+            for (const key in patch) {
+                const value = patch[key];
+                if (key === 'smeter') {
+                    this.smeterTarget = value;
+                } else if (typeof value === 'object' && value !== null) {
+                    if (JSON.stringify(value) !== JSON.stringify(this.state[key])) this.state[key] = value;
+                } else if (this.state[key] !== value) {
+                    this.state[key] = value;
+                }
+            }
+        },
+
         connect() {
             const credentials = this.getCredentials();
             if (!credentials) {
@@ -68,6 +177,8 @@ function radioApp() {
 
             this.ws.onopen = () => {
                 this.connectionStatus = 'connected';
+                this.alerts = {};
+                this.ws.send(JSON.stringify({ cmd: 'subscribe_events' }));
             };
 
             this.ws.onmessage = (event) => {
@@ -77,6 +188,7 @@ function radioApp() {
 
             this.ws.onclose = () => {
                 this.connectionStatus = 'disconnected';
+                this.link = { state: 'disconnected', endpoint: null, retry_in_ms: null };
                 // Reconnect after 3 seconds
                 setTimeout(() => this.connect(), 3000);
             };
@@ -111,12 +223,49 @@ function radioApp() {
         handleMessage(data) {
             switch (data.type) {
                 case 'state':
-                    this.state = { ...this.state, ...data };
+                    this.stale = data.stale === true;
+                    this.queuePatch(data);
+                    break;
+                case 'link':
+                    this.link = data;
+                    break;
+                case 'spots':
+                    this.spots = data.spots;
+                    break;
+                case 'macros':
+                    this.macros = data.macros;
+                    break;
+                case 'macro_result':
+                    if (!data.success) {
+                        const failed = data.steps.filter(s => !s.success).map(s => s.cmd);
+                        console.error('Macro failed:', data.name, failed, 'rolled back:', data.rolled_back);
+                    }
+                    break;
+                case 'cw':
+                    if (data.event === 'speed') {
+                        this.cw.wpm = data.wpm;
+                    } else {
+                        this.cw.status = data.event === 'done' ? '' : data.event;
+                    }
+                    break;
+                case 'event':
+                    if (data.state === 'on' && data.kind !== 'retune') {
+                        this.alerts = { ...this.alerts, [data.rule]: data };
+                    } else {
+                        const { [data.rule]: _, ...rest } = this.alerts;
+                        this.alerts = rest;
+                    }
+                    console.log('Trigger:', data.rule, data.state, data.value);
                     break;
                 case 'ack':
                     console.log('Command acknowledged:', data.cmd, data.success);
                     break;
                 case 'error':
+                    if (data.cmd === 'subscribe_events') break;  // Server has no trigger rules
+                    if (data.retry_after_ms !== undefined) {
+                        this.scheduleRetry(data.cmd, data.retry_after_ms);
+                        break;
+                    }
                     console.error('Error:', data.message);
                     alert('Error: ' + data.message);
                     break;
@@ -124,11 +273,43 @@ function radioApp() {
         },
 
         sendCommand(cmd, value) {
+            this.lastSent[cmd] = value;
             if (this.ws && this.ws.readyState === WebSocket.OPEN) {
                 this.ws.send(JSON.stringify({ cmd, value }));
             }
         },
 
+        sendCW() {
+            const text = this.cw.text.trim();
+            if (!text || !this.ws || this.ws.readyState !== WebSocket.OPEN) return;
+            this.ws.send(JSON.stringify({ cmd: 'cw_send', text }));
+            this.cw.text = '';
+            this.cw.status = 'queued';
+        },
+
+        abortCW() {
+            this.sendCommand('cw_abort');
+        },
+
+        setCWSpeed(wpm) {
+            this.sendCommand('cw_speed', parseInt(wpm));
+        },
+
+        scheduleRetry(cmd, delayMs) {
+            // Rate limited / radio busy: send the latest value once the server allows it
+            if (!cmd || this.retryTimers[cmd]) return;
+            if (cmd.startsWith('cw_')) {
+                // CW text isn't kept for re-sending; let the operator send it again
+                this.cw.status = 'busy, resend';
+                return;
+            }
+            console.warn('Command throttled:', cmd, 'retrying in', delayMs, 'ms');
+            this.retryTimers[cmd] = setTimeout(() => {
+                delete this.retryTimers[cmd];
+                this.sendCommand(cmd, this.lastSent[cmd]);
+            }, delayMs);
+        },
+
         setMode(mode) {
             this.sendCommand('set_mode', mode);
         },
@@ -143,6 +324,10 @@ function radioApp() {
             this.state.freq = freq;
         },
 
+        runMacro(name) {
+            this.sendCommand('run_macro', name);
+        },
+
         setAGC(mode) {
             this.sendCommand('set_agc', mode);
         },
@@ -185,6 +370,113 @@ function radioApp() {
             this.state.freq = newFreq;
         },
 
+        // RX audio (/ws/audio): binary frames -> AudioWorklet jitter buffer
+        async toggleAudio() {
+            if (this.audio.enabled) {
+                this.stopAudio();
+                return;
+            }
+            const credentials = this.getCredentials();
+            if (!credentials) return;
+
+            // AudioContext must be created from the click handler
+            const ctx = new AudioContext({ latencyHint: 'interactive' });
+            await ctx.audioWorklet.addModule('/static/audio-worklet.js');
+
+            const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+            const ws = new WebSocket(`${protocol}//${window.location.host}/ws/audio?token=${credentials}`);
+            ws.binaryType = 'arraybuffer';
+            this.audio = { enabled: true, ws, ctx, node: null };
+
+            ws.onmessage = (event) => {
+                if (typeof event.data === 'string') {
+                    const format = JSON.parse(event.data);
+                    this.audio.codec = format.codec;
+                    const node = new AudioWorkletNode(ctx, 'pcm-player', {
+                        outputChannelCount: [1],
+                        processorOptions: { streamRate: format.sample_rate, prebufferMs: 40, maxBufferMs: 120 },
+                    });
+                    node.connect(ctx.destination);
+                    this.audio.node = node;
+                    return;
+                }
+                if (this.audio.node) {
+                    const samples = this.decodeAudioFrame(event.data);
+                    this.audio.node.port.postMessage(samples, [samples.buffer]);
+                }
+            };
+            ws.onclose = () => this.stopAudio();
+        },
+
+        stopAudio() {
+            const { ws, ctx } = this.audio;
+            this.audio = { enabled: false, ws: null, ctx: null, node: null };
+            if (ws && ws.readyState <= WebSocket.OPEN) ws.close();
+            if (ctx) ctx.close();
+        },
+
+        decodeAudioFrame(buffer) {
+            // Header: version u8 | codec u8 | samples u16 | seq u32 | capture time f64
+            const view = new DataView(buffer);
+            const codec = view.getUint8(1);
+            const count = view.getUint16(2, true);
+            const samples = new Float32Array(count);
+            if (codec === 1) {
+                const payload = new Uint8Array(buffer, 16, count);
+                for (let i = 0; i < count; i++) samples[i] = ULAW_TABLE[payload[i]];
+            } else {
+                for (let i = 0; i < count; i++) samples[i] = view.getInt16(16 + i * 2, true) / 32768;
+            }
+            return samples;
+        },
+
+        // Waterfall (/ws/spectrum): one uint8 dB row per binary frame
+        toggleWaterfall() {
+            if (this.waterfall.enabled) {
+                const ws = this.waterfall.ws;
+                this.waterfall = { enabled: false, ws: null, highHz: 0 };
+                if (ws) ws.close();
+                return;
+            }
+            const credentials = this.getCredentials();
+            if (!credentials) return;
+
+            const canvas = this.$refs.waterfall;
+            const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+            const ws = new WebSocket(
+                `${protocol}//${window.location.host}/ws/spectrum?token=${credentials}&bins=${canvas.width}&fps=10`
+            );
+            ws.binaryType = 'arraybuffer';
+            this.waterfall = { enabled: true, ws, highHz: 0 };
+
+            ws.onmessage = (event) => {
+                if (typeof event.data !== 'string') this.drawWaterfallRow(canvas, event.data);
+            };
+            ws.onclose = () => { this.waterfall = { enabled: false, ws: null, highHz: 0 }; };
+        },
+
+        drawWaterfallRow(canvas, buffer) {
+            // Header: version u8 | flags u8 | bins u16 | seq u32 | low_hz f32 | high_hz f32
+            const view = new DataView(buffer);
+            const bins = view.getUint16(2, true);
+            this.waterfall.highHz = view.getFloat32(12, true);
+            const values = new Uint8Array(buffer, 16, bins);
+
+            const ctx = canvas.getContext('2d');
+            // Scroll down one pixel, then paint the new row on top
+            ctx.drawImage(canvas, 0, 0, canvas.width, canvas.height - 1, 0, 1, canvas.width, canvas.height - 1);
+            const row = ctx.createImageData(canvas.width, 1);
+            for (let x = 0; x < canvas.width; x++) {
+                const v = values[Math.floor(x * bins / canvas.width)];
+                // Dark blue -> yellow palette
+                row.data[x * 4] = v;
+                row.data[x * 4 + 1] = v > 128 ? (v - 128) * 2 : 0;
+                row.data[x * 4 + 2] = v < 128 ? 64 + v : 255 - v;
+                row.data[x * 4 + 3] = 255;
+            }
+            ctx.putImageData(row, 0, 0);
+        },
+
         promptFrequency() {
             const input = prompt('Inserisci frequenza (es: 14.074 o 14074000):');
             if (!input) return;
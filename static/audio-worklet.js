@@ -0,0 +1,84 @@
+// AudioWorklet player for the /ws/audio stream.
+//
+// The main thread posts Float32Array chunks at the stream sample rate.
+// This processor keeps them in a ring buffer (the client-side jitter
+// buffer), waits for `prebufferMs` before starting, drops the oldest
+// samples when more than `maxBufferMs` are queued (so latency can't
+// creep up), and resamples linearly to the AudioContext rate.
+
+class PcmPlayer extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        const opts = options.processorOptions || {};
+        this.streamRate = opts.streamRate || sampleRate;
+        this.step = this.streamRate / sampleRate;
+        this.prebuffer = Math.round(this.streamRate * (opts.prebufferMs || 40) / 1000);
+        this.maxBuffer = Math.round(this.streamRate * (opts.maxBufferMs || 120) / 1000);
+
+        this.ring = new Float32Array(this.streamRate * 2);
+        this.readPos = 0;   // Fractional read index into the ring
+        this.writePos = 0;
+        this.buffered = 0;
+        this.playing = false;
+        this.underruns = 0;
+        this.dropped = 0;
+
+        this.port.onmessage = (event) => this.push(event.data);
+    }
+
+    push(samples) {
+        const size = this.ring.length;
+        for (let i = 0; i < samples.length; i++) {
+            this.ring[this.writePos] = samples[i];
+            this.writePos = (this.writePos + 1) % size;
+        }
+        this.buffered += samples.length;
+
+        if (this.buffered > this.maxBuffer) {
+            // Too far behind: skip ahead to the newest prebuffer worth of audio
+            const skip = this.buffered - this.prebuffer;
+            this.readPos = (this.readPos + skip) % size;
+            this.buffered -= skip;
+            this.dropped += skip;
+        }
+        if (!this.playing && this.buffered >= this.prebuffer) {
+            this.playing = true;
+        }
+    }
+
+    process(inputs, outputs) {
+        const out = outputs[0][0];
+        const size = this.ring.length;
+
+        for (let i = 0; i < out.length; i++) {
+            if (!this.playing || this.buffered < 2) {
+                out[i] = 0;
+                continue;
+            }
+            const idx = Math.floor(this.readPos);
+            const frac = this.readPos - idx;
+            const a = this.ring[idx % size];
+            const b = this.ring[(idx + 1) % size];
+            out[i] = a + (b - a) * frac;
+
+            const next = this.readPos + this.step;
+            const consumed = Math.floor(next) - idx;
+            this.readPos = next % size;
+            this.buffered -= consumed;
+        }
+
+        if (this.playing && this.buffered < 2) {
+            // Underrun: go back to prebuffering
+            this.playing = false;
+            this.underruns++;
+        }
+
+        // Copy to any extra output channels
+        for (let c = 1; c < outputs[0].length; c++) {
+            outputs[0][c].set(out);
+        }
+        return true;
+    }
+}
+
+registerProcessor('pcm-player', PcmPlayer);
@@ -0,0 +1,92 @@
+// Frontend perf harness: open the UI with `/?perf` to run it.
+//
+// Instead of connecting to /ws, feeds the app a synthetic state stream
+// (default 20 Hz, S-meter and frequency changing every message) and
+// records the time between animation frames. Results are shown in an
+// overlay and logged to the console.
+//
+// Query parameters:
+//   perf=<hz>        message rate (default 20)
+//   seconds=<n>      run length (default 10)
+//   mode=legacy      replace the whole state object per message, as the
+//                    app did before patches + frame batching (for comparison)
+
+window.radioPerf = {
+    start(app) {
+        const params = new URLSearchParams(window.location.search);
+        const hz = parseFloat(params.get('perf')) || 20;
+        const seconds = parseFloat(params.get('seconds')) || 10;
+        const legacy = params.get('mode') === 'legacy';
+
+        if (legacy) {
+            app.queuePatch = function (data) {
+                this.state = { ...this.state, ...data };
+                this.smeterTarget = data.smeter;
+            };
+        }
+
+        app.connectionStatus = 'connected';
+        app.link = { state: 'connected', endpoint: 'synthetic', retry_in_ms: null };
+
+        const frameTimes = [];
+        let last = 0;
+        let running = true;
+        const onFrame = (ts) => {
+            if (last) frameTimes.push(ts - last);
+            last = ts;
+            if (running) requestAnimationFrame(onFrame);
+        };
+        requestAnimationFrame(onFrame);
+
+        let seq = 0;
+        const base = app.state.freq;
+        const timer = setInterval(() => {
+            seq++;
+            app.handleMessage({
+                type: 'state',
+                seq,
+                freq: base + (seq % 50) * 10,
+                mode: 'USB',
+                filter_width: 2400,
+                smeter: -110 + Math.round(40 * Math.abs(Math.sin(seq / 7))),
+                rf_gain: 80,
+                power: 50,
+                agc: 'MED',
+                break_in: false,
+                rit: 0,
+                channel: null,
+            });
+        }, 1000 / hz);
+
+        setTimeout(() => {
+            running = false;
+            clearInterval(timer);
+            this.report(frameTimes, { hz, seconds, mode: legacy ? 'legacy' : 'patch', messages: seq });
+        }, seconds * 1000);
+    },
+
+    report(frameTimes, info) {
+        const sorted = [...frameTimes].sort((a, b) => a - b);
+        const pct = (p) => sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p / 100))] || 0;
+        const result = {
+            ...info,
+            frames: sorted.length,
+            fps: sorted.length / info.seconds,
+            p50_ms: pct(50),
+            p95_ms: pct(95),
+            p99_ms: pct(99),
+            max_ms: sorted[sorted.length - 1] || 0,
+            long_frames: sorted.filter((t) => t > 20).length,
+        };
+        window.radioPerfResult = result;
+        console.table(result);
+
+        const box = document.createElement('pre');
+        box.style.cssText = 'position:fixed;top:8px;right:8px;background:#000c;color:#0f0;' +
+            'padding:8px;font-size:12px;z-index:1000;border-radius:4px';
+        box.textContent = Object.entries(result)
+            .map(([k, v]) => `${k}: ${typeof v === 'number' ? +v.toFixed(2) : v}`)
+            .join('\n');
+        document.body.appendChild(box);
+    },
+};
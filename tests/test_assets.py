@@ -0,0 +1,86 @@
+import pytest
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from assets import AssetPipeline, negotiate_encoding
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    static = tmp_path / "static"
+    static.mkdir()
+    (static / "index.html").write_text(
+        '<link href="/static/style.css"><script src="/static/app.js"></script>' + " " * 300
+    )
+    (static / "app.js").write_text("addModule('/static/worklet.js');" + "// pad\n" * 100)
+    (static / "worklet.js").write_text("registerProcessor('x', X);" + "// pad\n" * 100)
+    (static / "style.css").write_text("body { color: red; }")
+    return AssetPipeline(static)
+
+
+@pytest.fixture
+def client(pipeline):
+    app = FastAPI()
+
+    @app.get("/static/{path:path}")
+    async def static_asset(path: str, request: Request):
+        asset = pipeline.lookup(path)
+        return pipeline.response(asset, request, immutable=path == asset.hashed_name)
+
+    return TestClient(app)
+
+
+def test_build_fingerprints_and_rewrites_dependencies_first(pipeline):
+    """Test hashed names, and that references point at hashed dependencies."""
+    assets = pipeline.build()
+
+    worklet = assets["worklet.js"]
+    assert worklet.hashed_name.startswith("worklet.") and worklet.hashed_name.endswith(".js")
+    app_js = (pipeline.dist_dir / assets["app.js"].hashed_name).read_text()
+    assert f"/static/{worklet.hashed_name}" in app_js
+
+    index = (pipeline.dist_dir / "index.html").read_text()
+    assert f"/static/{assets['app.js'].hashed_name}" in index
+    assert f"/static/{assets['style.css'].hashed_name}" in index
+    assert assets["index.html"].hashed_name == "index.html"
+
+
+def test_build_writes_compressed_variants(pipeline):
+    """Test gzip variants are stored next to the hashed file; tiny files skipped."""
+    assets = pipeline.build()
+    app_js = assets["app.js"]
+    assert gzip.decompress(app_js.variants["gzip"].read_bytes()) == app_js.variants["identity"].read_bytes()
+    assert set(assets["style.css"].variants) == {"identity"}
+
+
+def test_negotiate_encoding():
+    """Test br > gzip > identity, honouring q=0."""
+    available = {"identity": 1, "gzip": 1, "br": 1}
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("gzip, br;q=0", available) == "gzip"
+    assert negotiate_encoding("", available) == "identity"
+    assert negotiate_encoding("br", {"identity": 1}) == "identity"
+
+
+def test_hashed_asset_is_immutable_and_compressed(client, pipeline):
+    """Test cache headers, Content-Encoding and strong ETag."""
+    hashed = pipeline.url("app.js")
+    response = client.get(hashed, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"].startswith('"') and not response.headers["etag"].startswith("W/")
+    assert "addModule" in response.text
+
+
+def test_unhashed_name_revalidates_and_304(client):
+    """Test logical names are no-cache and answer 304 on a matching ETag."""
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+    assert response.headers["cache-control"] == "no-cache"
+
+    etag = response.headers["etag"]
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert response.status_code == 304
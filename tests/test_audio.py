@@ -0,0 +1,186 @@
+import pytest
+import array
+import asyncio
+import math
+import os
+import wave
+
+from audio import (
+    AudioHub,
+    AudioSource,
+    WavFileSource,
+    parse_frame,
+    source_from_config,
+    ulaw_encode,
+    CommandSource,
+    FifoSource,
+)
+
+
+def ulaw_decode(byte: int) -> int:
+    """Reference G.711 decoder (same formula as static/app.js)."""
+    u = ~byte & 0xFF
+    exponent = (u >> 4) & 0x07
+    magnitude = (((u & 0x0F) << 3) + 0x84) << exponent
+    return 0x84 - magnitude if u & 0x80 else magnitude - 0x84
+
+
+def write_tone(path, rate=8000, seconds=0.1, channels=1):
+    samples = array.array("h")
+    for i in range(int(rate * seconds)):
+        value = int(10000 * math.sin(2 * math.pi * 440 * i / rate))
+        samples.extend([value] * channels)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+
+
+class ListSource(AudioSource):
+    """Source yielding pre-made chunks, then EOF."""
+
+    def __init__(self, chunks, sample_rate=8000):
+        self.chunks = list(chunks)
+        self.sample_rate = sample_rate
+
+    async def read(self, nbytes):
+        if not self.chunks:
+            raise EOFError
+        await asyncio.sleep(0)
+        return self.chunks.pop(0)
+
+
+def test_ulaw_roundtrip():
+    """Test mu-law encoding stays within G.711 quantization error."""
+    samples = array.array("h", [0, 1, -1, 100, -100, 1000, -1000, 32767, -32768])
+    encoded = ulaw_encode(samples.tobytes())
+    assert len(encoded) == len(samples)
+    for original, byte in zip(samples, encoded):
+        decoded = ulaw_decode(byte)
+        assert abs(decoded - original) <= max(8, abs(original) // 16)
+
+
+@pytest.mark.asyncio
+async def test_wav_source_downmixes_and_loops(tmp_path):
+    """Test WAV source keeps the first channel and loops at EOF."""
+    path = tmp_path / "tone.wav"
+    write_tone(path, rate=8000, seconds=0.01, channels=2)  # 80 frames
+
+    source = WavFileSource(str(path), realtime=False)
+    await source.open()
+    assert source.sample_rate == 8000
+    chunk = await source.read(200)  # 100 samples: wraps around once
+    assert len(chunk) == 200
+
+
+@pytest.mark.asyncio
+async def test_wav_source_ends_without_loop(tmp_path):
+    """Test non-looping WAV source raises EOFError at the end."""
+    path = tmp_path / "tone.wav"
+    write_tone(path, rate=8000, seconds=0.01)
+
+    source = WavFileSource(str(path), loop=False, realtime=False)
+    await source.open()
+    await source.read(160)
+    with pytest.raises(EOFError):
+        await source.read(160)
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_shared_frames():
+    """Test frames reach every subscriber, encoded once per codec."""
+    pcm = array.array("h", [1000] * 160).tobytes()
+    hub = AudioHub(ListSource([pcm, pcm]), frame_ms=20, buffer_frames=5)
+    a = hub.subscribe("pcm16")
+    b = hub.subscribe("pcm16")
+    c = hub.subscribe("ulaw")
+
+    await hub.start()
+    await asyncio.wait_for(hub._task, timeout=1)
+
+    assert a.queue.qsize() == b.queue.qsize() == c.queue.qsize() == 2
+    frame_a, frame_b = a.queue.get_nowait(), b.queue.get_nowait()
+    assert frame_a is frame_b
+    header = parse_frame(frame_a)
+    assert header["codec"] == "pcm16"
+    assert header["samples"] == 160
+    assert header["seq"] == 1
+    assert header["payload"] == pcm
+
+    header = parse_frame(c.queue.get_nowait())
+    assert header["codec"] == "ulaw"
+    assert len(header["payload"]) == 160
+
+
+@pytest.mark.asyncio
+async def test_subscription_drops_oldest_when_full():
+    """Test a slow client keeps only the newest frames."""
+    pcm = array.array("h", [0] * 160).tobytes()
+    hub = AudioHub(ListSource([pcm] * 5), frame_ms=20, buffer_frames=2)
+    slow = hub.subscribe("pcm16")
+
+    await hub.start()
+    await asyncio.wait_for(hub._task, timeout=1)
+
+    assert slow.queue.qsize() == 2
+    assert slow.dropped == 3
+    assert [parse_frame(slow.queue.get_nowait())["seq"] for _ in range(2)] == [4, 5]
+
+
+@pytest.mark.asyncio
+async def test_hub_reopens_source_after_eof():
+    """Test the hub reopens an ended source and keeps delivering frames."""
+
+    class ReopeningSource(ListSource):
+        opens = 0
+
+        async def open(self):
+            self.opens += 1
+            self.chunks = [pcm]
+
+    pcm = array.array("h", [0] * 160).tobytes()
+    source = ReopeningSource([])
+    hub = AudioHub(source, frame_ms=20, reopen_delay=0.01)
+    await hub.start()
+    for _ in range(100):
+        if hub.frames >= 3:
+            break
+        await asyncio.sleep(0.01)
+    await hub.stop()
+    assert hub.frames >= 3 and source.opens >= 3
+
+
+@pytest.mark.asyncio
+async def test_fifo_open_does_not_wait_for_writer(tmp_path):
+    """Test opening a FIFO returns before a writer attaches; reads wait for it."""
+    path = tmp_path / "audio.fifo"
+    os.mkfifo(path)
+    source = FifoSource(str(path), 8000)
+    await asyncio.wait_for(source.open(), timeout=1)
+    read = asyncio.create_task(source.read(4))
+
+    with open(path, "wb") as writer:
+        writer.write(b"\x01\x00\x02\x00")
+    assert await asyncio.wait_for(read, timeout=1) == b"\x01\x00\x02\x00"
+    with pytest.raises(EOFError):
+        await asyncio.wait_for(source.read(4), timeout=1)  # Writer gone
+    await source.close()
+
+
+def test_subscribe_rejects_unknown_codec():
+    """Test unsupported codecs are refused."""
+    hub = AudioHub(ListSource([]))
+    with pytest.raises(ValueError):
+        hub.subscribe("opus")
+
+
+def test_source_from_config():
+    """Test config selects the right source type."""
+    alsa = source_from_config({"source": "alsa", "device": "hw:1,0", "sample_rate": 12000})
+    assert isinstance(alsa, CommandSource)
+    assert alsa.command[:4] == ["arecord", "-q", "-D", "hw:1,0"]
+    pipe = source_from_config({"source": "pipe", "command": "sox -d -t raw -", "sample_rate": 8000})
+    assert pipe.command == ["sox", "-d", "-t", "raw", "-"]
+    with pytest.raises(ValueError):
+        source_from_config({"source": "sdr"})
@@ -0,0 +1,100 @@
+import pytest
+
+from channels import ChannelStore, band_for, parse_adif, parse_csv
+
+
+CSV_TEXT = """name,freq,mode,tags,notes
+FT8 20m,14.074,USB,digital;ft8,
+Italian net,7060000,LSB,net,Sunday 09:00
+IBP 4U1UN,14100000,CW,beacon,
+"""
+
+ADIF_TEXT = """Exported channels <EOH>
+<NAME:6>CW run<FREQ:6>14.025<MODE:2>CW<APP_WEBRADIO_TAGS:7>contest<EOR>
+<CALL:5>IK3XX<FREQ:5>3.790<MODE:3>SSB<COMMENT:3>net<EOR>
+"""
+
+
+@pytest.fixture
+def store():
+    store = ChannelStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_band_for():
+    """Test band plan lookup."""
+    assert band_for(14074000) == "20m"
+    assert band_for(7060000) == "40m"
+    assert band_for(12000000) is None
+
+
+def test_parse_csv():
+    """Test CSV import handles MHz and Hz frequencies and tags."""
+    channels = parse_csv(CSV_TEXT)
+    assert len(channels) == 3
+    assert channels[0]["freq"] == 14074000
+    assert channels[0]["tags"] == ["digital", "ft8"]
+    assert channels[1]["freq"] == 7060000
+    assert channels[1]["notes"] == "Sunday 09:00"
+
+
+def test_parse_adif():
+    """Test ADIF records: FREQ in MHz, CALL as fallback name, header skipped."""
+    channels = parse_adif(ADIF_TEXT)
+    assert [c["name"] for c in channels] == ["CW run", "IK3XX"]
+    assert channels[0]["freq"] == 14025000
+    assert channels[0]["tags"] == ["contest"]
+    assert channels[1]["freq"] == 3790000
+    assert channels[1]["notes"] == "net"
+
+
+def test_query_by_band_tag_and_range(store):
+    """Test indexed filters and pagination."""
+    store.import_text(CSV_TEXT, "csv")
+    store.import_text(ADIF_TEXT, "adif")
+
+    page = store.query(band="20m")
+    assert page["total"] == 3
+    assert [c["freq"] for c in page["items"]] == [14025000, 14074000, 14100000]
+
+    page = store.query(tag="beacon")
+    assert [c["name"] for c in page["items"]] == ["IBP 4U1UN"]
+    assert page["items"][0]["tags"] == ["beacon"]
+
+    page = store.query(min_freq=7000000, max_freq=14050000, limit=1, offset=1)
+    assert page["total"] == 2
+    assert [c["freq"] for c in page["items"]] == [14025000]
+
+
+def test_nearest(store):
+    """Test nearest lookup picks the closest channel and honours max distance."""
+    store.import_text(CSV_TEXT, "csv")
+
+    channel = store.nearest(14075500)
+    assert channel["name"] == "FT8 20m"
+    assert channel["offset"] == 1500
+
+    assert store.nearest(14090000)["name"] == "IBP 4U1UN"
+    assert store.nearest(1000000)["name"] == "Italian net"
+    assert store.nearest(10000000, max_distance=5000) is None
+
+
+def test_nearest_empty_store(store):
+    """Test nearest on an empty store."""
+    assert store.nearest(14074000) is None
+
+
+def test_delete_updates_index(store):
+    """Test deleted channels disappear from nearest lookups."""
+    store.import_text(CSV_TEXT, "csv")
+    channel = store.nearest(14074000)
+    assert store.delete(channel["id"]) is True
+    assert store.nearest(14074000)["name"] == "IBP 4U1UN"
+    assert store.delete(channel["id"]) is False
+
+
+def test_import_rejects_unknown_format(store):
+    """Test unsupported import formats raise ValueError."""
+    with pytest.raises(ValueError):
+        store.import_text("", "xlsx")
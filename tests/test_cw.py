@@ -0,0 +1,151 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+import pytest
+
+from benchmarks.fake_rigctld import FakeRigctld
+from cw import CWKeyer, clean_text, morse_units, unit_seconds
+from rig_client import PRIORITY_KEYING, PriorityLock, RigClient
+
+
+def test_morse_timing():
+    """Test PARIS is 50 units and text is cleaned to keyable characters."""
+    assert morse_units("PARIS") == 50
+    assert unit_seconds(20) == pytest.approx(0.06)
+    assert clean_text(" cq  de ik3xx_# ") == "CQ DE IK3XX"
+
+
+@pytest.mark.asyncio
+async def test_priority_lock_serves_keying_first():
+    """Test waiters are served by priority, then arrival."""
+    lock = PriorityLock()
+    order = []
+
+    async def user(name, priority=None):
+        if priority is None:
+            async with lock:
+                order.append(name)
+        else:
+            async with lock.priority(priority):
+                order.append(name)
+
+    await lock.acquire()
+    tasks = [asyncio.create_task(user("poll1")), asyncio.create_task(user("poll2"))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(user("cw", PRIORITY_KEYING)))
+    await asyncio.sleep(0)
+    lock.release()
+    await asyncio.gather(*tasks)
+    assert order == ["cw", "poll1", "poll2"]
+    assert not lock.locked()
+
+
+@asynccontextmanager
+async def fake_rig():
+    """A RigClient connected to an in-process fake rigctld."""
+    fake = FakeRigctld(latency=0.005)
+    port = await fake.start()
+    client = RigClient("127.0.0.1", port)
+    await client.connect()
+    yield fake, client
+    await client.disconnect()
+    await fake.stop()
+
+
+async def wait_for_event(events, name, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(e.get("event") == name for e in events):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"no {name} event in {events}")
+
+
+@pytest.mark.asyncio
+async def test_keying_is_paced_and_ahead_of_polling():
+    """Test words reach the rig in order, paced by WPM, without waiting behind polls."""
+    async with fake_rig() as (fake, client):
+        await check_keying_is_paced(fake, client)
+
+
+async def check_keying_is_paced(fake, client):
+    events = []
+
+    async def on_event(message):
+        events.append(message)
+
+    async def poll_forever():
+        while True:
+            await client.get_state()
+
+    keyer = CWKeyer(client, on_event=on_event, wpm=60, lead=0.2)
+    keyer.start()
+    pollers = [asyncio.create_task(poll_forever()) for _ in range(3)]
+    try:
+        job = keyer.send("cq cq test")
+        await wait_for_event(events, "done")
+    finally:
+        for task in pollers:
+            task.cancel()
+        await keyer.stop()
+
+    assert [text for _, text in fake.morse] == ["CQ", "CQ", "TEST"]
+    assert fake.state["KEYSPD"] == 60.0
+    assert [e["event"] for e in events if e.get("id") == job.id] == ["started", "done"]
+
+    # Second word goes out `lead` before the first one ends
+    first_word = morse_units("CQ") * unit_seconds(60)
+    gap = fake.morse[1][0] - fake.morse[0][0]
+    assert first_word - 0.2 - 0.05 < gap < first_word - 0.2 + 0.1
+
+    # Three pollers queued on the connection, yet each word waits at most ~one command
+    stats = keyer.stats()
+    assert stats["sent_words"] == 3
+    assert stats["rig_ms"]["max"] < 40
+
+
+@pytest.mark.asyncio
+async def test_abort_and_speed():
+    """Test abort stops the rig and drops the rest; speed is range checked."""
+    async with fake_rig() as (fake, client):
+        await check_abort_and_speed(fake, client)
+
+
+async def check_abort_and_speed(fake, client):
+    events = []
+
+    async def on_event(message):
+        events.append(message)
+
+    keyer = CWKeyer(client, on_event=on_event, wpm=5, lead=0.1)
+    keyer.start()
+    try:
+        keyer.send("one two three")
+        queued = keyer.send("later")
+        await wait_for_event(events, "started")
+        assert await keyer.abort() == 2
+        await wait_for_event(events, "aborted")
+        assert fake.morse_stops == 1
+        assert [text for _, text in fake.morse] == ["ONE"]
+        assert {"type": "cw", "event": "aborted", "id": queued.id} in events
+
+        await keyer.set_speed(30)
+        assert fake.state["KEYSPD"] == 30.0 and keyer.wpm == 30
+        with pytest.raises(ValueError):
+            await keyer.set_speed(100)
+        with pytest.raises(ValueError):
+            keyer.send("###")
+    finally:
+        await keyer.stop()
+
+
+@pytest.mark.asyncio
+async def test_refused_speed_keeps_pacing():
+    """Test a speed the rig refuses is reported and not used for pacing."""
+    rig = AsyncMock()
+    rig.set_keyer_speed.return_value = False
+    keyer = CWKeyer(rig, wpm=20)
+    assert await keyer.set_speed(30) is False
+    assert keyer.wpm == 20
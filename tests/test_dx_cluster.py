@@ -0,0 +1,135 @@
+import pytest
+import asyncio
+import random
+import time
+
+from dx_cluster import DXClusterClient, Spot, SpotStore, parse_spot
+
+
+def test_parse_spot():
+    """Test parsing a DX Spider spot line."""
+    spot = parse_spot("DX de IK3XX:     14025.0  JA1ABC       CW 599 up 2               1234Z\r\n")
+    assert spot.freq == 14025000
+    assert spot.dx == "JA1ABC"
+    assert spot.spotter == "IK3XX"
+    assert spot.comment == "CW 599 up 2"
+    assert spot.utc == "1234Z"
+
+
+def test_parse_spot_ignores_other_lines():
+    """Test non-spot lines are ignored."""
+    assert parse_spot("Hello IK3XX, this is DXSPIDER") is None
+    assert parse_spot("") is None
+
+
+def test_store_query_window():
+    """Test window query returns spots in frequency order."""
+    store = SpotStore()
+    for khz, call in [(14030, "B"), (14010, "A"), (7020, "C"), (14050, "D")]:
+        store.add(Spot(freq=khz * 1000, dx=call, spotter="X"))
+
+    assert [s.dx for s in store.query(14000000, 14040000)] == ["A", "B"]
+    assert [s.dx for s in store.query(14050000, 14050000)] == ["D"]
+    assert store.query(21000000, 21450000) == []
+
+
+def test_store_dedupes_same_call_nearby():
+    """Test a respot of the same call within 1 kHz replaces the old spot."""
+    store = SpotStore()
+    store.add(Spot(freq=14025000, dx="JA1ABC", spotter="A"))
+    store.add(Spot(freq=14025300, dx="JA1ABC", spotter="B"))
+    spots = store.query(14000000, 14100000)
+    assert len(spots) == 1
+    assert spots[0].spotter == "B"
+
+
+def test_store_expires_oldest_first():
+    """Test spots older than the TTL are dropped."""
+    store = SpotStore(ttl=60)
+    store.add(Spot(freq=14025000, dx="OLD", spotter="A", received=0))
+    store.add(Spot(freq=14026000, dx="NEW", spotter="A", received=100))
+    assert store.expire(now=120) == 1
+    assert [s.dx for s in store.query(0, 10**9)] == ["NEW"]
+    assert len(store) == 1
+
+
+def test_store_query_is_sub_millisecond():
+    """Test window queries stay fast with tens of thousands of spots."""
+    store = SpotStore()
+    rng = random.Random(1)
+    for i in range(50000):
+        store.add(Spot(freq=rng.randrange(1800000, 30000000), dx=f"C{i}", spotter="X"))
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        freq = rng.randrange(1800000, 30000000)
+        store.query(freq - 11200, freq + 11200)
+    per_query = (time.perf_counter() - start) / 1000
+    assert per_query < 0.001
+
+
+@pytest.mark.asyncio
+async def test_client_ingests_from_fake_cluster():
+    """Test login and spot ingestion against a local fake cluster."""
+    logins = []
+
+    async def fake_cluster(reader, writer):
+        writer.write(b"\xff\xfb\x01Please enter your call: ")
+        await writer.drain()
+        logins.append((await reader.readline()).strip())
+        writer.write(b"Hello N0CALL\r\n")
+        writer.write(b"DX de IK3XX:     14025.0  JA1ABC       CW 599               1234Z\r\n")
+        writer.write(b"DX de DL1AA:      7074.0  VK2XYZ       FT8 -12              1235Z\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(fake_cluster, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    store = SpotStore()
+    received = []
+    client = DXClusterClient("127.0.0.1", port, "N0CALL", store, on_spot=received.append)
+
+    try:
+        await asyncio.wait_for(client.session(), timeout=5)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert logins == [b"N0CALL"]
+    assert [s.dx for s in received] == ["JA1ABC", "VK2XYZ"]
+    assert [s.dx for s in store.query(7000000, 7100000)] == ["VK2XYZ"]
+
+
+@pytest.mark.asyncio
+async def test_client_survives_overlong_line():
+    """Test a line over the stream limit ends only that session, then the client reconnects."""
+    connections = []
+
+    async def fake_cluster(reader, writer):
+        connections.append(1)
+        writer.write(b"login: ")
+        await reader.readline()
+        if len(connections) == 1:
+            writer.write(b"X" * 200_000 + b"\r\n")
+        else:
+            writer.write(b"DX de IK3XX:     14025.0  JA1ABC       CW 599               1234Z\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(fake_cluster, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    received = []
+    client = DXClusterClient("127.0.0.1", port, "N0CALL", SpotStore(), on_spot=received.append, reconnect_delay=0.01)
+    client.start()
+    try:
+        for _ in range(200):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await client.stop()
+        server.close()
+        await server.wait_closed()
+
+    assert len(connections) >= 2
+    assert [s.dx for s in received] == ["JA1ABC"]
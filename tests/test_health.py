@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from health import FixedRateScheduler, LoopLagMonitor, percentiles
+from sessions import ClientSession
+
+
+def test_percentiles():
+    """Test nearest-rank percentiles and the empty case."""
+    result = percentiles(range(1, 101))
+    assert result == {"p50": 51, "p95": 96, "p99": 100, "max": 100}
+    assert percentiles([]) == {"p50": None, "p95": None, "p99": None, "max": None}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_keeps_fixed_rate_despite_cycle_time():
+    """Test cycle duration is absorbed instead of added to the interval."""
+    scheduler = FixedRateScheduler(0.05)
+    start = time.monotonic()
+    for _ in range(5):
+        await scheduler.wait()
+        await asyncio.sleep(0.03)  # Work shorter than the interval
+    await scheduler.wait()
+
+    # 5 intervals, not 5 * (interval + work)
+    assert time.monotonic() - start < 0.05 * 5 + 0.04
+    assert scheduler.missed == 0
+    assert scheduler.cycles == 6
+
+
+@pytest.mark.asyncio
+async def test_scheduler_counts_missed_deadlines():
+    """Test an overrun skips (and counts) ticks instead of bursting."""
+    scheduler = FixedRateScheduler(0.02)
+    await scheduler.wait()
+    await asyncio.sleep(0.07)  # Overrun by 2.5 intervals
+    before = time.monotonic()
+    await scheduler.wait()
+
+    assert scheduler.missed == 3
+    # Next deadline is on the original grid, not immediately
+    assert time.monotonic() - before > 0.005
+    assert scheduler.stats()["cycle_ms"]["max"] >= 70
+
+
+@pytest.mark.asyncio
+async def test_scheduler_burst_wakes_early_then_decays():
+    """Test burst() cuts the current sleep short, polls fast, then returns to the base rate."""
+    scheduler = FixedRateScheduler(0.2, burst_interval=0.02, burst_hold=0.1)
+    await scheduler.wait()
+    asyncio.get_running_loop().call_later(0.03, scheduler.burst)
+    start = time.monotonic()
+    await scheduler.wait()
+    assert time.monotonic() - start < 0.1  # Not the full 200 ms
+
+    ticks = []
+    while scheduler.bursting or not ticks:
+        before = time.monotonic()
+        await scheduler.wait()
+        ticks.append(time.monotonic() - before)
+    # Burst ticks at ~20 ms, then 40, 80, 160 ms, then base rate
+    assert ticks[0] < 0.05 and max(ticks[:-1]) < 0.2
+    assert len(ticks) >= 5
+    assert scheduler.bursts == 1 and scheduler.missed == 0
+    assert scheduler.stats()["burst_ticks"] == scheduler.burst_ticks
+
+
+@pytest.mark.asyncio
+async def test_scheduler_burst_budget_and_link_share():
+    """Test an empty budget falls back to the base rate, and slow cycles get equal idle time."""
+    scheduler = FixedRateScheduler(0.1, burst_interval=0.01, burst_hold=10, budget=3, budget_rate=0)
+    await scheduler.wait()
+    scheduler.burst()
+    start = time.monotonic()
+    for _ in range(3):
+        await scheduler.wait()
+    assert scheduler.burst_ticks == 3 and time.monotonic() - start < 0.1
+
+    await scheduler.wait()  # Budget spent: base rate while still inside the hold
+    assert scheduler.burst_ticks == 3 and not scheduler.bursting
+
+    scheduler = FixedRateScheduler(0.2, burst_interval=0.01, burst_hold=10)
+    await scheduler.wait()
+    scheduler.burst()
+    await scheduler.wait()
+    await asyncio.sleep(0.04)  # Cycle slower than the burst interval
+    before = time.monotonic()
+    await scheduler.wait()
+    assert time.monotonic() - before >= 0.035
+    assert scheduler.missed == 0
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_blocking():
+    """Test a blocking call shows up as event-loop lag."""
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    time.sleep(0.05)  # Block the loop
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    assert monitor.stats()["max"] >= 40
+
+
+class SlowSocket:
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send_json(self, message):
+        await self.release.wait()
+        self.sent.append(message)
+
+
+@pytest.mark.asyncio
+async def test_client_session_bounds_backlog():
+    """Test a stalled client queues up to its limit, then drops the oldest."""
+    socket = SlowSocket()
+    session = ClientSession(socket, max_backlog=3)
+    session.start()
+    await asyncio.sleep(0)  # Sender takes message 0 and blocks on it
+
+    for i in range(6):
+        session.send({"n": i})
+    assert session.backlog == 3
+    assert session.dropped == 3
+
+    socket.release.set()
+    await asyncio.sleep(0.01)
+    assert [m["n"] for m in socket.sent] == [3, 4, 5]
+    assert session.stats() == {"backlog": 0, "sent": 3, "dropped": 3}
+    await session.close()
@@ -0,0 +1,171 @@
+import asyncio
+import time
+
+import pytest
+
+from channels import parse_adif
+from logbook import Logbook, adif_mode, adif_record
+from radio_state import RadioState
+
+
+@pytest.fixture
+def book():
+    book = Logbook(":memory:", batch_size=3, flush_interval=60)
+    yield book
+    book._db.close()
+
+
+def test_log_fills_from_state_and_checks_dupes(book):
+    """Test freq/mode/time come from the radio state; dupes by call/band/mode."""
+    state = RadioState(freq=14025000, mode="CW")
+    before = time.time()
+    contact = book.log({"call": " ik3xx ", "rst_sent": 599}, state)
+    assert contact["call"] == "IK3XX"
+    assert (contact["freq"], contact["band"], contact["mode"]) == (14025000, "20m", "CW")
+    assert contact["time_on"] >= int(before)
+    assert contact["rst_sent"] == "599"
+    assert contact["dupe"] is False
+
+    # Seen at once, before anything is committed
+    assert book.pending == 1
+    assert book.is_dupe("IK3XX", "20m", "CW")
+    assert not book.is_dupe("IK3XX", "40m", "CW")
+    assert book.log({"call": "IK3XX"}, state)["dupe"] is True
+    assert book.log({"call": "IK3XX", "freq": 7025000}, state)["dupe"] is False
+
+    with pytest.raises(ValueError):
+        book.log({"call": "IK3XX"})  # No state, no freq
+    with pytest.raises(ValueError):
+        book.log({"call": "IK3 XX", "freq": 7025000})
+    with pytest.raises(TypeError):
+        book.log(["IK3XX"])
+
+
+def test_log_validates_freq_and_time(book):
+    """Test bad numbers are refused and JavaScript millisecond times converted."""
+    assert book.log({"call": "IK3XX", "freq": 7030000, "time_on": 1700000000123})["time_on"] == 1700000000
+    assert book.log({"call": "IK3XX", "freq": "14025000", "time_on": 1700000000.5})["freq"] == 14025000
+    for bad in ({"time_on": 10**20}, {"time_on": -5}, {"time_on": float("nan")}, {"time_on": "noon"},
+                {"freq": float("inf")}, {"freq": -7030000}, {"freq": 10**20}, {"freq": True}):
+        with pytest.raises(ValueError):
+            book.log({"call": "IK3XX", "freq": 7030000, **bad})
+    assert book.pending == 2
+
+
+def test_modes_map_to_adif(book):
+    """Test rig modes export as ADIF MODE/SUBMODE and dupes use the ADIF mode."""
+    book.log({"call": "W1AW", "freq": 14200000, "mode": "USB", "time_on": 1000})
+    assert book.is_dupe("W1AW", "20m", "LSB")  # Both SSB
+    assert book.is_dupe("W1AW", "20m", "SSB")
+    assert not book.is_dupe("W1AW", "20m", "CW")
+
+    record = adif_record({"call": "W1AW", "freq": 14200000, "mode": "USB", "time_on": 1000})
+    assert "<MODE:3>SSB<SUBMODE:3>USB" in record
+    record = adif_record({"call": "W1AW", "freq": 7030000, "mode": "CWR", "time_on": 1000})
+    assert "<MODE:2>CW" in record and "SUBMODE" not in record
+    assert adif_mode("ft8") == ("FT8", None)
+    assert adif_mode("PKTUSB") == ("PKT", None)
+
+
+def test_dupe_window(book):
+    """Test a dupe window makes old contacts workable again."""
+    book.dupe_window = 3600
+    book.log({"call": "K1ABC", "freq": 7030000, "mode": "CW", "time_on": 1000})
+    assert book.is_dupe("K1ABC", "40m", "CW", at=2000)
+    assert not book.is_dupe("K1ABC", "40m", "CW", at=1000 + 3600)
+
+
+def test_dupes_reloaded_from_disk(tmp_path):
+    """Test the dupe index is rebuilt from committed contacts."""
+    path = str(tmp_path / "log.db")
+    book = Logbook(path)
+    book.log({"call": "DL1AA", "freq": 3525000, "mode": "CW"})
+    book.flush()
+    book._db.close()
+
+    book = Logbook(path)
+    assert book.is_dupe("DL1AA", "80m", "CW")
+    book._db.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_commits_in_batches(book):
+    """Test the flusher commits once batch_size contacts are queued."""
+    book.start()
+    for i in range(3):
+        book.log({"call": f"W{i}AW", "freq": 14200000, "mode": "USB", "time_on": 1000 + i})
+    for _ in range(100):
+        if book.committed == 3:
+            break
+        await asyncio.sleep(0.01)
+    assert book.committed == 3
+    assert book.pending == 0
+
+    book.log({"call": "W9AW", "freq": 14200000, "mode": "USB", "time_on": 2000})
+    await book.stop()  # Commits the rest
+    assert book.committed == 4
+
+
+@pytest.mark.asyncio
+async def test_flusher_survives_a_bad_row(book):
+    """Test a row SQLite rejects is dropped and the rest still get committed."""
+    book.flush_interval = 0.01
+    book.log({"call": "W1AW", "freq": 14200000, "time_on": 1000})
+    book._pending.append(("K1ABC", 10**20, 14200000, "20m", None, None, None, None, None, None, None))
+    book.log({"call": "W2AW", "freq": 14200000, "time_on": 1001})
+    book.start()
+    for _ in range(100):
+        if book.committed == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert book.committed == 2 and book.pending == 0
+
+    book.log({"call": "W3AW", "freq": 14200000, "time_on": 1002})
+    for _ in range(100):
+        if book.committed == 3:
+            break
+        await asyncio.sleep(0.01)
+    assert book.committed == 3  # Still flushing
+    await book.stop()
+
+
+def test_query_filters(book):
+    """Test call, band and time range filters, newest first."""
+    book.log({"call": "IK3XX", "freq": 14025000, "mode": "CW", "time_on": 100})
+    book.log({"call": "IK3XX", "freq": 7025000, "mode": "CW", "time_on": 200})
+    book.log({"call": "K1ABC", "freq": 14074000, "mode": "FT8", "time_on": 300})
+    book.flush()
+
+    page = book.query(call="ik3xx")
+    assert page["total"] == 2
+    assert [c["time_on"] for c in page["items"]] == [200, 100]
+    assert book.query(band="20m")["total"] == 2
+    assert [c["call"] for c in book.query(since=150, until=300)["items"]] == ["K1ABC", "IK3XX"]
+
+
+def test_export_adif_streams_chunks(book, monkeypatch):
+    """Test the ADIF export pages through the log and round-trips."""
+    monkeypatch.setattr("logbook.EXPORT_CHUNK", 2)
+    for i in range(5):
+        book.log({"call": f"N{i}XX", "freq": 14025000 + i, "mode": "CW", "time_on": 86400 + i})
+    book.flush()
+
+    chunks = list(book.export_adif())
+    assert chunks[0].endswith("<EOH>\n")
+    assert len(chunks) == 4  # Header + 2 + 2 + 1 records
+    records = parse_adif("".join(chunks))
+    assert [r["name"] for r in records] == [f"N{i}XX" for i in range(5)]
+    assert records[4]["freq"] == 14025004
+
+    # Rows stored before validation: milliseconds are converted, unrenderable ones skipped
+    book._db.execute("INSERT INTO contacts (call, time_on, freq) VALUES ('MS1XX', 1700000000000, 7030000)")
+    book._db.execute("INSERT INTO contacts (call, time_on, freq) VALUES ('BAD1XX', 1e20, 7030000)")
+    text = "".join(book.export_adif())
+    assert [r["name"] for r in parse_adif(text)][5:] == ["MS1XX"]
+    assert "<CALL:5>MS1XX<QSO_DATE:8>20231114<TIME_ON:6>221320" in text
+
+    record = adif_record({"call": "IK3XX", "freq": 14025000, "band": "20m", "mode": "CW",
+                          "time_on": 86400 + 3661, "name": "Bob", "comment": None})
+    assert "<QSO_DATE:8>19700102<TIME_ON:6>010101<FREQ:9>14.025000<BAND:3>20m" in record
+    assert "<NAME:3>Bob" in record
+    assert "COMMENT" not in record
@@ -0,0 +1,85 @@
+import io
+import logging
+import threading
+
+import pytest
+
+from logging_setup import RateLimitFilter, setup_logging
+
+
+@pytest.fixture
+def pipeline():
+    stream = io.StringIO()
+    pipeline = setup_logging(
+        {
+            "level": "INFO",
+            "levels": {"test.noisy": "DEBUG", "test.quiet": "WARNING"},
+            "format": "%(name)s %(levelname)s %(message)s",
+            "rate_limit": {"window_s": 60, "burst": 3, "sample_every": 5},
+        },
+        stream=stream,
+    )
+    yield pipeline, stream
+    pipeline.stop()
+    for name in ("test.noisy", "test.quiet"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+def test_records_written_on_listener_thread(pipeline):
+    """Test formatting/output happen off the calling thread, levels per module."""
+    pipeline, stream = pipeline
+    seen_threads = []
+    original_emit = pipeline.listener.handlers[0].emit
+
+    def emit(record):
+        seen_threads.append(threading.current_thread())
+        original_emit(record)
+
+    pipeline.listener.handlers[0].emit = emit
+    logging.getLogger("test.noisy").debug("value %d", 42)
+    logging.getLogger("test.quiet").info("hidden")
+    logging.getLogger("test.quiet").warning("shown")
+    pipeline.stop()
+
+    lines = stream.getvalue().splitlines()
+    assert lines == ["test.noisy DEBUG value 42", "test.quiet WARNING shown"]
+    assert all(thread is not threading.main_thread() for thread in seen_threads)
+
+
+def test_args_snapshotted_at_call_time(pipeline):
+    """Test a mutable argument changed after the call is logged as it was."""
+    pipeline, stream = pipeline
+    state = {"freq": 7030000}
+    logging.getLogger("test.noisy").debug("state %s", state)
+    state["freq"] = 14074000
+    pipeline.stop()
+
+    assert stream.getvalue().splitlines() == ["test.noisy DEBUG state {'freq': 7030000}"]
+
+
+def test_rate_limit_samples_noisy_templates(pipeline):
+    """Test bursts pass, then 1 in N is kept and tagged; warnings always pass."""
+    pipeline, stream = pipeline
+    logger = logging.getLogger("test.noisy")
+    for i in range(13):
+        logger.debug("→ rigctld: %s", i)
+    logger.debug("other template")
+    for i in range(5):
+        logger.warning("problem %d", i)
+    pipeline.stop()
+
+    lines = stream.getvalue().splitlines()
+    rigctld = [line for line in lines if "rigctld" in line]
+    # 3 burst + the 5th and 10th after it
+    assert rigctld[:3] == [f"test.noisy DEBUG → rigctld: {i}" for i in range(3)]
+    assert rigctld[3:] == ["test.noisy DEBUG → rigctld: 7 [sampled 1/5]", "test.noisy DEBUG → rigctld: 12 [sampled 1/5]"]
+    assert "test.noisy DEBUG other template" in lines
+    assert sum("problem" in line for line in lines) == 5
+    assert pipeline.stats()["rate_limited"] == 8
+
+
+def test_rate_limit_window_resets():
+    """Test counts reset after the window."""
+    limit = RateLimitFilter(window_s=0.0, burst=1, sample_every=1000)
+    record = logging.LogRecord("x", logging.DEBUG, __file__, 1, "msg", (), None)
+    assert all(limit.filter(record) for _ in range(10))
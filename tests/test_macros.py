@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from macros import Macro, build_batch, load_macros, rollback_steps, run_macro
+
+
+@pytest.fixture
+def state():
+    return {
+        "freq": 14074000,
+        "mode": "USB",
+        "filter_width": 2400,
+        "agc": "MED",
+        "rf_gain": 80,
+        "power": 30,
+        "break_in": False,
+        "rit": 0,
+    }
+
+
+def test_load_presets_and_macros():
+    """Test presets become ordered steps and macros keep their steps."""
+    macros = load_macros({
+        "presets": {
+            "40m_cw": {"label": "40m CW", "power": 50, "mode": "CW", "freq": 7030000,
+                       "filter_width": 500, "rollback": True},
+        },
+        "macros": {
+            "spot": {"steps": [{"cmd": "set_rit", "value": 0}, {"cmd": "set_spot", "value": True}]},
+        },
+    })
+
+    preset = macros["40m_cw"]
+    assert preset.label == "40m CW"
+    assert preset.rollback is True
+    assert preset.steps == [
+        {"cmd": "set_freq", "value": 7030000},
+        {"cmd": "set_filter_width", "value": 500, "mode": "CW"},
+        {"cmd": "set_power", "value": 50},
+    ]
+    assert macros["spot"].label == "spot"
+    assert len(macros["spot"].steps) == 2
+
+
+def test_load_macros_rejects_unknown_command():
+    """Test config errors are caught at load time."""
+    with pytest.raises(ValueError):
+        load_macros({"macros": {"bad": {"steps": [{"cmd": "reboot"}]}}})
+
+
+def test_build_batch_conversions(state):
+    """Test commands map to the same rigctld lines as handle_command."""
+    batch = build_batch([
+        {"cmd": "set_freq", "value": 7030000},
+        {"cmd": "set_mode", "value": "CW"},
+        {"cmd": "set_filter_width", "value": 500},
+        {"cmd": "set_agc", "value": "fast"},
+        {"cmd": "set_rf_gain", "value": 50},
+        {"cmd": "set_power", "value": 50},
+        {"cmd": "set_break_in", "value": True},
+        {"cmd": "set_rit", "value": -20},
+    ], state)
+
+    assert [line for line, _ in batch.steps] == [
+        "F 7030000",
+        "M CW 0",
+        "M CW 500",
+        "w ZZGT4;",
+        "w ZZAR+050;",
+        "L RFPOWER 0.5",
+        "U BKIN 1",
+        "J -20",
+    ]
+
+
+def test_rollback_restores_mode_and_width_together(state):
+    """Test rollback of a mode change also restores the old passband."""
+    steps = rollback_steps([{"cmd": "set_freq", "value": 7030000}, {"cmd": "set_mode", "value": "CW"}], state)
+    assert steps == [
+        {"cmd": "set_freq", "value": 14074000},
+        {"cmd": "set_filter_width", "value": 2400, "mode": "USB"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_macro_reports_steps_and_rolls_back(state):
+    """Test a failing step triggers a rollback batch."""
+    client = MagicMock()
+    client.execute_batch = AsyncMock(side_effect=[[True, False], [True, True]])
+    macro = Macro(
+        name="40m_cw",
+        label="40m CW",
+        steps=[{"cmd": "set_freq", "value": 7030000}, {"cmd": "set_power", "value": 50}],
+        rollback=True,
+    )
+
+    result = await run_macro(client, macro, state)
+
+    assert result["type"] == "macro_result"
+    assert result["success"] is False
+    assert [s["success"] for s in result["steps"]] == [True, False]
+    assert result["rolled_back"] is True
+    undo = client.execute_batch.await_args_list[1].args[0]
+    assert [line for line, _ in undo.steps] == ["F 14074000", "L RFPOWER 0.3"]
+
+
+@pytest.mark.asyncio
+async def test_run_macro_timeout_still_rolls_back(state):
+    """Test a timed-out batch is reported, not raised, and rolled back if still connected."""
+    client = MagicMock()
+    client.connected = True
+    client.execute_batch = AsyncMock(side_effect=[asyncio.TimeoutError(), [True]])
+    macro = Macro(name="f", label="f", steps=[{"cmd": "set_freq", "value": 7030000}], rollback=True)
+
+    result = await run_macro(client, macro, state)
+
+    assert result["success"] is False and result["error"] == "TimeoutError"
+    assert result["rolled_back"] is True
+
+    client.connected = False  # Link dropped while resyncing
+    client.execute_batch = AsyncMock(side_effect=asyncio.TimeoutError())
+    result = await run_macro(client, macro, state)
+    assert result["rolled_back"] is False
+    assert client.execute_batch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_run_macro_success_skips_rollback(state):
+    """Test a successful macro runs exactly one batch."""
+    client = MagicMock()
+    client.execute_batch = AsyncMock(return_value=[True])
+    macro = Macro(name="f", label="f", steps=[{"cmd": "set_freq", "value": 7030000}], rollback=True)
+
+    result = await run_macro(client, macro, state)
+
+    assert result["success"] is True
+    assert result["rolled_back"] is None
+    assert client.execute_batch.await_count == 1
@@ -1,9 +1,12 @@
 import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock, AsyncMock
 import base64
 
 from main import app, get_config
+from radio_state import RadioState
+from triggers import TriggerEngine, load_rules
 
 
 @pytest.fixture
@@ -58,16 +61,258 @@ def test_websocket_with_auth(client, mock_config):
     main.get_config.cache_clear()
 
     # Set up radio_state in the module
-    main.radio_state = {
-        "type": "state",
-        "freq": 14074000,
-        "mode": "USB",
-        "filter_width": 2400,
-        "smeter": -65,
-    }
+    main.radio_state = RadioState(freq=14074000, mode="USB", filter_width=2400, smeter=-65)
 
     with client.websocket_connect("/ws?token=operator:secret") as ws:
         # Should receive initial state
         data = ws.receive_json()
         assert data["type"] == "state"
         assert data["freq"] == 14074000
+
+
+def test_channels_api(client):
+    """Test channel import and paginated query over REST."""
+    import main
+    from channels import ChannelStore
+
+    main.channel_store = ChannelStore(":memory:")
+    credentials = base64.b64encode(b"operator:secret").decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+    try:
+        response = client.get("/api/channels")
+        assert response.status_code == 401
+
+        response = client.post(
+            "/api/channels/import?format=csv",
+            content="name,freq,mode,tags\nFT8,14074000,USB,ft8\nCW,7030000,CW,qrp\n",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {"imported": 2, "total": 2}
+
+        response = client.get("/api/channels?band=40m", headers=headers)
+        data = response.json()
+        assert data["total"] == 1
+        assert data["items"][0]["name"] == "CW"
+    finally:
+        main.channel_store.close()
+        main.channel_store = None
+
+
+def test_audio_websocket_closed_when_disabled(client):
+    """Test /ws/audio refuses connections when no audio source is running."""
+    import main
+
+    main.audio_hub = None
+    with pytest.raises(Exception):
+        with client.websocket_connect("/ws/audio?token=operator:secret") as ws:
+            ws.receive_bytes()
+
+
+def test_root_references_hashed_assets(client):
+    """Test index.html is rewritten to fingerprinted asset names."""
+    import main
+
+    credentials = base64.b64encode(b"operator:secret").decode()
+    response = client.get("/", headers={"Authorization": f"Basic {credentials}"})
+    assert response.headers["cache-control"] == "no-cache"
+    assert main.asset_pipeline.url("app.js") in response.text
+
+    response = client.get(main.asset_pipeline.url("app.js"))
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_health_endpoints(client):
+    """Test /healthz is always up and /readyz reports why it isn't ready."""
+    import main
+
+    with patch.object(main, "rig_supervisor", None), patch.object(main, "last_poll_ok", None):
+        response = client.get("/healthz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert "rig link not connected" in response.json()["problems"]
+
+    supervisor = MagicMock()
+    supervisor.status.return_value = {"type": "link", "state": "connected", "endpoint": "rig:4532"}
+    with patch.object(main, "rig_supervisor", supervisor), \
+            patch.object(main, "last_poll_ok", main.time.monotonic()):
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["link"]["endpoint"] == "rig:4532"
+
+
+def test_profile_endpoint(client, mock_config):
+    """Test the profiling capture is gated by config and auth."""
+    import main
+
+    credentials = base64.b64encode(b"operator:secret").decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+
+    response = client.post("/api/admin/profile?duration=0.1", headers=headers)
+    assert response.status_code == 404
+
+    mock_config["profiling"] = {"enabled": True, "max_duration_s": 0.2}
+    with patch.object(main, "profiler", None):
+        assert client.post("/api/admin/profile?duration=0.1").status_code == 401
+        assert client.post("/api/admin/profile?mode=bogus", headers=headers).status_code == 400
+
+        response = client.post("/api/admin/profile?duration=0.1&scope=all", headers=headers)
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+
+
+def test_websocket_commands_rate_limited(client, mock_config):
+    """Test excess commands get a retry-after error instead of reaching the rig."""
+    import main
+
+    mock_config["rate_limits"] = {"classes": {"query": {"rate": 0.01, "burst": 1}}}
+    rig = MagicMock()
+    rig.connected = True
+    rig.get_state = AsyncMock()
+    with patch.object(main, "rig_client", rig), patch.object(main, "radio_state", RadioState(freq=7030000)), \
+            patch.object(main, "rig_supervisor", None), patch.object(main, "macros", {}):
+        with client.websocket_connect("/ws?token=operator:secret") as ws:
+            assert ws.receive_json()["type"] == "state"  # Pushed on connect
+            ws.send_json({"cmd": "get_state"})
+            reply = ws.receive_json()
+            assert reply["type"] == "state" and reply["freq"] == 7030000
+            ws.send_json({"cmd": "get_state"})
+            error = ws.receive_json()
+            assert error["code"] == "rate_limited"
+            assert error["retry_after_ms"] > 0
+    rig.get_state.assert_not_awaited()  # Served from the polled state
+
+
+def test_get_state_skips_admission_control(client):
+    """Test a cache read is answered even when every rig slot is taken."""
+    import main
+    from ratelimit import AdmissionControl
+
+    rig = MagicMock()
+    rig.connected = True
+    with patch.object(main, "rig_client", rig), patch.object(main, "radio_state", RadioState(freq=7030000)), \
+            patch.object(main, "admission", AdmissionControl(max_concurrent=0)), \
+            patch.object(main, "rig_supervisor", None), patch.object(main, "macros", {}):
+        with client.websocket_connect("/ws?token=operator:secret") as ws:
+            assert ws.receive_json()["type"] == "state"  # Pushed on connect
+            ws.send_json({"cmd": "get_state"})
+            reply = ws.receive_json()
+            assert reply["type"] == "state" and reply["freq"] == 7030000
+            ws.send_json({"cmd": "set_freq", "value": 7040000})
+            assert ws.receive_json()["code"] == "overloaded"
+
+
+def test_state_api_etag_and_long_poll(client):
+    """Test /api/state 304s on an unchanged version and long-polls for the next."""
+    import main
+
+    credentials = base64.b64encode(b"operator:secret").decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+    state = RadioState()
+    with patch.object(main, "radio_state", state):
+        assert client.get("/api/state").status_code == 401
+        assert client.get("/api/state", headers=headers).status_code == 503
+
+        state.update(freq=14074000, mode="USB")
+        response = client.get("/api/state", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["freq"] == 14074000
+        version = response.json()["version"]
+        etag = response.headers["etag"]
+
+        response = client.get("/api/state", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        # Nothing changes: the long-poll times out with a 304
+        response = client.get(
+            f"/api/state?wait={version}&timeout=0.1", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+
+
+def test_logbook_api(client):
+    """Test logging a contact from the radio state, dupe check and ADIF export."""
+    import main
+    from logbook import Logbook
+
+    book = Logbook(":memory:")
+    credentials = base64.b64encode(b"operator:secret").decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+    state = RadioState(freq=14025000, mode="CW")
+    with patch.object(main, "logbook", book), patch.object(main, "radio_state", state):
+        assert client.get("/api/logbook").status_code == 401
+
+        response = client.post("/api/logbook", json={"call": "ik3xx", "rst_sent": "599"}, headers=headers)
+        assert response.status_code == 201
+        assert response.json()["freq"] == 14025000
+        assert response.json()["dupe"] is False
+        assert client.post("/api/logbook", json={"call": ""}, headers=headers).status_code == 400
+        assert client.post("/api/logbook", json=["IK3XX"], headers=headers).status_code == 400
+        assert client.post("/api/logbook", json={"call": "IK3XX", "time_on": 10**20},
+                           headers=headers).status_code == 400
+
+        response = client.get("/api/logbook/dupe?call=IK3XX", headers=headers)
+        assert response.json() == {"call": "IK3XX", "band": "20m", "mode": "CW", "dupe": True}
+
+        book.flush()
+        assert client.get("/api/logbook?band=20m", headers=headers).json()["total"] == 1
+        response = client.get("/api/logbook/export.adif", headers=headers)
+        assert response.status_code == 200
+        assert "<CALL:5>IK3XX" in response.text
+    book._db.close()
+
+
+def test_websocket_sends_stale_snapshot(client):
+    """Test a restored (not yet polled) state reaches new clients flagged stale."""
+    import main
+
+    main.get_config.cache_clear()
+    state = RadioState()
+    state.restore({"freq": 7030000, "mode": "CW"}, updated=1000.0)
+    with patch.object(main, "radio_state", state):
+        with client.websocket_connect("/ws?token=operator:secret") as ws:
+            data = ws.receive_json()
+            assert data["type"] == "state"
+            assert data["stale"] is True and data["freq"] == 7030000 and data["ts"] == 1000.0
+        assert main.polled_state() is None
+
+
+def test_subscribe_events(client):
+    """Test subscribe_events validates rule names and records the subscription."""
+    import main
+
+    engine = TriggerEngine(load_rules([{"name": "s9", "kind": "threshold", "level": -73}]))
+    with patch.object(main, "trigger_engine", engine), patch.object(main, "radio_state", RadioState()), \
+            patch.object(main, "rig_supervisor", None), patch.object(main, "macros", {}):
+        with client.websocket_connect("/ws?token=operator:secret") as ws:
+            ws.send_json({"cmd": "subscribe_events", "rules": ["nope"]})
+            assert ws.receive_json()["type"] == "error"
+            ws.send_json({"cmd": "subscribe_events", "rules": ["s9"]})
+            reply = ws.receive_json()
+            assert reply["subscribed"] and reply["rules"][0]["name"] == "s9"
+            session = main.connected_clients[-1]
+            assert session.wants_event("s9") and not session.wants_event("other")
+
+            ws.send_json({"cmd": "unsubscribe_events"})
+            assert ws.receive_json()["subscribed"] is False
+            assert not session.wants_event("s9")
+
+
+def test_websocket_handler_errors_are_logged(client, caplog):
+    """Test a RuntimeError from a handler bug is logged and closes the socket."""
+    import main
+
+    with patch.object(main, "handle_command", AsyncMock(side_effect=RuntimeError("boom"))), \
+            patch.object(main, "radio_state", RadioState()), patch.object(main, "rig_supervisor", None), \
+            patch.object(main, "macros", {}):
+        with client.websocket_connect("/ws?token=operator:secret") as ws:
+            ws.send_json({"cmd": "set_freq", "value": 7030000})
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+    assert closed.value.code == 1011
+    assert "WebSocket handler failed" in caplog.text
@@ -0,0 +1,85 @@
+import asyncio
+import marshal
+import sys
+import time
+
+import pytest
+
+from profiling import Profiler, collapse_stack
+
+
+async def handle_command():
+    """Stands in for main.handle_command: burns CPU on the loop thread."""
+    deadline = time.monotonic() + 0.15
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_sample_capture_keeps_hot_paths():
+    """Test sampled stacks are filtered and trimmed to the hot coroutines."""
+    profiler = Profiler(sample_interval=0.001)
+    task = asyncio.create_task(profiler.capture("sample", duration=0.3, scope="hot"))
+    await asyncio.sleep(0.05)
+    await handle_command()
+    capture = await task
+
+    lines = capture.content.decode().splitlines()
+    assert capture.filename.endswith(".collapsed")
+    assert capture.samples > 0
+    assert lines
+    assert all(line.startswith("handle_command (") for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) <= capture.samples
+
+
+class ClientSession:
+    """Stands in for sessions.ClientSession, whose sender task does the WebSocket sends."""
+
+    def _run(self):
+        return self.send_text()
+
+    def send_text(self):
+        return sys._getframe()
+
+
+class SpotStore:
+    def _run(self):
+        return sys._getframe()
+
+
+def test_session_sends_are_hot():
+    """Test the session sender is a hot path, matched by qualified name."""
+    stack = collapse_stack(ClientSession()._run(), scope="hot")
+    frames = stack.split(";")
+    assert frames[0].startswith("_run (") and frames[-1].startswith("send_text (")
+    assert collapse_stack(SpotStore()._run(), scope="hot") is None
+
+
+@pytest.mark.asyncio
+async def test_cprofile_capture_is_pstats():
+    """Test cProfile output loads as a pstats dict."""
+    profiler = Profiler()
+    task = asyncio.create_task(profiler.capture("cprofile", duration=0.2))
+    await asyncio.sleep(0.05)
+    await handle_command()
+    capture = await task
+
+    stats = marshal.loads(capture.content)
+    assert any(func[2] == "handle_command" for func in stats)
+
+
+@pytest.mark.asyncio
+async def test_capture_limits():
+    """Test bad modes, concurrent captures and the duration cap."""
+    profiler = Profiler(max_duration=0.1)
+    with pytest.raises(ValueError):
+        await profiler.capture("perf")
+
+    start = time.monotonic()
+    task = asyncio.create_task(profiler.capture("sample", duration=60))
+    await asyncio.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        await profiler.capture("sample", duration=1)
+    await task
+    assert time.monotonic() - start < 1
+    assert not profiler.busy
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from radio_state import RadioState
+from rig_client import (
+    THETIS_TO_AGC, ZZAR_TO_RF_GAIN, rf_gain_to_thetis, thetis_to_agc, zzar_to_rf_gain,
+)
+
+
+def test_update_tracks_dirty_fields_and_version():
+    """Test only real changes bump the version and mark fields dirty."""
+    state = RadioState()
+    assert state.version == 0
+
+    changed = state.update(freq=14074000, mode="USB")
+    assert changed and state.version == 1
+    assert state.take_dirty() == ["freq"]  # USB is already the default
+
+    assert state.update(freq=14074000, mode="USB") == 0
+    assert state.version == 1
+    assert state.dirty == []
+
+    state.update(smeter=-73, rit=10)
+    assert state.dirty == ["smeter", "rit"]
+    assert state["smeter"] == -73 and state.get("nope", 1) == 1 and "rit" in state
+
+
+def test_encoding_cached_per_version():
+    """Test the wire encoding is built once per version, with seq/ts."""
+    state = RadioState(freq=7030000, mode="CW")
+    wire = state.encode()
+    assert state.encode() is wire
+
+    message = json.loads(wire)
+    assert message["type"] == "state"
+    assert message["freq"] == 7030000 and message["mode"] == "CW"
+    assert message["seq"] == 1 and message["ts"] == state.updated
+
+    state.update(freq=7031000)
+    state.update(channel={"name": "CW"})
+    assert json.loads(state.encode())["seq"] == 2  # One message, one seq
+
+
+def test_conversion_tables_match_formulas_and_vectorize():
+    """Test lookup tables agree with the old inline math and work on arrays."""
+    for value in range(-20, 121):
+        assert zzar_to_rf_gain(value) == int((value + 20) / 140 * 100)
+    for pct in range(101):
+        assert rf_gain_to_thetis(pct) == int((pct / 100) * 140 - 20)
+    assert zzar_to_rf_gain(500) == 100 and rf_gain_to_thetis(-5) == -20
+    assert thetis_to_agc(5) == "MED" and thetis_to_agc(9) == "MED"
+
+    codes = np.array([0, 2, 4])
+    assert np.take(THETIS_TO_AGC, codes).tolist() == ["OFF", "SLOW", "FAST"]
+    assert np.take(ZZAR_TO_RF_GAIN, np.array([-20, 120]) + 20).tolist() == [0, 100]
+
+
+@pytest.mark.asyncio
+async def test_state_wait_changed_wakes_on_update():
+    """Test long-poll waiters wake on the next version."""
+    state = RadioState(freq=7030000)
+    waiter = asyncio.create_task(state.wait_changed(state.version, timeout=5))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    state.update(freq=7031000)
+    assert await waiter is True
+    assert await state.wait_changed(state.version, timeout=0.01) is False
+    assert await state.wait_changed(0, timeout=0.01) is True
+
+
+def test_restore_is_stale_until_next_update():
+    """Test a restored state is flagged stale and cleared by the next poll."""
+    state = RadioState()
+    state.restore({"freq": 7030000, "mode": "CW", "bogus": 1}, updated=1000.0)
+    assert state.stale and state.updated == 1000.0 and state.freq == 7030000
+    version = state.version
+    assert json.loads(state.encode())["stale"] is True
+
+    # The rig reports the same values: still a new version, no longer stale
+    assert state.update(freq=7030000, mode="CW") == 0
+    assert not state.stale and state.version == version + 1
+    assert "stale" not in json.loads(state.encode())
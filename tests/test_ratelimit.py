@@ -0,0 +1,66 @@
+import pytest
+
+from ratelimit import (
+    OVERLOADED, RATE_LIMITED, AdmissionControl, CommandLimiter, TokenBucket,
+    limits_from_config, overload_error,
+)
+
+
+def test_token_bucket_refills():
+    """Test burst, exhaustion and the retry-after estimate."""
+    bucket = TokenBucket(rate=2.0, burst=2)
+    bucket.updated = 100.0
+    for _ in range(2):
+        assert bucket.retry_after(100.0) == 0
+        bucket.take()
+    assert bucket.retry_after(100.0) == 0.5
+    assert bucket.retry_after(100.5) == 0
+
+
+def test_limiter_separates_command_classes():
+    """Test a spammed class is limited without starving the others."""
+    limiter = CommandLimiter(limits_from_config({
+        "connection": {"rate": 100, "burst": 100},
+        "classes": {"tune": {"rate": 1, "burst": 3}},
+    }))
+    now = 1000.0
+    limiter.connection.updated = now
+    assert [limiter.check("set_rit", now) for _ in range(3)] == [0, 0, 0]
+    assert limiter.check("set_rit", now) > 0
+    assert limiter.check("set_freq", now) > 0  # Same class
+    assert limiter.check("set_power", now) == 0
+    assert limiter.rejected == 2
+
+
+def test_limiter_connection_bucket_caps_total():
+    """Test the per-connection bucket applies across classes, charging nothing on reject."""
+    limiter = CommandLimiter(limits_from_config({"connection": {"rate": 1, "burst": 2}}))
+    now = limiter.connection.updated
+    assert limiter.check("set_freq", now) == 0
+    assert limiter.check("set_power", now) == 0
+    assert limiter.check("get_state", now) == 1.0
+    assert limiter.classes["query"].tokens == 4  # Untouched by the rejected command
+
+
+def test_limits_reject_buckets_that_never_refill():
+    """Test a zero rate or empty burst is a config error, not an infinite retry-after."""
+    for entry in ({"rate": 0}, {"rate": -1, "burst": 5}, {"rate": 1, "burst": 0}):
+        with pytest.raises(ValueError):
+            limits_from_config({"classes": {"query": entry}})
+    with pytest.raises(ValueError):
+        limits_from_config({"connection": {"rate": 0, "burst": 10}})
+
+
+def test_admission_control_and_errors():
+    """Test the in-flight cap and the error payload."""
+    admission = AdmissionControl(max_concurrent=2, retry_after=0.25)
+    assert admission.try_enter() and admission.try_enter()
+    assert not admission.try_enter()
+    admission.leave()
+    assert admission.try_enter()
+    assert admission.stats() == {"in_flight": 2, "max": 2, "rejected": 1}
+
+    error = overload_error(OVERLOADED, "set_freq", 0.25)
+    assert error["type"] == "error" and error["code"] == OVERLOADED
+    assert error["retry_after_ms"] >= 250
+    assert overload_error(RATE_LIMITED, "get_state", 0.1)["message"].startswith("Too many")
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from recorder import ReplayClient, RecordingFile, StateRecorder, load_recordings, recording_paths
+
+
+def make_state(freq, smeter=-90, mode="USB"):
+    return {
+        "freq": freq, "mode": mode, "filter_width": 2400, "smeter": smeter,
+        "agc": "MED", "rf_gain": 80, "power": 50, "break_in": False, "rit": 0,
+        "type": "state", "channel": None,
+    }
+
+
+def test_records_only_changes_and_reads_back_via_mmap(tmp_path):
+    """Test unchanged states are skipped and columns map straight from disk."""
+    recorder = StateRecorder(tmp_path, capacity=100)
+    assert recorder.record(make_state(14074000), t=1.0)
+    assert not recorder.record(make_state(14074000), t=1.2)
+    assert recorder.record(make_state(14074000, smeter=-80), t=1.4)
+    assert recorder.record(make_state(7030000, mode="CW"), t=2.0)
+    recorder.flush()
+
+    recording = RecordingFile(recorder.path)
+    assert len(recording) == 3
+    assert recording.columns["t"].tolist() == [1.0, 1.4, 2.0]
+    assert recording.columns["freq"].dtype == np.dtype("<i8")
+    assert recording.state(2) == {
+        "freq": 7030000, "mode": "CW", "filter_width": 2400, "smeter": -90,
+        "agc": "MED", "rf_gain": 80, "power": 50, "break_in": False, "rit": 0,
+    }
+    recording.close()
+    recorder.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_finishes_write_first(tmp_path):
+    """Test cancelling the poller mid-flush waits for the worker thread before close."""
+    recorder = StateRecorder(tmp_path, capacity=100, flush_interval=0)
+    write = recorder._write
+
+    def slow_write(records):
+        time.sleep(0.1)
+        write(records)
+
+    recorder._write = slow_write
+    recorder.record(make_state(14074000), t=1.0)
+    task = asyncio.create_task(recorder.flush_if_due())
+    await asyncio.sleep(0.02)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert recorder.records_written == 1  # Done by the time the cancel lands
+    recorder.close()
+
+
+def test_partial_flush_visible_and_rotation(tmp_path):
+    """Test readers see flushed records only, files rotate and old ones are pruned."""
+    recorder = StateRecorder(tmp_path, capacity=4, max_files=2)
+    for i in range(3):
+        recorder.record(make_state(14000000 + i), t=float(i))
+    recorder.flush()
+    first = recorder.path
+    assert len(RecordingFile(first)) == 3
+
+    for i in range(3, 13):
+        recorder.record(make_state(14000000 + i), t=float(i))
+    recorder.close()
+
+    paths = recording_paths(tmp_path)
+    assert len(paths) == 2  # 4 files written, 2 kept
+    assert first not in paths
+    columns = load_recordings(tmp_path)
+    assert columns["t"].tolist() == [8.0, 9.0, 10.0, 11.0, 12.0]
+
+
+@pytest.mark.asyncio
+async def test_replay_client_accelerated(tmp_path):
+    """Test replay follows the recording's timeline at the given speed."""
+    recorder = StateRecorder(tmp_path)
+    for i, freq in enumerate([14074000, 14075000, 14076000]):
+        recorder.record(make_state(freq), t=1000.0 + i * 10)
+    recorder.close()
+
+    client = ReplayClient(tmp_path, speed=10.0, loop=True)
+    await client.connect("ignored", 0, timeout=1)
+    assert client.connected
+    assert (await client.get_state())["freq"] == 14074000
+    start = client._started
+    assert client.position(start + 1.05) == 1  # 10.5 s into the recording
+    assert client.position(start + 2.05) == 0  # Looped after 20 s
+    client.loop = False
+    assert client.position(start + 2.05) == 2  # Holds the last state
+    assert await client.set_freq(7000000) is True
+
+
+@pytest.mark.asyncio
+async def test_replay_client_without_recordings(tmp_path):
+    """Test a missing recording fails like an unreachable rig."""
+    client = ReplayClient(tmp_path)
+    with pytest.raises(OSError):
+        await client.connect()
+    assert not client.connected
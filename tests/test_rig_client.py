@@ -138,17 +138,18 @@ async def test_rig_client_get_state():
         b"14074000\n",  # freq
         b"USB\n", b"2400\n",  # mode, width
         b"-65\n",  # smeter
-        b"0.8\n",  # RF gain
         b"0.5\n",  # RF power
-        b"1\n",  # SPOT
-        b"2\n",  # AGC
         b"0\n",  # Break-in
         b"100\n",  # RIT
     ]
     response_iter = iter(responses)
+    # Thetis ZZGT/ZZAR replies via 'w' end with ';' plus a null byte
+    raw_iter = iter([b"ZZGT2;", b"ZZAR+092;"])
 
     mock_reader = AsyncMock()
     mock_reader.readline = AsyncMock(side_effect=lambda: next(response_iter))
+    mock_reader.readuntil = AsyncMock(side_effect=lambda sep: next(raw_iter))
+    mock_reader.read = AsyncMock(return_value=b"\x00")
     mock_writer = MagicMock()
     mock_writer.write = MagicMock()
     mock_writer.drain = AsyncMock()
@@ -164,12 +165,12 @@ async def test_rig_client_get_state():
         assert state["mode"] == "USB"
         assert state["filter_width"] == 2400
         assert state["smeter"] == -65
-        assert state["rf_gain"] == 80
+        assert state["rf_gain"] == 80  # ZZAR +92 -> (92 + 20) / 140
         assert state["power"] == 50
-        assert state["spot"] is True
-        assert state["agc"] == "MED"
+        assert state["agc"] == "SLOW"  # ZZGT 2
         assert state["break_in"] is False
         assert state["rit"] == 100
+        assert state.version == 1
 
 
 @pytest.mark.asyncio
@@ -359,3 +360,119 @@ async def test_rig_client_set_rit():
         success = await client.set_rit(100)
         assert success is True
         mock_writer.write.assert_called_with(b"J 100\n")
+
+
+@pytest.mark.asyncio
+async def test_rig_client_execute_batch():
+    """Test batch is sent in one write and replies are read in order."""
+    from rig_client import RigBatch
+
+    client = RigClient(host="127.0.0.1", port=4532)
+
+    mock_reader = AsyncMock()
+    mock_reader.readline = AsyncMock(side_effect=[b"RPRT 0\n", b"RPRT -1\n"])
+    mock_writer = MagicMock()
+    mock_writer.write = MagicMock()
+    mock_writer.drain = AsyncMock()
+    mock_writer.close = MagicMock()
+    mock_writer.wait_closed = AsyncMock()
+    mock_writer.is_closing = MagicMock(return_value=False)
+
+    with patch("asyncio.open_connection", return_value=(mock_reader, mock_writer)):
+        await client.connect()
+        batch = RigBatch().set_freq(7030000).set_agc_thetis(4).set_mode("CW", 500)
+        results = await client.execute_batch(batch)
+        assert results == [True, True, False]
+        mock_writer.write.assert_called_once_with(b"F 7030000\nw ZZGT4;\nM CW 500\n")
+        assert mock_reader.readline.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rig_client_batch_timeout_resyncs_or_disconnects():
+    """Test late batch replies are read off, and the link is dropped if they never come."""
+    from rig_client import RigBatch
+
+    client = RigClient(host="127.0.0.1", port=4532)
+    replies = [b"RPRT 0\n", b"RPRT 0\n"]
+    calls = []
+
+    async def readline():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)  # First reply misses the batch deadline
+        return replies.pop(0)
+
+    mock_reader = AsyncMock()
+    mock_reader.readline = AsyncMock(side_effect=readline)
+    mock_writer = MagicMock()
+    mock_writer.drain = AsyncMock()
+    mock_writer.wait_closed = AsyncMock()
+    mock_writer.is_closing = MagicMock(return_value=False)
+
+    with patch("asyncio.open_connection", return_value=(mock_reader, mock_writer)):
+        await client.connect()
+        batch = RigBatch().set_freq(7030000).set_rit(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.execute_batch(batch, timeout=0.01)
+        assert client.connected and replies == []  # Both late replies consumed
+
+        async def never():
+            await asyncio.sleep(1)
+
+        mock_reader.readline = AsyncMock(side_effect=never)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.execute_batch(batch, timeout=0.01)
+        assert not client.connected
+
+
+@pytest.mark.asyncio
+async def test_rig_client_learns_capabilities_and_rtt():
+    """Test rejected optional controls are skipped on later polls and RTTs size timeouts."""
+    import rig_client
+
+    client = RigClient(host="127.0.0.1", port=4532)
+    replies = {
+        b"f\n": [b"14074000\n"],
+        b"m\n": [b"USB\n", b"2400\n"],
+        b"l STRENGTH\n": [b"-65\n"],
+        b"l RFPOWER\n": [b"RPRT -11\n"],
+        b"u BKIN\n": [b"RPRT -11\n"],
+        b"j\n": [b"0\n"],
+    }
+    queued = []
+    sent = []
+
+    def write(data):
+        sent.append(data)
+        queued.extend(replies.get(data, []))
+
+    mock_reader = AsyncMock()
+    mock_reader.readline = AsyncMock(side_effect=lambda: queued.pop(0))
+    mock_reader.readuntil = AsyncMock(side_effect=lambda sep: b"ZZGT3;" if sent[-1] == b"w ZZGT;\n" else b"ZZAR+050;")
+    mock_reader.read = AsyncMock(return_value=b"\x00")
+    mock_writer = MagicMock()
+    mock_writer.write = MagicMock(side_effect=write)
+    mock_writer.drain = AsyncMock()
+    mock_writer.is_closing = MagicMock(return_value=False)
+
+    with patch("asyncio.open_connection", return_value=(mock_reader, mock_writer)):
+        await client.connect()
+        await client.get_state()
+        assert client.capabilities == {
+            "agc": True, "rf_gain": True, "power": False, "break_in": False, "rit": True,
+        }
+
+        sent.clear()
+        state = await client.get_state()
+        assert b"l RFPOWER\n" not in sent and b"u BKIN\n" not in sent
+        assert state["power"] == 50 and state["break_in"] is False  # Defaults
+
+        # Re-probed every PROBE_EVERY polls
+        client.polls = rig_client.PROBE_EVERY - 1
+        sent.clear()
+        await client.get_state()
+        assert b"l RFPOWER\n" in sent
+
+    assert set(client.rtt) >= {"f", "m", "l STRENGTH", "w ZZGT", "j"}
+    assert client.timeout_for("f") == rig_client.MIN_TIMEOUT  # Mocked replies are instant
+    assert client.timeout_for("never sent") == rig_client.DEFAULT_TIMEOUT
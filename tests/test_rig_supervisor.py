@@ -0,0 +1,138 @@
+import pytest
+import asyncio
+import socket
+from unittest.mock import AsyncMock, patch
+
+from rig_client import RigClient
+from rig_supervisor import (
+    DNSCache,
+    Endpoint,
+    RigSupervisor,
+    endpoints_from_config,
+    LINK_BACKOFF,
+    LINK_CONNECTED,
+)
+
+
+def unused_port() -> int:
+    """Return a local TCP port with nothing listening on it."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_endpoints_from_config():
+    """Test primary endpoint comes first, then fallbacks in order."""
+    endpoints = endpoints_from_config({
+        "host": "yaesu.lan",
+        "port": 4532,
+        "fallback": [{"host": "10.0.0.2", "port": 4533}, {"host": "10.0.0.3"}],
+    })
+    assert endpoints == [
+        Endpoint("yaesu.lan", 4532),
+        Endpoint("10.0.0.2", 4533),
+        Endpoint("10.0.0.3", 4532),
+    ]
+
+
+def test_backoff_is_capped_and_jittered():
+    """Test backoff grows exponentially, stays within jitter and cap."""
+    supervisor = RigSupervisor(
+        RigClient(), [Endpoint("127.0.0.1")],
+        backoff_initial=0.25, backoff_max=2.0, jitter=0.2,
+    )
+    for attempt, base in [(1, 0.25), (2, 0.5), (3, 1.0)]:
+        delay = supervisor.backoff_delay(attempt)
+        assert base * 0.8 <= delay <= base * 1.2
+    assert supervisor.backoff_delay(20) <= 2.0
+
+
+@pytest.mark.asyncio
+async def test_dns_cache_hits_resolver_once():
+    """Test repeated lookups are served from the cache."""
+    cache = DNSCache(ttl=60)
+    loop = asyncio.get_running_loop()
+    infos = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 4532))]
+
+    with patch.object(loop, "getaddrinfo", AsyncMock(return_value=infos)) as resolver:
+        assert await cache.resolve("yaesu.lan", 4532) == "192.0.2.1"
+        assert await cache.resolve("yaesu.lan", 4532) == "192.0.2.1"
+        assert resolver.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_dns_cache_serves_stale_on_failure():
+    """Test a failed refresh falls back to the last known address."""
+    cache = DNSCache(ttl=0)
+    loop = asyncio.get_running_loop()
+    infos = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 4532))]
+
+    with patch.object(loop, "getaddrinfo", AsyncMock(side_effect=[infos, OSError("no dns")])):
+        assert await cache.resolve("yaesu.lan", 4532) == "192.0.2.1"
+        assert await cache.resolve("yaesu.lan", 4532) == "192.0.2.1"
+
+
+@pytest.mark.asyncio
+async def test_supervisor_fails_over_to_secondary():
+    """Test supervisor skips a dead primary and connects to the fallback."""
+    server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    states = []
+
+    async def on_change(status):
+        states.append(status["state"])
+
+    client = RigClient()
+    supervisor = RigSupervisor(
+        client,
+        [Endpoint("127.0.0.1", unused_port()), Endpoint("127.0.0.1", port)],
+        on_change=on_change,
+        connect_timeout=1.0,
+    )
+    supervisor.start()
+    try:
+        for _ in range(100):
+            if client.connected:
+                break
+            await asyncio.sleep(0.01)
+        assert client.connected
+        assert supervisor.endpoint == Endpoint("127.0.0.1", port)
+        assert supervisor.status()["state"] == LINK_CONNECTED
+        assert states[-1] == LINK_CONNECTED
+    finally:
+        await supervisor.stop()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_supervisor_backs_off_when_all_endpoints_down():
+    """Test supervisor reports backoff with a retry hint when nothing answers."""
+    client = RigClient()
+    supervisor = RigSupervisor(
+        client, [Endpoint("127.0.0.1", unused_port())],
+        backoff_initial=5.0, backoff_max=5.0, jitter=0,
+    )
+    supervisor.start()
+    try:
+        for _ in range(100):
+            if supervisor.state == LINK_BACKOFF:
+                break
+            await asyncio.sleep(0.01)
+        status = supervisor.status()
+        assert status["state"] == LINK_BACKOFF
+        assert status["retry_in_ms"] == 5000
+        assert status["error"]
+        assert not client.connected
+    finally:
+        await supervisor.stop()
+
+
+@pytest.mark.asyncio
+async def test_supervisor_names_messageless_errors():
+    """Test a connect timeout (empty message) still leaves a readable error."""
+    client = RigClient()
+    client.connect = AsyncMock(side_effect=asyncio.TimeoutError())
+    supervisor = RigSupervisor(client, [Endpoint("127.0.0.1", 4532)])
+    assert await supervisor._try_endpoints() is False
+    assert supervisor.last_error.endswith(": TimeoutError")
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from radio_state import RadioState
+from rig_client import RigClient
+from snapshot import SnapshotWriter, load_snapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test state and rig tuning survive a restart; the state comes back stale."""
+    path = tmp_path / "snap" / "snapshot.json"
+    state = RadioState(freq=7030000, mode="CW", rit=50)
+    rig = RigClient()
+    rig.record_rtt("f", 0.02)
+    rig.capabilities.update(agc=False, rit=True)
+    SnapshotWriter(path).save(state, rig)
+    assert [p.name for p in path.parent.iterdir()] == ["snapshot.json"]  # No temp files left
+
+    restored, new_rig = RadioState(), RigClient()
+    writer = SnapshotWriter(path)
+    assert writer.load(restored, new_rig)
+    assert restored.stale and restored.version
+    assert (restored.freq, restored.mode, restored.rit) == (7030000, "CW", 50)
+    assert restored.updated == state.updated
+    message = json.loads(restored.encode())
+    assert message["stale"] is True and message["freq"] == 7030000
+    assert new_rig.rtt == {"f": 0.02}
+    assert new_rig.capabilities == {"agc": False, "rit": True}
+
+    # Nothing polled since the restore: nothing to save
+    assert not writer.save_due(restored)
+    writer.save(restored, new_rig)
+    assert load_snapshot(path)["saved"] > 0
+
+
+@pytest.mark.asyncio
+async def test_save_if_due_throttles(tmp_path):
+    """Test periodic saves wait for the interval and a new version."""
+    path = tmp_path / "snapshot.json"
+    writer = SnapshotWriter(path, interval=0)
+    state, rig = RadioState(freq=14074000), RigClient()
+    await writer.save_if_due(state, rig)
+    assert load_snapshot(path)["state"]["freq"] == 14074000
+
+    path.unlink()
+    await writer.save_if_due(state, rig)  # Same version
+    assert not path.exists()
+
+    writer.interval = 3600
+    state.update(freq=14075000)
+    await writer.save_if_due(state, rig)  # Too soon
+    assert not path.exists()
+
+
+def test_unreadable_snapshot_ignored(tmp_path):
+    """Test a corrupt or foreign file is ignored, not fatal."""
+    path = tmp_path / "snapshot.json"
+    path.write_text("{not json")
+    assert load_snapshot(path) is None
+    path.write_text(json.dumps({"format": 99, "state": {}}))
+    assert load_snapshot(path) is None
+    assert load_snapshot(tmp_path / "missing.json") is None
+    assert not SnapshotWriter(path).load(RadioState())
@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+from spectrum import ROW_HEADER, SpectrumEngine, parse_row, pool_bins
+
+
+def tone_pcm(freq, sample_rate, samples, amplitude=0.5):
+    t = np.arange(samples) / sample_rate
+    return (amplitude * 32767 * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def test_compute_peak_at_tone_frequency():
+    """Test a tone shows up in the right bin at the right level."""
+    engine = SpectrumEngine(12000, fft_size=1024, db_floor=-120, db_ceiling=0)
+    samples = np.frombuffer(tone_pcm(1500, 12000, 4096), dtype="<i2").astype(np.float32) / 32768
+    rows = engine.compute(samples)
+
+    assert rows.dtype == np.uint8
+    assert rows.shape == ((4096 - 1024) // engine.hop + 1, 513)  # Overlapping frames
+    peak = int(np.argmax(rows[0]))
+    assert abs(peak * engine.bin_hz - 1500) <= engine.bin_hz
+    # -6 dBFS tone -> about 255 * 114 / 120
+    assert 230 <= rows[0, peak] <= 250
+
+
+def test_feed_batches_and_keeps_remainder():
+    """Test rows are only computed once a full batch is buffered."""
+    engine = SpectrumEngine(12000, fft_size=1024, overlap=0.5, batch_rows=4)
+    engine.subscribers.append(object())  # Rows are only computed for someone
+    engine.publish = lambda rows: None
+    engine.feed(tone_pcm(1000, 12000, 1500))
+    assert engine.rows_computed == 0
+
+    engine.feed(tone_pcm(1000, 12000, 1500))  # 3000 samples -> 7 rows at hop 300
+    assert engine.rows_computed == 7
+    assert len(engine._buffer) == 3000 - 7 * 300
+
+
+@pytest.mark.asyncio
+async def test_subscribers_are_rate_and_resolution_limited():
+    """Test per-client fps/bins limits and shared rows."""
+    engine = SpectrumEngine(12000, fft_size=1024, batch_rows=1, max_fps=10, max_bins=256)
+    a = engine.subscribe(fps=50, bins=1000)
+    b = engine.subscribe(bins=64)
+    c = engine.subscribe(bins=64)
+    assert (a.fps, a.bins) == (10, 256)
+    assert engine.subscribe(fps=-5).fps == 0.5  # Can't opt out of the rate limit
+
+    engine.set_span(3000)
+    engine.feed(tone_pcm(1000, 12000, 1024))
+    engine.feed(tone_pcm(1000, 12000, 1024))  # Too soon for another row
+
+    assert a.queue.qsize() == b.queue.qsize() == 1
+    row_b, row_c = b.queue.get_nowait(), c.queue.get_nowait()
+    assert row_b is row_c
+
+    row = parse_row(a.queue.get_nowait())
+    assert row["bins"] == 256
+    assert 2990 <= row["high_hz"] <= 3020
+    assert parse_row(row_b)["bins"] == 64
+
+
+def test_no_rows_without_subscribers():
+    """Test nothing is computed for nobody, and only the last window is kept."""
+    engine = SpectrumEngine(12000, fft_size=1024, batch_rows=1)
+    engine.feed(tone_pcm(1000, 12000, 12000))
+    assert engine.rows_computed == 0
+    assert len(engine._buffer) == 1024
+
+
+@pytest.mark.asyncio
+async def test_every_batch_published_at_max_fps():
+    """Test a batch spans one row period and is max-held into the row."""
+    engine = SpectrumEngine(12000, fft_size=1024, overlap=0.5, batch_rows=4, max_fps=10)
+    assert (engine.batch_rows, engine.hop) == (4, 300) and engine.batch_s == pytest.approx(0.1)
+    fine = SpectrumEngine(12000, fft_size=256, overlap=0.5, batch_rows=4, max_fps=10)
+    assert (fine.batch_rows, fine.hop) == (10, 120)  # Hop 128 allowed; more rows fill the period
+    subscription = engine.subscribe()
+
+    rows = np.zeros((4, 513), dtype=np.uint8)
+    rows[1, 100] = 200  # Not the newest row, still shown
+    for i in range(5):
+        with patch("spectrum.time.monotonic", return_value=1000.0 + i * 0.1 + (0.02 if i % 2 else 0)):
+            engine.publish(rows)
+    assert subscription.queue.qsize() == 4  # buffer_rows; none skipped
+    assert subscription.dropped == 1
+    assert max(subscription.queue.get_nowait()[ROW_HEADER.size:]) == 200
+
+
+def test_pool_bins_keeps_peaks():
+    """Test max-pooling keeps the strongest value in each group."""
+    row = np.zeros(100, dtype=np.uint8)
+    row[37] = 200
+    pooled = pool_bins(row, 10)
+    assert len(pooled) == 10
+    assert pooled[3] == 200
+    assert pool_bins(row, 200) is row
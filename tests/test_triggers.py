@@ -0,0 +1,103 @@
+import pytest
+
+from triggers import LinkRule, RetuneRule, ThresholdRule, TriggerEngine, load_rules
+
+
+def test_load_rules():
+    """Test rules are built per kind and bad entries are rejected."""
+    rules = load_rules([
+        {"name": "s9", "kind": "threshold", "level": -73, "average": 3},
+        {"name": "qsy", "kind": "retune", "min_hz": 100},
+        {"name": "down", "kind": "link", "for_s": 2},
+    ])
+    assert [type(rule) for rule in rules] == [ThresholdRule, RetuneRule, LinkRule]
+    assert rules[0].history.maxlen == 3 and rules[2].for_s == 2
+
+    with pytest.raises(ValueError):
+        load_rules([{"name": "x", "kind": "nope"}])
+    with pytest.raises(ValueError):
+        load_rules([{"name": "x", "kind": "retune", "for_s": 1}])
+    with pytest.raises(ValueError):
+        load_rules([{"name": "x", "kind": "link"}, {"name": "x", "kind": "link"}])
+
+
+def test_only_rules_watching_changed_fields_run():
+    """Test evaluation is indexed by field and idle ticks cost nothing."""
+    engine = TriggerEngine(load_rules([
+        {"name": "s9", "kind": "threshold", "level": -73},
+        {"name": "down", "kind": "link"},
+    ]))
+    engine.update({"smeter": -90, "link": "connected"}, now=0)
+    assert engine.evaluations == 2
+
+    engine.update({}, now=0.2)
+    engine.update({"freq": 7030000}, now=0.4)
+    assert engine.evaluations == 2
+
+    engine.update({"smeter": -95}, now=0.6)
+    assert engine.evaluations == 3
+
+
+def test_threshold_hysteresis_and_watched_freq():
+    """Test a rule fires above the level, releases below the band, only on its frequency."""
+    engine = TriggerEngine(load_rules([
+        {"name": "s9", "kind": "threshold", "level": -73, "hysteresis": 6, "freq": 14074000, "tolerance_hz": 500},
+    ]))
+    assert engine.update({"freq": 14074200, "smeter": -80}, now=0) == []
+
+    events = engine.update({"smeter": -70}, now=1)
+    assert [(e["rule"], e["state"], e["value"]) for e in events] == [("s9", "on", -70)]
+
+    assert engine.update({"smeter": -76}, now=2) == []  # Within the hysteresis band
+    assert [e["state"] for e in engine.update({"smeter": -80}, now=3)] == ["off"]
+
+    # Same signal on another frequency doesn't count
+    assert engine.update({"freq": 7030000, "smeter": -60}, now=4) == []
+
+
+def test_moving_average_and_debounce_advance_on_idle_ticks():
+    """Test pending rules keep evaluating while their fields stay unchanged."""
+    engine = TriggerEngine(load_rules([
+        {"name": "s9", "kind": "threshold", "level": -73, "average": 4, "for_s": 0.5},
+    ]))
+    engine.update({"smeter": -100}, now=0.0)
+    assert engine.update({"smeter": -60}, now=0.2) == []  # Average -80
+
+    # The reading stays at -60: the average catches up, then the debounce runs
+    fired = []
+    now = 0.2
+    for _ in range(8):
+        now += 0.2
+        fired += engine.update({}, now=now)
+    assert [e["state"] for e in fired] == ["on"]
+    assert engine.rules["s9"].average() == -60
+    assert engine.stats()["pending"] == 0
+
+
+def test_retune_ignores_own_commands():
+    """Test retunes are reported unless a client command caused them."""
+    engine = TriggerEngine(load_rules([{"name": "qsy", "kind": "retune", "min_hz": 100, "grace_s": 2}]))
+    engine.update({"freq": 14074000}, now=0)
+
+    engine.note_command(now=10)
+    assert engine.update({"freq": 14080000}, now=10.2) == []
+
+    events = engine.update({"freq": 7030000}, now=20)
+    assert [(e["kind"], e["value"]) for e in events] == [("retune", 7030000)]
+    assert engine.update({"freq": 7030050}, now=21) == []  # Below min_hz
+    assert len(engine.update({"freq": 7040000}, now=22)) == 1
+
+
+def test_link_rule_debounced():
+    """Test a short link blip is ignored and a lasting outage is reported once."""
+    engine = TriggerEngine(load_rules([{"name": "down", "kind": "link", "for_s": 3}]))
+    engine.update({"link": "connected"}, now=0)
+    engine.update({"link": "backoff"}, now=1)
+    assert engine.update({"link": "connected"}, now=2) == []
+
+    engine.update({"link": "backoff"}, now=10)
+    assert engine.update({}, now=12) == []
+    assert [e["state"] for e in engine.update({}, now=13)] == ["on"]
+    assert engine.update({}, now=14) == []
+    engine.update({"link": "connected"}, now=20)
+    assert [e["state"] for e in engine.update({}, now=23)] == ["off"]
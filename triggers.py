@@ -0,0 +1,308 @@
+"""Server-side alert rules evaluated on each change of the polled state.
+
+Rules are loaded from the `triggers` section of config.yaml. Each rule
+names the fields it watches, and the engine indexes rules by field. The
+poller passes only the fields that changed on a tick (RadioState
+dirty tracking), so a tick with nothing new evaluates no rules. A rule
+that still has work to do on unchanged values (a debounce timer running,
+or a moving average that hasn't caught up) stays pending and is
+evaluated on every tick until it settles.
+
+Rule kinds:
+
+- `threshold`: a field (default `smeter`) above or below `level`, with
+  `hysteresis` before it releases. Optional `average: N` compares the
+  mean of the last N polls instead of the raw value, and `freq` plus
+  `tolerance_hz` limits the rule to a watched frequency.
+- `retune`: the frequency moved by at least `min_hz` and no client
+  command changed the rig within `grace_s` (someone else retuned it).
+- `link`: the rigctld link left the connected state (the supervisor's
+  state, fed in as the `link` field).
+
+Threshold and link rules take `for_s` (the condition must hold that
+long before the rule fires, and be gone that long before it releases).
+Every rule takes `cooldown_s`, the minimum time between firings.
+Matches are sent to subscribed clients as:
+    {"type": "event", "rule": .., "kind": .., "state": "on" | "off", "value": .., "ts": ..}
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Rule:
+    """Base rule: debounced on/off state over a condition on `values`."""
+
+    kind = ""
+    fields: tuple = ()
+
+    def __init__(self, name: str, for_s: float = 0.0, cooldown_s: float = 0.0, release: bool = True):
+        self.name = name
+        self.for_s = for_s
+        self.cooldown_s = cooldown_s
+        self.release = release     # Also report the "off" transition
+        self.active = False
+        self.fired = 0
+        self._since: Optional[float] = None   # Condition differs from `active` since then
+        self._last_fired: Optional[float] = None
+
+    @property
+    def pending(self) -> bool:
+        """Needs evaluating on the next tick even if its fields don't change."""
+        return self._since is not None
+
+    def condition(self, values: dict, now: float) -> Optional[bool]:
+        """True/False, or None when it can't be decided yet (missing values)."""
+        raise NotImplementedError
+
+    def value(self, values: dict):
+        return None
+
+    def evaluate(self, values: dict, now: float) -> Optional[dict]:
+        """Returns an event message when the rule changes state."""
+        met = self.condition(values, now)
+        if met is None or met == self.active:
+            self._since = None
+            return None
+        if self._since is None:
+            self._since = now
+        if now - self._since < self.for_s:
+            return None  # Debouncing
+        if met and self._last_fired is not None and now - self._last_fired < self.cooldown_s:
+            return None
+        self._since = None
+        self.active = met
+        if met:
+            self.fired += 1
+            self._last_fired = now
+        elif not self.release:
+            return None
+        return {
+            "type": "event",
+            "rule": self.name,
+            "kind": self.kind,
+            "state": "on" if met else "off",
+            "value": self.value(values),
+            "ts": time.time(),
+        }
+
+
+class ThresholdRule(Rule):
+    """A (moving average of a) field above or below a level, with hysteresis."""
+
+    kind = "threshold"
+
+    def __init__(
+        self,
+        name: str,
+        level: float,
+        field: str = "smeter",
+        below: bool = False,
+        hysteresis: float = 0.0,
+        average: int = 1,
+        freq: Optional[int] = None,
+        tolerance_hz: int = 500,
+        **options,
+    ):
+        super().__init__(name, **options)
+        self.field = field
+        self.level = level
+        self.below = below
+        self.hysteresis = hysteresis
+        self.freq = freq
+        self.tolerance_hz = tolerance_hz
+        self.fields = (field, "freq") if freq is not None else (field,)
+        self.history: Deque[float] = deque(maxlen=max(1, int(average)))
+        self._last_tick = 0
+
+    @property
+    def pending(self) -> bool:
+        # An average still moving towards the current value needs more ticks
+        return self._since is not None or len(set(self.history)) > 1
+
+    def sample(self, value: float, tick: int) -> None:
+        """Add this poll's value; polls skipped since the last one repeat the old value."""
+        if self.history:
+            skipped = min(tick - self._last_tick - 1, self.history.maxlen)
+            self.history.extend([self.history[-1]] * max(skipped, 0))
+        self.history.append(value)
+        self._last_tick = tick
+
+    def average(self) -> Optional[float]:
+        return sum(self.history) / len(self.history) if self.history else None
+
+    def condition(self, values: dict, now: float) -> Optional[bool]:
+        level = self.average()
+        if level is None:
+            return None
+        if self.freq is not None and abs(values.get("freq", 0) - self.freq) > self.tolerance_hz:
+            return False
+        # Once active, only release past the hysteresis band
+        if self.below:
+            return level < (self.level + self.hysteresis if self.active else self.level)
+        return level > (self.level - self.hysteresis if self.active else self.level)
+
+    def value(self, values: dict):
+        level = self.average()
+        return round(level, 1) if level is not None else None
+
+
+class RetuneRule(Rule):
+    """The frequency changed without a client command: someone else retuned."""
+
+    kind = "retune"
+    fields = ("freq",)
+
+    def __init__(self, name: str, min_hz: int = 1, grace_s: float = 2.0, cooldown_s: float = 0.0):
+        super().__init__(name, cooldown_s=cooldown_s, release=False)
+        self.min_hz = min_hz
+        self.grace_s = grace_s
+        self.last_command = float("-inf")   # Set by TriggerEngine.note_command()
+        self._freq: Optional[int] = None    # Last frequency accepted as "ours"
+        self._moved = False
+
+    def observe(self, values: dict, now: float) -> None:
+        """Track frequency changes (called when `freq` changed this tick)."""
+        freq = values.get("freq")
+        if self._freq is None or now - self.last_command < self.grace_s:
+            self._freq = freq
+            self._moved = False
+        elif abs(freq - self._freq) >= self.min_hz:
+            self._freq = freq
+            self._moved = True
+
+    def condition(self, values: dict, now: float) -> Optional[bool]:
+        moved, self._moved = self._moved, False
+        return moved
+
+    def evaluate(self, values: dict, now: float) -> Optional[dict]:
+        event = super().evaluate(values, now)
+        self.active = False  # Each retune is its own event
+        return event
+
+    def value(self, values: dict):
+        return values.get("freq")
+
+
+class LinkRule(Rule):
+    """The rigctld link is not connected."""
+
+    kind = "link"
+    fields = ("link",)
+
+    def __init__(self, name: str, connected: str = "connected", **options):
+        super().__init__(name, **options)
+        self.connected = connected
+
+    def condition(self, values: dict, now: float) -> Optional[bool]:
+        link = values.get("link")
+        return None if link is None else link != self.connected
+
+    def value(self, values: dict):
+        return values.get("link")
+
+
+RULE_KINDS = {"threshold": ThresholdRule, "retune": RetuneRule, "link": LinkRule}
+
+
+def load_rules(entries: Optional[List[dict]]) -> List[Rule]:
+    """Build rules from the `triggers.rules` config list.
+
+    Raises: ValueError on an unknown kind, missing name or bad option
+    """
+    rules = []
+    for entry in entries or []:
+        entry = dict(entry)
+        kind = entry.pop("kind", None)
+        name = entry.pop("name", None)
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Trigger {name}: unknown kind {kind!r}")
+        if not name:
+            raise ValueError(f"Trigger of kind {kind}: missing name")
+        try:
+            rules.append(RULE_KINDS[kind](name, **entry))
+        except TypeError as e:
+            raise ValueError(f"Trigger {name}: {e}") from None
+    if len({rule.name for rule in rules}) != len(rules):
+        raise ValueError("Trigger names must be unique")
+    return rules
+
+
+class TriggerEngine:
+    """Evaluates rules incrementally against changed fields."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = {rule.name: rule for rule in rules}
+        self.values: dict = {}
+        self.ticks = 0
+        self.evaluations = 0
+        self._by_field: Dict[str, List[Rule]] = {}
+        for rule in rules:
+            for name in rule.fields:
+                self._by_field.setdefault(name, []).append(rule)
+        self._pending: Set[Rule] = set()
+        self._retunes = [rule for rule in rules if isinstance(rule, RetuneRule)]
+
+    @classmethod
+    def from_config(cls, triggers_config: dict) -> "TriggerEngine":
+        return cls(load_rules(triggers_config.get("rules")))
+
+    def note_command(self, now: Optional[float] = None) -> None:
+        """A client command changed the rig; the next retune is ours."""
+        now = time.monotonic() if now is None else now
+        for rule in self._retunes:
+            rule.last_command = now
+
+    def update(self, changed: dict, now: Optional[float] = None) -> List[dict]:
+        """Apply one poll tick's changed values; evaluate the rules watching them.
+
+        Call once per poll tick, with an empty dict when nothing changed,
+        so pending rules advance. Returns the event messages to send.
+        """
+        now = time.monotonic() if now is None else now
+        self.ticks += 1
+        self.values.update(changed)
+
+        affected = set(self._pending)
+        for name in changed:
+            affected.update(self._by_field.get(name, ()))
+        if not affected:
+            return []
+
+        events = []
+        for rule in affected:
+            if isinstance(rule, ThresholdRule):
+                if rule.field in self.values:
+                    rule.sample(self.values[rule.field], self.ticks)
+            elif isinstance(rule, RetuneRule) and "freq" in changed:
+                rule.observe(self.values, now)
+            self.evaluations += 1
+            try:
+                event = rule.evaluate(self.values, now)
+            except Exception as e:
+                logger.warning("Trigger %s failed: %s", rule.name, e)
+                continue
+            if event:
+                events.append(event)
+            if rule.pending:
+                self._pending.add(rule)
+            else:
+                self._pending.discard(rule)
+        return events
+
+    def stats(self) -> dict:
+        return {
+            "rules": len(self.rules),
+            "pending": len(self._pending),
+            "ticks": self.ticks,
+            "evaluations": self.evaluations,
+            "fired": {rule.name: rule.fired for rule in self.rules.values() if rule.fired},
+        }
+
+    def summary(self) -> List[dict]:
+        """Rule list for clients (name, kind, active)."""
+        return [{"name": rule.name, "kind": rule.kind, "active": rule.active} for rule in self.rules.values()]